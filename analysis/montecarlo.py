@@ -0,0 +1,267 @@
+# 13. analysis/montecarlo.py (Análisis de Dispersión Monte Carlo)
+# -----------------------------------------------------------------------------
+"""
+Dispersión de lanzamientos reales: cada parámetro de PARAMS puede tener una
+distribución (error del manómetro, volumen de llenado, C_D, masa, ángulo...).
+Las muestras se generan por bloques con semillas derivadas de una sola semilla
+(SeedSequence), de modo que el resultado no depende del número de procesos.
+Cada bloque se simula con el motor vectorizado run_simulation_batch en un
+ProcessPoolExecutor.
+
+Además de los parámetros de PARAMS se admite 'azimuth_deg' (rumbo del
+lanzamiento): el modelo 2D no depende del rumbo, así que el punto de impacto
+en el suelo es el alcance rotado por el azimut muestreado.
+"""
+import itertools
+import os
+import time
+from typing import NamedTuple
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from statistics import NormalDist
+from utils.parameters import PARAMS, SI_KEYS, convert_to_si, physical_mask
+
+# Tamaño de bloque fijo: las semillas se asignan por bloque, así la
+# reproducibilidad no depende de cuántos procesos se usen
+CHUNK_SIZE = 2000
+
+# Métricas de salida sobre las que se calculan percentiles y sensibilidades
+OUTPUTS = ('Max_Height', 'Max_Range')
+
+# Rondas máximas de remuestreo de valores fuera de los límites físicos
+MAX_RESAMPLE_ROUNDS = 100
+
+class MonteCarloResult(NamedTuple):
+    """Resultado de run_montecarlo."""
+    samples: pd.DataFrame       # Una fila por muestra: entradas y métricas
+    percentiles: pd.DataFrame   # Percentiles de apogeo y alcance
+    ellipse: dict               # Elipse de covarianza del impacto (None sin azimut)
+    sensitivity: pd.DataFrame   # Correlación de rangos (Spearman) entrada/salida
+    downrange: dict             # Dispersión 1D del alcance en tierra
+    excluded: int               # Muestras sin aterrizaje (fuera de las estadísticas)
+    runs_per_s: float           # Rendimiento del análisis
+
+def _draw(spec, rng, n):
+    """
+    Muestrea n valores de una distribución:
+    número (constante), ('normal', media, sigma), ('uniform', min, max),
+    ('triangular', min, moda, max), ('lognormal', mu, sigma) o una función
+    f(rng, n).
+    """
+    if callable(spec):
+        return np.asarray(spec(rng, n), dtype=float)
+    if np.isscalar(spec):
+        return np.full(n, float(spec))
+    kind, *args = spec
+    if kind == 'normal':
+        return rng.normal(args[0], args[1], n)
+    if kind == 'uniform':
+        return rng.uniform(args[0], args[1], n)
+    if kind == 'triangular':
+        return rng.triangular(args[0], args[1], args[2], n)
+    if kind == 'lognormal':
+        return rng.lognormal(args[0], args[1], n)
+    raise ValueError(f"Distribución desconocida: {kind!r}")
+
+def sample_parameters(distributions, n, rng):
+    """Muestrea n valores de cada parámetro. Retorna un DataFrame."""
+    unknown = [key for key in distributions if key not in PARAMS and key != 'azimuth_deg']
+    if unknown:
+        raise KeyError(f"Claves de parámetros desconocidas: {', '.join(unknown)}")
+    return pd.DataFrame({key: _draw(spec, rng, n) for key, spec in distributions.items()})
+
+def _params_table(samples, base_params):
+    """Tabla de parámetros SI: base + valores muestreados (claves SI prevalecen)."""
+    table = pd.DataFrame([base_params] * len(samples))
+    for key in samples.columns:
+        if key in table.columns and key not in SI_KEYS:
+            table[key] = samples[key].to_numpy()
+    table = convert_to_si(table)
+    for key in samples.columns:
+        if key in SI_KEYS:
+            table[key] = samples[key].to_numpy()
+    return table
+
+def _sample_valid(distributions, base_params, n, rng):
+    """
+    Muestrea n combinaciones dentro de los límites físicos (physical_mask):
+    las filas inválidas se vuelven a muestrear, lo que equivale a truncar las
+    distribuciones. Retorna (muestras, tabla SI).
+    """
+    samples = sample_parameters(distributions, n, rng)
+    table = _params_table(samples, base_params)
+    for _ in range(MAX_RESAMPLE_ROUNDS):
+        invalid = np.flatnonzero(~physical_mask(table))
+        if invalid.size == 0:
+            return samples, table
+        redraw = sample_parameters(distributions, invalid.size, rng)
+        samples.iloc[invalid] = redraw.to_numpy()
+        table.iloc[invalid] = _params_table(redraw, base_params)[table.columns].to_numpy()
+    raise ValueError("Las distribuciones generan casi solo parámetros fuera de los "
+                     "límites físicos (agua < botella, áreas, presión y masa positivas...)")
+
+def _run_chunk(distributions, base_params, n, seed_seq):
+    """Muestrea y simula un bloque de vuelos (se ejecuta en un trabajador)."""
+    from main_simulation import run_simulation_batch
+
+    rng = np.random.default_rng(seed_seq)
+    samples, table = _sample_valid(distributions, base_params, n, rng)
+
+    metrics = run_simulation_batch(table)
+    result = pd.concat([samples, metrics.drop(columns='Landing_X')], axis=1)
+
+    # Punto de impacto en el plano del suelo (alcance rotado por el azimut)
+    azimuth = np.radians(samples['azimuth_deg']) if 'azimuth_deg' in samples else 0.0
+    result['Impact_X'] = metrics['Landing_X'] * np.cos(azimuth)
+    result['Impact_Y'] = metrics['Landing_X'] * np.sin(azimuth)
+    return result
+
+def iter_montecarlo(distributions, n_samples, seed=0, base_params=None,
+                    workers=None, chunk_size=CHUNK_SIZE):
+    """
+    Genera los resúmenes por muestra bloque a bloque (DataFrames en orden),
+    a medida que los procesos trabajadores los terminan.
+    """
+    base = PARAMS if base_params is None else base_params
+    n_chunks = -(-n_samples // chunk_size)
+    sizes = [min(chunk_size, n_samples - i * chunk_size) for i in range(n_chunks)]
+    seeds = np.random.SeedSequence(seed).spawn(n_chunks)
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = max(1, min(workers, n_chunks))
+
+    if workers == 1:
+        for size, seed_seq in zip(sizes, seeds):
+            yield _run_chunk(distributions, base, size, seed_seq)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        yield from executor.map(_run_chunk, itertools.repeat(distributions),
+                                itertools.repeat(base), sizes, seeds)
+
+def landing_ellipse(x, y, confidence=0.95):
+    """
+    Elipse de covarianza del punto de impacto: centro, semiejes para el nivel
+    de confianza dado (distribución normal bivariada) y orientación del eje
+    mayor respecto al eje X en grados.
+    """
+    cov = np.cov(np.vstack([x, y]))
+    eigvals, eigvecs = np.linalg.eigh(cov)
+    eigvals = np.clip(eigvals, 0.0, None)
+    # Radio de Mahalanobis para 2 grados de libertad: sqrt(-2 ln(1 - p))
+    k = np.sqrt(-2.0 * np.log(1.0 - confidence))
+    major = eigvecs[:, 1]
+    return {
+        'center': (float(np.mean(x)), float(np.mean(y))),
+        'covariance': cov,
+        'semi_major': float(k * np.sqrt(eigvals[1])),
+        'semi_minor': float(k * np.sqrt(eigvals[0])),
+        'angle_deg': float(np.degrees(np.arctan2(major[1], major[0]))),
+        'confidence': confidence,
+    }
+
+def downrange_dispersion(x, confidence=0.95):
+    """
+    Dispersión 1D del punto de impacto a lo largo del rumbo de lanzamiento:
+    media, desviación típica e intervalo normal al nivel de confianza dado.
+    """
+    mean = float(np.mean(x))
+    std = float(np.std(x, ddof=1)) if len(x) > 1 else 0.0
+    half_width = NormalDist().inv_cdf(0.5 + confidence / 2.0) * std
+    return {
+        'mean': mean,
+        'std': std,
+        'interval': (mean - half_width, mean + half_width),
+        'confidence': confidence,
+    }
+
+def sensitivity_ranking(samples, inputs, outputs=OUTPUTS):
+    """
+    Correlación de rangos de Spearman entre cada entrada variable y cada
+    salida, ordenada por el efecto absoluto sobre la primera salida.
+    """
+    varying = [key for key in inputs if samples[key].nunique() > 1]
+    ranks = samples[varying + list(outputs)].rank()
+    corr = ranks.corr().loc[varying, list(outputs)]
+    return corr.reindex(corr[outputs[0]].abs().sort_values(ascending=False).index)
+
+def run_montecarlo(distributions, n_samples, seed=0, base_params=None, workers=None,
+                   chunk_size=CHUNK_SIZE, percentiles=(5, 50, 95), confidence=0.95,
+                   verbose=True, store=None, sweep_id=None):
+    """
+    Ejecuta un análisis de dispersión Monte Carlo.
+
+    distributions es un dict {clave de PARAMS: distribución} (ver _draw).
+    Las muestras fuera de los límites físicos se vuelven a muestrear
+    (distribuciones truncadas). El resultado es reproducible a partir de seed
+    para un chunk_size dado, con cualquier número de procesos.
+
+    Las estadísticas usan solo los vuelos que aterrizaron; los demás siguen
+    en samples (Landed=False) y se cuentan en excluded.
+
+    Sin una distribución de 'azimuth_deg' todos los impactos caen sobre el
+    rumbo de lanzamiento: ellipse es None (la covarianza sería singular) y
+    la dispersión del impacto es la 1D de downrange.
+
+    store es un utils.results_store.ResultsStore opcional donde se guardan
+    las muestras bloque a bloque, bajo sweep_id (uno nuevo si no se indica),
+    que queda en samples.attrs['sweep_id'].
+    """
+    start = time.perf_counter()
+    if store is not None and sweep_id is None:
+        sweep_id = store.new_sweep('montecarlo', n_samples=n_samples, seed=seed,
+                                   distributions=distributions)
+    chunks = []
+    for chunk in iter_montecarlo(distributions, n_samples, seed, base_params, workers,
+                                 chunk_size):
+        chunks.append(chunk)
+        if store is not None:
+            store.append(chunk, sweep_id)
+    if store is not None:
+        store.flush()
+    samples = pd.concat(chunks, ignore_index=True)
+    if store is not None:
+        samples.attrs['sweep_id'] = sweep_id
+    elapsed = time.perf_counter() - start
+
+    landed = samples[samples['Landed']]
+    excluded = len(samples) - len(landed)
+    if landed.empty:
+        raise ValueError("Ningún vuelo muestreado aterrizó dentro de t_max")
+
+    table = landed[list(OUTPUTS)].quantile([p / 100.0 for p in percentiles])
+    table.index = [f"P{p}" for p in percentiles]
+
+    lateral = landed['Impact_Y'].nunique() > 1
+    result = MonteCarloResult(
+        samples=samples,
+        percentiles=table,
+        ellipse=(landing_ellipse(landed['Impact_X'], landed['Impact_Y'], confidence)
+                 if lateral else None),
+        sensitivity=sensitivity_ranking(landed, list(distributions)),
+        downrange=downrange_dispersion(np.hypot(landed['Impact_X'], landed['Impact_Y']),
+                                       confidence),
+        excluded=excluded,
+        runs_per_s=n_samples / elapsed if elapsed > 0 else float('inf'),
+    )
+
+    if verbose:
+        print(f"Monte Carlo: {n_samples} vuelos en {elapsed:.2f} s "
+              f"→ {result.runs_per_s:.0f} vuelos/s")
+        if excluded:
+            print(f"⚠ {excluded} vuelos no aterrizaron y se excluyen de las estadísticas")
+        print(result.percentiles.to_string())
+        downrange = result.downrange
+        print(f"Alcance en tierra ({confidence:.0%}): {downrange['mean']:.2f} ± "
+              f"{downrange['std']:.2f} m, intervalo [{downrange['interval'][0]:.2f}, "
+              f"{downrange['interval'][1]:.2f}] m")
+        if result.ellipse is not None:
+            ellipse = result.ellipse
+            print(f"Elipse de impacto ({confidence:.0%}): centro=({ellipse['center'][0]:.2f}, "
+                  f"{ellipse['center'][1]:.2f}) m, semiejes={ellipse['semi_major']:.2f} x "
+                  f"{ellipse['semi_minor']:.2f} m, ángulo={ellipse['angle_deg']:.1f}°")
+        print(result.sensitivity.to_string())
+    return result
+# -----------------------------------------------------------------------------
@@ -0,0 +1,284 @@
+# 14. analysis/optimize.py (Optimización de Parámetros de Lanzamiento)
+# -----------------------------------------------------------------------------
+"""
+Optimización de cualquier clave de PARAMS (volumen de agua, presión, ángulo...)
+para maximizar una métrica de resumen (apogeo, alcance) o alcanzar un alcance
+objetivo, en lugar de barrer una rejilla fija.
+
+- Una variable: método de Brent acotado (sección dorada + interpolación
+  parabólica).
+- Varias variables: Nelder–Mead en coordenadas normalizadas a los límites.
+
+Cada punto evaluado se memoriza, y las restricciones (p. ej. presión máxima o
+fracción de llenado máxima) se aplican como penalización.
+"""
+from math import sqrt
+import time
+from typing import NamedTuple
+import numpy as np
+from utils.parameters import PARAMS, SI_KEYS, convert_to_si
+
+# Penalización base para puntos que violan alguna restricción
+PENALTY = 1e6
+
+class OptimizationResult(NamedTuple):
+    """Resultado de optimize."""
+    params: dict        # Valores óptimos de las claves optimizadas
+    value: float        # Métrica en el óptimo
+    summary: dict       # Resumen completo del vuelo óptimo (FlightSummary.as_row)
+    evaluations: int    # Simulaciones ejecutadas (puntos distintos)
+    calls: int          # Llamadas al objetivo (incluye aciertos de la memoria)
+    method: str
+    history: list       # Puntos simulados: {clave: valor, métricas...} en orden
+
+def max_pressure(psi):
+    """Restricción: presión manométrica inicial como máximo psi."""
+    return lambda p: psi - p['p_manometric_psi']
+
+def max_fill_ratio(ratio):
+    """Restricción: fracción de llenado V_0w_L / V_r_L como máximo ratio."""
+    return lambda p: ratio - p['V_0w_L'] / p['V_r_L']
+
+class Objective:
+    """
+    Objetivo memorizado: vector de valores -> costo a minimizar.
+
+    El costo es -métrica al maximizar, |métrica - target| con un objetivo
+    fijo, y PENALTY + violación si alguna restricción (función de los
+    parámetros que retorna un margen >= 0 cuando se cumple) no se cumple.
+    """
+
+    def __init__(self, keys, base_params, metric, target, constraints, backend):
+        self.keys = keys
+        self.base = base_params
+        self.metric = metric
+        self.target = target
+        self.constraints = constraints
+        self.backend = backend
+        self.cache = {}
+        self.calls = 0
+
+    def params_for(self, x):
+        """Diccionario completo (unidades de enseñanza y SI) para el punto x."""
+        row = dict(zip(self.keys, (float(v) for v in x)))
+        params = self.base.copy()
+        params.update({k: v for k, v in row.items() if k not in SI_KEYS})
+        params = convert_to_si(params)
+        params.update({k: v for k, v in row.items() if k in SI_KEYS})
+        return params
+
+    def evaluate(self, x):
+        """Retorna (costo, resumen) del punto x, simulando solo si es nuevo."""
+        from main_simulation import run_simulation
+
+        self.calls += 1
+        key = tuple(round(float(v), 12) for v in x)
+        if key not in self.cache:
+            params = self.params_for(key)
+            violation = sum(max(0.0, -g(params)) for g in self.constraints)
+            if violation > 0:
+                self.cache[key] = (PENALTY * (1.0 + violation), None)
+            else:
+                summary = run_simulation(params, record='summary', verbose=False,
+                                         backend=self.backend).as_row()
+                value = summary[self.metric]
+                cost = -value if self.target is None else abs(value - self.target)
+                self.cache[key] = (cost, summary)
+        return self.cache[key]
+
+    def __call__(self, x):
+        return self.evaluate(x)[0]
+
+    @property
+    def evaluations(self):
+        return sum(1 for _, summary in self.cache.values() if summary is not None)
+
+    def history(self):
+        """Puntos simulados en orden de evaluación, con sus métricas."""
+        return [{**dict(zip(self.keys, key)), **summary}
+                for key, (_, summary) in self.cache.items() if summary is not None]
+
+def brent_bounded(f, a, b, xtol=1e-3, max_evals=100):
+    """
+    Minimiza f(x) en [a, b] con el método de Brent (sección dorada con pasos
+    parabólicos cuando la parábola es fiable). Retorna (x, f(x)).
+    """
+    golden = 0.5 * (3.0 - sqrt(5.0))
+    x = w = v = a + golden * (b - a)
+    fx = fw = fv = f(x)
+    d = e = 0.0
+    n = 1
+
+    while n < max_evals:
+        m = 0.5 * (a + b)
+        tol1 = 1.5e-8 * abs(x) + xtol / 3.0
+        tol2 = 2.0 * tol1
+        if abs(x - m) <= tol2 - 0.5 * (b - a):
+            break
+
+        golden_step = True
+        if abs(e) > tol1:
+            # Interpolación parabólica por x, w, v
+            r = (x - w) * (fx - fv)
+            q = (x - v) * (fx - fw)
+            p = (x - v) * q - (x - w) * r
+            q = 2.0 * (q - r)
+            if q > 0:
+                p = -p
+            q = abs(q)
+            e_prev, e = e, d
+            if abs(p) < abs(0.5 * q * e_prev) and q * (a - x) < p < q * (b - x):
+                d = p / q
+                u = x + d
+                if u - a < tol2 or b - u < tol2:
+                    d = tol1 if x < m else -tol1
+                golden_step = False
+        if golden_step:
+            e = (b - x) if x < m else (a - x)
+            d = golden * e
+
+        u = x + (d if abs(d) >= tol1 else (tol1 if d > 0 else -tol1))
+        fu = f(u)
+        n += 1
+
+        if fu <= fx:
+            if u < x:
+                b = x
+            else:
+                a = x
+            v, fv, w, fw = w, fw, x, fx
+            x, fx = u, fu
+        else:
+            if u < x:
+                a = u
+            else:
+                b = u
+            if fu <= fw or w == x:
+                v, fv, w, fw = w, fw, u, fu
+            elif fu <= fv or v == x or v == w:
+                v, fv = u, fu
+    return x, fx
+
+def nelder_mead(f, x0, lower, upper, xtol=1e-3, ftol=1e-4, max_evals=200, step=0.1):
+    """
+    Minimiza f en la caja [lower, upper] con Nelder–Mead. Trabaja en
+    coordenadas normalizadas a [0, 1] y recorta los vértices a la caja; xtol
+    se expresa como fracción del rango de cada variable. Retorna (x, f(x)).
+    """
+    lower = np.asarray(lower, dtype=float)
+    upper = np.asarray(upper, dtype=float)
+    span = upper - lower
+
+    def g(u):
+        return f(lower + np.clip(u, 0.0, 1.0) * span)
+
+    n = len(x0)
+    u0 = np.clip((np.asarray(x0, dtype=float) - lower) / span, 0.0, 1.0)
+    simplex = [u0]
+    for i in range(n):
+        u = u0.copy()
+        u[i] = u[i] + step if u[i] + step <= 1.0 else u[i] - step
+        simplex.append(u)
+    simplex = np.array(simplex)
+    values = np.array([g(u) for u in simplex])
+    evals = n + 1
+
+    while evals < max_evals:
+        order = np.argsort(values)
+        simplex, values = simplex[order], values[order]
+        if (np.max(np.abs(simplex[1:] - simplex[0])) <= xtol
+                and np.max(np.abs(values[1:] - values[0])) <= ftol):
+            break
+
+        centroid = simplex[:-1].mean(axis=0)
+        reflected = np.clip(centroid + (centroid - simplex[-1]), 0.0, 1.0)
+        f_r = g(reflected)
+        evals += 1
+
+        if f_r < values[0]:
+            expanded = np.clip(centroid + 2.0 * (centroid - simplex[-1]), 0.0, 1.0)
+            f_e = g(expanded)
+            evals += 1
+            simplex[-1], values[-1] = (expanded, f_e) if f_e < f_r else (reflected, f_r)
+        elif f_r < values[-2]:
+            simplex[-1], values[-1] = reflected, f_r
+        else:
+            # Contracción (exterior si el reflejado mejora al peor vértice)
+            if f_r < values[-1]:
+                contracted = centroid + 0.5 * (reflected - centroid)
+            else:
+                contracted = centroid + 0.5 * (simplex[-1] - centroid)
+            f_c = g(contracted)
+            evals += 1
+            if f_c < min(f_r, values[-1]):
+                simplex[-1], values[-1] = contracted, f_c
+            else:
+                # Encogimiento hacia el mejor vértice
+                simplex[1:] = simplex[0] + 0.5 * (simplex[1:] - simplex[0])
+                values[1:] = [g(u) for u in simplex[1:]]
+                evals += n
+
+    best = np.argmin(values)
+    return lower + np.clip(simplex[best], 0.0, 1.0) * span, values[best]
+
+def optimize(bounds, metric='Max_Range', target=None, base_params=None, constraints=(),
+             method=None, x0=None, xtol=1e-3, max_evals=200, backend='kernel',
+             verbose=True):
+    """
+    Optimiza las claves de bounds ({clave de PARAMS: (mín, máx)}).
+
+    Sin target maximiza metric (una columna de FlightSummary.as_row, p. ej.
+    'Max_Height' o 'Max_Range'); con target busca metric == target.
+    constraints es una secuencia de funciones de los parámetros que retornan
+    un margen >= 0 cuando se cumplen (ver max_pressure y max_fill_ratio).
+    method es 'brent' (una variable) o 'nelder-mead' (por defecto según el
+    número de variables). xtol es absoluto en Brent y relativo al rango de
+    cada variable en Nelder–Mead.
+    """
+    base = PARAMS if base_params is None else base_params
+    keys = list(bounds)
+    unknown = [key for key in keys if key not in base]
+    if unknown:
+        raise KeyError(f"Claves de parámetros desconocidas: {', '.join(unknown)}")
+    if method is None:
+        method = 'brent' if len(keys) == 1 else 'nelder-mead'
+    if method == 'brent' and len(keys) != 1:
+        raise ValueError("El método 'brent' optimiza una sola variable")
+
+    objective = Objective(keys, base, metric, target, list(constraints), backend)
+    lower = [bounds[key][0] for key in keys]
+    upper = [bounds[key][1] for key in keys]
+
+    start = time.perf_counter()
+    if method == 'brent':
+        x, _ = brent_bounded(lambda v: objective([v]), lower[0], upper[0],
+                             xtol=xtol, max_evals=max_evals)
+        x = [x]
+    elif method == 'nelder-mead':
+        if x0 is None:
+            x0 = [min(max(base[key], lo), hi) for key, lo, hi in zip(keys, lower, upper)]
+        x, _ = nelder_mead(objective, x0, lower, upper, xtol=xtol, max_evals=max_evals)
+    else:
+        raise ValueError(f"Método de optimización desconocido: {method!r}")
+    elapsed = time.perf_counter() - start
+
+    cost, summary = objective.evaluate(x)
+    if summary is None:
+        raise ValueError("No se encontró ningún punto que cumpla las restricciones")
+
+    result = OptimizationResult(
+        params={key: float(v) for key, v in zip(keys, x)},
+        value=summary[metric],
+        summary=summary,
+        evaluations=objective.evaluations,
+        calls=objective.calls,
+        method=method,
+        history=objective.history(),
+    )
+
+    if verbose:
+        values = ", ".join(f"{k}={v:.4g}" for k, v in result.params.items())
+        print(f"Optimización ({method}): {values} → {metric}={result.value:.3f} "
+              f"({result.evaluations} simulaciones en {elapsed:.2f} s)")
+    return result
+# -----------------------------------------------------------------------------
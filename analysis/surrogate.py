@@ -0,0 +1,219 @@
+# 17. analysis/surrogate.py (Modelo Sustituto para Predicción Instantánea)
+# -----------------------------------------------------------------------------
+"""
+Superficie de respuesta de apogeo y alcance para ajustes interactivos:
+
+1. Muestreo del espacio de diseño con hipercubo latino (LHS) y simulaciones
+   reales con el motor vectorizado run_simulation_batch.
+2. Ajuste de un interpolante RBF cúbico con cola lineal sobre las entradas
+   normalizadas a [0, 1].
+3. Estimación del error con vuelos reales reservados (no usados en el ajuste).
+
+Surrogate.predict(params) evalúa lotes de consultas en milisegundos; las que
+quedan fuera de los límites entrenados se simulan con el motor completo.
+El modelo se guarda en un .npz junto con la huella del modelo físico.
+"""
+import numpy as np
+import pandas as pd
+from utils.parameters import PARAMS, SI_KEYS, convert_to_si, physical_mask
+
+# Espacio de diseño por defecto: {clave de PARAMS: (mín, máx)}
+DEFAULT_BOUNDS = {
+    'p_manometric_psi': (30.0, 100.0),
+    'V_0w_L': (0.2, 1.2),
+    'A_e_cm2': (2.0, 6.0),
+    'M_r_g': (40.0, 120.0),
+    'C_D': (0.4, 1.0),
+    'launch_angle_deg': (20.0, 85.0),
+}
+
+# Métricas predichas
+OUTPUTS = ('Max_Height', 'Max_Range')
+
+def latin_hypercube(n, d, rng):
+    """
+    n puntos en [0, 1]^d con un punto por estrato en cada dimensión:
+    permutaciones independientes de los n estratos, con posición aleatoria
+    dentro de cada estrato.
+    """
+    strata = np.argsort(rng.random((d, n)), axis=1).T
+    return (strata + rng.random((n, d))) / n
+
+def _cubic_kernel(A, B):
+    """Matriz phi(|a - b|) = |a - b|^3 entre las filas de A y B."""
+    sq = (np.sum(A * A, axis=1)[:, None] + np.sum(B * B, axis=1)[None, :]
+          - 2.0 * A @ B.T)
+    return np.sqrt(np.clip(sq, 0.0, None))**3
+
+def _poly(U):
+    """Base polinómica lineal [1, u_1, ..., u_d]."""
+    return np.hstack([np.ones((len(U), 1)), U])
+
+def _simulate(rows, base_params):
+    """Simula filas {clave: valor} con el motor por lotes. Retorna un DataFrame."""
+    from main_simulation import run_simulation_batch
+    table = pd.DataFrame([base_params] * len(rows))
+    for key in rows.columns:
+        if key not in SI_KEYS:
+            table[key] = rows[key].to_numpy()
+    table = convert_to_si(table)
+    for key in rows.columns:
+        if key in SI_KEYS:
+            table[key] = rows[key].to_numpy()
+    return run_simulation_batch(table)
+
+class Surrogate:
+    """
+    Interpolante RBF de OUTPUTS sobre las claves de bounds.
+
+    errors guarda, por salida, el RMSE y el error máximo absoluto medidos en
+    vuelos reales reservados; predict los informa junto a cada predicción.
+    """
+
+    def __init__(self, keys, lower, upper, centers, weights, base_params, errors,
+                 model_version):
+        self.keys = list(keys)
+        self.lower = np.asarray(lower, dtype=float)
+        self.upper = np.asarray(upper, dtype=float)
+        self.centers = np.asarray(centers, dtype=float)
+        self.weights = np.asarray(weights, dtype=float)
+        self.base_params = dict(base_params)
+        self.errors = errors
+        self.model_version = model_version
+
+    @classmethod
+    def fit(cls, bounds=None, n_samples=400, holdout=0.2, seed=0, base_params=None,
+            smoothing=0.0):
+        """
+        Entrena el modelo con n_samples vuelos LHS; la fracción holdout se
+        reserva para estimar el error. smoothing > 0 regulariza el ajuste
+        (útil si el objetivo tiene ruido de discretización).
+        """
+        from utils.cache import physics_fingerprint
+
+        bounds = DEFAULT_BOUNDS if bounds is None else bounds
+        base = PARAMS if base_params is None else base_params
+        keys = list(bounds)
+        lower = np.array([bounds[k][0] for k in keys], dtype=float)
+        upper = np.array([bounds[k][1] for k in keys], dtype=float)
+
+        rng = np.random.default_rng(seed)
+        U = latin_hypercube(n_samples, len(keys), rng)
+        rows = pd.DataFrame(lower + U * (upper - lower), columns=keys)
+        truth = _simulate(rows, base)
+        Y = truth[list(OUTPUTS)].to_numpy()
+
+        # Solo vuelos que aterrizaron dentro del límite de tiempo
+        valid = truth['Landed'].to_numpy()
+        U, Y = U[valid], Y[valid]
+
+        n_test = int(round(holdout * len(U)))
+        test = rng.permutation(len(U))[:n_test]
+        train = np.setdiff1d(np.arange(len(U)), test)
+
+        weights = cls._solve(U[train], Y[train], smoothing)
+        model = cls(keys, lower, upper, U[train], weights, base, {}, physics_fingerprint())
+
+        if n_test:
+            residual = model._evaluate(U[test]) - Y[test]
+            model.errors = {name: {'rmse': float(np.sqrt(np.mean(residual[:, j]**2))),
+                                   'max_abs': float(np.max(np.abs(residual[:, j]))),
+                                   'n_holdout': int(n_test)}
+                            for j, name in enumerate(OUTPUTS)}
+        return model
+
+    @staticmethod
+    def _solve(U, Y, smoothing):
+        """Resuelve el sistema RBF + polinomio: [[Phi, P], [P^T, 0]] [w; c] = [Y; 0]."""
+        n, m = len(U), U.shape[1] + 1
+        P = _poly(U)
+        A = np.zeros((n + m, n + m))
+        A[:n, :n] = _cubic_kernel(U, U) + smoothing * np.eye(n)
+        A[:n, n:] = P
+        A[n:, :n] = P.T
+        rhs = np.vstack([Y, np.zeros((m, Y.shape[1]))])
+        return np.linalg.solve(A, rhs)
+
+    def _evaluate(self, U):
+        """Evalúa el interpolante en puntos normalizados U (filas)."""
+        n = len(self.centers)
+        return _cubic_kernel(U, self.centers) @ self.weights[:n] + _poly(U) @ self.weights[n:]
+
+    def in_bounds(self, X):
+        """Máscara de filas dentro de los límites entrenados."""
+        return np.all((X >= self.lower) & (X <= self.upper), axis=1)
+
+    def predict(self, params, fallback=True):
+        """
+        Predice OUTPUTS para una o varias configuraciones (dict, lista de
+        dicts o DataFrame con las claves del modelo; las que falten se toman
+        de los parámetros base).
+
+        Retorna un DataFrame con las métricas, su error estimado (<métrica>_RMSE,
+        RMSE en los vuelos reservados; 0 si se simuló) y la columna
+        'Simulated': las filas fuera de los límites entrenados se simulan con
+        el motor completo si fallback es True (si no, quedan como NaN). Las
+        filas con parámetros físicamente imposibles quedan siempre como NaN.
+        """
+        rows = pd.DataFrame([params] if isinstance(params, dict) else params)
+        for key in self.keys:
+            if key not in rows.columns:
+                rows[key] = self.base_params[key]
+        X = rows[self.keys].to_numpy(dtype=float)
+
+        table = convert_to_si(pd.DataFrame([self.base_params] * len(rows)).assign(
+            **{key: rows[key].to_numpy() for key in rows.columns if key in self.base_params}))
+        physical = physical_mask(table)
+        bounds = self.in_bounds(X)
+        inside = bounds & physical
+        simulate = ~bounds & physical if fallback else np.zeros(len(rows), dtype=bool)
+
+        out = pd.DataFrame(np.nan, index=rows.index, columns=list(OUTPUTS))
+        if inside.any():
+            U = (X[inside] - self.lower) / (self.upper - self.lower)
+            out.loc[inside, list(OUTPUTS)] = self._evaluate(U)
+        for name in OUTPUTS:
+            out[f"{name}_RMSE"] = np.where(inside, self.errors.get(name, {}).get('rmse', np.nan),
+                                           np.where(simulate, 0.0, np.nan))
+        out['Simulated'] = False
+
+        if simulate.any():
+            truth = _simulate(rows.loc[simulate].reset_index(drop=True), self.base_params)
+            out.loc[simulate, list(OUTPUTS)] = truth[list(OUTPUTS)].to_numpy()
+            out.loc[simulate, 'Simulated'] = True
+        return out
+
+    def save(self, path):
+        """Guarda el modelo en un archivo .npz."""
+        base_keys = list(self.base_params)
+        np.savez(path, keys=np.array(self.keys), lower=self.lower, upper=self.upper,
+                 centers=self.centers, weights=self.weights,
+                 base_keys=np.array(base_keys),
+                 base_values=np.array([float(self.base_params[k]) for k in base_keys]),
+                 error_table=np.array([[self.errors.get(name, {}).get(stat, np.nan)
+                                        for stat in ('rmse', 'max_abs', 'n_holdout')]
+                                       for name in OUTPUTS]),
+                 model_version=np.array(self.model_version))
+
+    @classmethod
+    def load(cls, path):
+        """
+        Carga un modelo guardado con save. Si la física cambió desde el
+        entrenamiento se emite una advertencia (las predicciones pueden no
+        coincidir con el simulador actual).
+        """
+        import warnings
+        from utils.cache import physics_fingerprint
+
+        with np.load(path) as f:
+            errors = {name: {'rmse': float(row[0]), 'max_abs': float(row[1]),
+                             'n_holdout': int(row[2]) if np.isfinite(row[2]) else 0}
+                      for name, row in zip(OUTPUTS, f['error_table'])}
+            model = cls(f['keys'].tolist(), f['lower'], f['upper'], f['centers'],
+                        f['weights'], dict(zip(f['base_keys'].tolist(), f['base_values'])),
+                        errors, str(f['model_version']))
+        if model.model_version != physics_fingerprint():
+            warnings.warn("El modelo sustituto se entrenó con otra versión de la física",
+                          RuntimeWarning, stacklevel=2)
+        return model
+# -----------------------------------------------------------------------------
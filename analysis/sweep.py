@@ -0,0 +1,155 @@
+# 10. analysis/sweep.py (Barridos de Parámetros en Paralelo)
+# -----------------------------------------------------------------------------
+"""
+Barridos de parámetros sobre cualquier clave de PARAMS (producto cartesiano),
+repartidos en un ProcessPoolExecutor por bloques. El resultado es un
+DataFrame ordenado como la rejilla de entrada, con una fila por vuelo y las
+métricas de resumen de FlightSummary.
+"""
+import itertools
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from utils.parameters import PARAMS, SI_KEYS, SIM_KEYS, convert_to_si
+
+# Por debajo de este número de vuelos el arranque del pool no compensa
+MIN_PARALLEL_RUNS = 64
+
+def parameter_grid(grid, base_params=None):
+    """
+    Expande un dict {clave: valores} en la lista de combinaciones del producto
+    cartesiano. Retorna (filas, configuraciones): las filas contienen solo las
+    claves barridas y las configuraciones son diccionarios completos en SI.
+    """
+    base = PARAMS if base_params is None else base_params
+    keys = list(grid)
+    unknown = [key for key in keys if key not in base]
+    if unknown:
+        raise KeyError(f"Claves de parámetros desconocidas: {', '.join(unknown)}")
+
+    rows = []
+    configs = []
+    for values in itertools.product(*(grid[key] for key in keys)):
+        row = dict(zip(keys, values))
+        params = base.copy()
+        params.update({k: v for k, v in row.items() if k not in SI_KEYS})
+        params = convert_to_si(params)
+        # Las claves SI barridas directamente prevalecen sobre la conversión
+        params.update({k: v for k, v in row.items() if k in SI_KEYS})
+        rows.append(row)
+        configs.append(params)
+    return rows, configs
+
+def _run_chunk(configs, integrator, integrator_options, backend='numpy', record='summary'):
+    """
+    Ejecuta un bloque de vuelos en un proceso trabajador. Con record distinto
+    de 'summary' cada fila lleva además su trayectoria ('Trajectory'); el
+    resumen se calcula siempre sobre todas las muestras.
+    """
+    from main_simulation import RUN_CHUNK, iter_simulation, run_simulation
+    from utils.recorder import SummaryRecorder, make_recorder
+
+    if record == 'summary':
+        return [run_simulation(params, integrator=integrator,
+                               integrator_options=integrator_options,
+                               record='summary', verbose=False, backend=backend).as_row()
+                for params in configs]
+    rows = []
+    for params in configs:
+        summary, recorder = SummaryRecorder(), make_recorder(record)
+        for data, phase in iter_simulation(params, RUN_CHUNK, integrator, integrator_options,
+                                           backend):
+            summary.extend(data, phase)
+            recorder.extend(data, phase)
+        rows.append({**summary.summary().as_row(), 'Trajectory': recorder.result()})
+    return rows
+
+def _store_sweep(store, sweep_id, grid, df, configs, integrator, backend):
+    """Guarda las filas del barrido y sus parámetros SI en el almacén."""
+    import pandas as pd
+
+    if sweep_id is None:
+        sweep_id = store.new_sweep('sweep', grid={key: list(map(float, values))
+                                                  for key, values in grid.items()},
+                                   integrator=integrator, backend=backend)
+    si = pd.DataFrame([{key: params[key] for key in SIM_KEYS} for params in configs])
+    rows = pd.concat([df.drop(columns='Trajectory', errors='ignore'),
+                      si.drop(columns=[c for c in si if c in df])], axis=1)
+    store.append(rows, sweep_id,
+                 trajectories=list(df['Trajectory']) if 'Trajectory' in df else None)
+    store.flush()
+    return sweep_id
+
+def run_sweep(grid, base_params=None, workers=None, chunksize=None,
+              integrator='euler', integrator_options=None, verbose=True, backend='numpy',
+              store=None, sweep_id=None, record='summary'):
+    """
+    Ejecuta un barrido de parámetros y retorna un DataFrame ordenado.
+
+    grid es un dict {clave de PARAMS: valores}. workers es el número de
+    procesos (None = todos los núcleos; 1 = en serie en este proceso). Los
+    vuelos se envían en bloques de chunksize para amortizar la comunicación.
+
+    backend se pasa a run_simulation; con 'table' cada proceso construye una
+    sola tabla de empuje por configuración de agua y la comparte entre todos
+    los ángulos, C_D y masas del barrido.
+
+    El rendimiento se guarda en df.attrs ('runs', 'workers', 'elapsed_s',
+    'runs_per_s') y se imprime si verbose es True.
+
+    record es la política de registro de cada vuelo (ver run_simulation):
+    con 'summary' (por defecto) solo se calculan las métricas; con cualquier
+    otra, la columna 'Trajectory' guarda el DataFrame de cada vuelo, p. ej.
+    para rendering.plot_comparison sin volver a simular.
+
+    store es un utils.results_store.ResultsStore opcional: las filas se
+    guardan en él junto con los parámetros SI de cada vuelo, bajo sweep_id
+    (uno nuevo si no se indica), que queda en df.attrs['sweep_id'].
+    """
+    # pandas solo en este proceso: los trabajadores de solo resumen no lo importan
+    import pandas as pd
+
+    rows, configs = parameter_grid(grid, base_params)
+    n_runs = len(configs)
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+        if n_runs < MIN_PARALLEL_RUNS:
+            workers = 1
+    workers = max(1, min(workers, n_runs))
+
+    start = time.perf_counter()
+    if workers == 1:
+        metrics = _run_chunk(configs, integrator, integrator_options, backend, record)
+    else:
+        if chunksize is None:
+            chunksize = max(1, -(-n_runs // (workers * 4)))
+        chunks = [configs[i:i + chunksize] for i in range(0, n_runs, chunksize)]
+        metrics = []
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            # executor.map conserva el orden de entrada de los bloques
+            for chunk_metrics in executor.map(_run_chunk, chunks,
+                                              itertools.repeat(integrator),
+                                              itertools.repeat(integrator_options),
+                                              itertools.repeat(backend),
+                                              itertools.repeat(record)):
+                metrics.extend(chunk_metrics)
+    elapsed = time.perf_counter() - start
+
+    df = pd.DataFrame([{**row, **m} for row, m in zip(rows, metrics)])
+    df.attrs.update({
+        'runs': n_runs,
+        'workers': workers,
+        'elapsed_s': elapsed,
+        'runs_per_s': n_runs / elapsed if elapsed > 0 else float('inf'),
+    })
+
+    if store is not None:
+        df.attrs['sweep_id'] = _store_sweep(store, sweep_id, grid, df, configs, integrator,
+                                            backend)
+
+    if verbose:
+        print(f"Barrido: {n_runs} vuelos en {elapsed:.2f} s con {workers} proceso(s) "
+              f"→ {df.attrs['runs_per_s']:.1f} vuelos/s")
+    return df
+# -----------------------------------------------------------------------------
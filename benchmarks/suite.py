@@ -0,0 +1,382 @@
+# benchmarks/suite.py - Suite de Rendimiento con Seguimiento de Regresiones
+# -----------------------------------------------------------------------------
+"""
+Mide las rutas críticas del simulador y las compara con una línea base:
+
+- run_simulation: latencia de un vuelo (NumPy, núcleo escalar, solo resumen).
+- derivatives / euler_step: costo por paso de la física NumPy.
+- derivatives[kernel], steps[...]: costo por paso del núcleo escalar
+  frente a NumPy (derivadas y generador de pasos de Euler); la mejora de
+  cada par de BACKEND_PAIRS se imprime al final de la tabla.
+- Construcción del DataFrame de trayectoria (TrajectoryRecorder.to_dataframe).
+- plot_results / render_flight: renderizado Agg (con y sin plantilla reutilizada).
+- run_sweep: rendimiento (vuelos/s) para varios tamaños de rejilla.
+- import[...]: tiempo de importación en frío de los puntos de entrada
+  (python -X importtime en un proceso nuevo), con un presupuesto absoluto y
+  la comprobación de que no cargan pandas ni matplotlib.
+
+Cada medición repite la operación varias veces (timeit, con el recolector de
+basura desactivado) tras una llamada de calentamiento, y registra la mediana,
+el mínimo y la dispersión entre repeticiones. El pico de memoria se mide en
+una llamada aparte con tracemalloc (que ralentiza la ejecución).
+
+Uso (desde la raíz del proyecto):
+    python -m benchmarks.suite --output bench.json
+    python -m benchmarks.suite --baseline bench.json --threshold plot_results=0.3
+
+Con --baseline el proceso termina con código 1 si alguna medición empeora
+más que su umbral (relativo a la línea base; por defecto DEFAULT_THRESHOLD
+en tiempo y MEMORY_THRESHOLD en memoria). Exceder un presupuesto de
+importación (IMPORT_BUDGETS) también termina con código 1, haya o no línea
+base.
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import timeit
+import tracemalloc
+import numpy as np
+
+# Empeoramiento relativo tolerado antes de declarar una regresión
+DEFAULT_THRESHOLD = 0.15
+MEMORY_THRESHOLD = 0.25
+
+# Tamaños de rejilla del barrido de ángulos
+SWEEP_SIZES = (8, 32, 128)
+
+# Pasos por medición del generador de Euler (steps[...])
+GENERATOR_STEPS = 2000
+
+# Pares (NumPy, núcleo escalar) cuya mejora se informa
+BACKEND_PAIRS = (
+    ('derivatives', 'derivatives[kernel]'),
+    ('steps[numpy]', 'steps[kernel]'),
+    ('run_simulation[numpy]', 'run_simulation[kernel]'),
+    ('run_simulation[summary]', 'run_simulation[summary-kernel]'),
+)
+
+# Presupuesto de importación en frío por módulo [s] (incluye NumPy)
+IMPORT_BUDGETS = {
+    'main_simulation': 0.25,
+    'visualization': 0.25,
+    'analysis.sweep': 0.25,
+    'analysis.optimize': 0.25,
+    'rocket': 0.25,
+}
+
+# Dependencias pesadas que solo deben cargarse al pedir un DataFrame o un gráfico
+LAZY_MODULES = ('pandas', 'matplotlib')
+
+# Raíz del proyecto (directorio de trabajo de las mediciones de importación)
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def measure(func, number=1, repeat=7, memory=True):
+    """
+    Mide func(): tiempos por llamada (s) de repeat repeticiones de number
+    llamadas cada una, tras una llamada de calentamiento, y el pico de
+    memoria de una llamada (bytes, tracemalloc).
+    """
+    func()
+    times = [t / number for t in timeit.repeat(func, number=number, repeat=repeat)]
+    median = statistics.median(times)
+    result = {
+        'median_s': median,
+        'min_s': min(times),
+        'spread': (max(times) - min(times)) / median if median > 0 else 0.0,
+        'number': number,
+        'repeat': repeat,
+    }
+    if memory:
+        tracemalloc.start()
+        try:
+            func()
+            result['peak_bytes'] = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return result
+
+def measure_import(module, repeat=5):
+    """
+    Importa module en repeat procesos nuevos con python -X importtime y
+    retorna los tiempos acumulados del módulo (s) y las dependencias de
+    LAZY_MODULES que quedaron cargadas en alguna de las repeticiones.
+    """
+    code = (f"import sys, {module}; "
+            f"print(','.join(m for m in {LAZY_MODULES!r} if m in sys.modules))")
+    times = []
+    loaded = set()
+    for _ in range(repeat):
+        proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', code], cwd=ROOT,
+                              capture_output=True, text=True, check=True)
+        for line in proc.stderr.splitlines():
+            # 'import time: self [us] | cumulative | imported package'
+            fields = line.split('|')
+            if len(fields) == 3 and fields[2].strip() == module:
+                times.append(int(fields[1]) / 1e6)
+        loaded.update(name for name in proc.stdout.strip().split(',') if name)
+    if not times:
+        raise ValueError(f"python -X importtime no informó el módulo {module!r}; "
+                         "use su nombre completo (p. ej. 'analysis.sweep')")
+    median = statistics.median(times)
+    return {
+        'median_s': median,
+        'min_s': min(times),
+        'spread': (max(times) - min(times)) / median if median > 0 else 0.0,
+        'number': 1,
+        'repeat': repeat,
+        'loaded': [name for name in LAZY_MODULES if name in loaded],
+    }
+
+def check_budgets(results, budgets=IMPORT_BUDGETS):
+    """
+    Mediciones import[...] que exceden su presupuesto (comparado con el
+    mínimo, el menos sensible al ruido) o cargan LAZY_MODULES. Retorna una
+    lista de mensajes.
+    """
+    problems = []
+    for module, budget in budgets.items():
+        result = results['benchmarks'].get(f'import[{module}]')
+        if result is None:
+            continue
+        if result['min_s'] > budget:
+            problems.append(f"import[{module}]: {result['min_s'] * 1e3:.0f} ms "
+                            f"> {budget * 1e3:.0f} ms")
+        if result['loaded']:
+            problems.append(f"import[{module}] carga {', '.join(result['loaded'])}")
+    return problems
+
+@contextlib.contextmanager
+def _quiet_in_tmpdir():
+    """Ejecuta sin salida por consola dentro de un directorio temporal."""
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp, contextlib.redirect_stdout(io.StringIO()):
+        os.chdir(tmp)
+        try:
+            yield
+        finally:
+            os.chdir(cwd)
+
+def run_suite(quick=False, sweep_sizes=SWEEP_SIZES, only=None):
+    """
+    Ejecuta la suite y retorna {'meta': {...}, 'benchmarks': {nombre: medición}}.
+    quick reduce las repeticiones; only es un prefijo de nombre opcional.
+    """
+    from utils.parameters import PARAMS, RHO_W, compile_params
+    from utils.euler import euler_step
+    from utils.recorder import TrajectoryRecorder
+    from utils.cache import physics_fingerprint
+    from physics.derivatives import derivatives
+    from physics.kernel import derivatives_kernel, kernel_euler_steps
+    from utils.integrators import euler_steps
+    from main_simulation import run_simulation
+    from visualization import plot_results
+    from rendering import FlightRenderer
+    from analysis.sweep import run_sweep
+
+    repeat = 3 if quick else 7
+    sim = compile_params(PARAMS)
+    # Estado representativo en plena fase de agua, ya en movimiento
+    Y = np.array([0.3, 0.3, 10.0, 10.0, 0.5 * PARAMS['V_0w'] * RHO_W])
+    vx, vy, M_w = (float(v) for v in Y[2:])
+    Y_0 = np.array([0.0, 0.0, 0.0, 0.0, PARAMS['V_0w'] * RHO_W])
+    df = run_simulation(PARAMS, verbose=False)
+    recorder = TrajectoryRecorder()
+    recorder.extend(df.drop(columns='Phase').to_numpy().T, df['Phase'].cat.codes.to_numpy())
+
+    def advance(steps_factory):
+        """Avanza GENERATOR_STEPS pasos de un generador nuevo."""
+        steps = steps_factory(Y_0, sim)
+        for _ in range(GENERATOR_STEPS):
+            next(steps)
+
+    def render():
+        with _quiet_in_tmpdir():
+            plot_results(df)
+
+    renderer = FlightRenderer()
+    outputs = tempfile.TemporaryDirectory()
+    paths = (os.path.join(outputs.name, 'trajectory.png'), os.path.join(outputs.name, 'series.png'))
+
+    cases = [
+        ('run_simulation[numpy]', lambda: run_simulation(PARAMS, verbose=False), 1, {}),
+        ('run_simulation[kernel]',
+         lambda: run_simulation(PARAMS, verbose=False, backend='kernel'), 1, {}),
+        ('run_simulation[summary]',
+         lambda: run_simulation(PARAMS, record='summary', verbose=False), 1, {}),
+        ('run_simulation[summary-kernel]',
+         lambda: run_simulation(PARAMS, record='summary', verbose=False, backend='kernel'),
+         1, {}),
+        ('derivatives', lambda: derivatives(Y, sim), 2000, {'per': 'step'}),
+        ('derivatives[kernel]', lambda: derivatives_kernel(vx, vy, M_w, sim), 2000,
+         {'per': 'step'}),
+        ('steps[numpy]', lambda: advance(euler_steps), 1, {'steps': GENERATOR_STEPS}),
+        ('steps[kernel]', lambda: advance(kernel_euler_steps), 1, {'steps': GENERATOR_STEPS}),
+        ('euler_step', lambda: euler_step(Y, sim), 2000, {'per': 'step'}),
+        ('to_dataframe', recorder.to_dataframe, 200, {'rows': len(recorder)}),
+        ('plot_results', render, 1, {}),
+        ('render_flight', lambda: renderer.render(df, *paths), 1, {}),
+    ]
+    for n in sweep_sizes:
+        grid = {'launch_angle_deg': np.linspace(20.0, 85.0, n)}
+        cases.append((f'run_sweep[n={n}]',
+                      lambda grid=grid: run_sweep(grid, verbose=False, backend='kernel'),
+                      1, {'runs': n}))
+
+    benchmarks = {}
+    for module, budget in IMPORT_BUDGETS.items():
+        name = f'import[{module}]'
+        if only is None or name.startswith(only):
+            benchmarks[name] = {**measure_import(module, repeat), 'budget_s': budget}
+    for name, func, number, extra in cases:
+        if only is not None and not name.startswith(only):
+            continue
+        result = measure(func, number=number, repeat=repeat)
+        result.update(extra)
+        if 'runs' in extra:
+            result['runs_per_s'] = extra['runs'] / result['median_s']
+        if 'steps' in extra:
+            result['per_step_s'] = result['median_s'] / extra['steps']
+        benchmarks[name] = result
+    outputs.cleanup()
+
+    meta = {
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'physics_fingerprint': physics_fingerprint(),
+        'quick': quick,
+    }
+    return {'meta': meta, 'benchmarks': benchmarks}
+
+def compare(current, baseline, thresholds=None, default_threshold=DEFAULT_THRESHOLD,
+            memory_threshold=MEMORY_THRESHOLD):
+    """
+    Compara dos resultados de run_suite. thresholds es {nombre: umbral}
+    relativo en tiempo (p. ej. 0.2 = 20 % más lento). Retorna una lista de
+    dicts con 'name', 'status' ('ok', 'regression', 'improvement', 'new' o
+    'missing'), 'time_ratio' y 'memory_ratio' (actual / línea base).
+    """
+    thresholds = thresholds or {}
+    rows = []
+    old, new = baseline['benchmarks'], current['benchmarks']
+    for name in list(new) + [name for name in old if name not in new]:
+        if name not in old or name not in new:
+            rows.append({'name': name, 'status': 'new' if name in new else 'missing',
+                         'time_ratio': None, 'memory_ratio': None})
+            continue
+        limit = thresholds.get(name, default_threshold)
+        time_ratio = new[name]['median_s'] / old[name]['median_s']
+        memory_ratio = None
+        if old[name].get('peak_bytes') and 'peak_bytes' in new[name]:
+            memory_ratio = new[name]['peak_bytes'] / old[name]['peak_bytes']
+
+        if time_ratio > 1.0 + limit or (memory_ratio is not None
+                                        and memory_ratio > 1.0 + memory_threshold):
+            status = 'regression'
+        elif time_ratio < 1.0 - limit:
+            status = 'improvement'
+        else:
+            status = 'ok'
+        rows.append({'name': name, 'status': status, 'time_ratio': time_ratio,
+                     'memory_ratio': memory_ratio, 'threshold': limit})
+    return rows
+
+def backend_speedups(results, pairs=BACKEND_PAIRS):
+    """{medición del núcleo: mediana NumPy / mediana núcleo} de los pares medidos."""
+    benchmarks = results['benchmarks']
+    return {kernel: benchmarks[numpy]['median_s'] / benchmarks[kernel]['median_s']
+            for numpy, kernel in pairs if numpy in benchmarks and kernel in benchmarks}
+
+def print_results(results, comparison=None):
+    """Imprime la tabla de mediciones y, si se da, el veredicto por medición."""
+    verdicts = {row['name']: row for row in comparison or []}
+    print("="*86)
+    print(" "*28 + "SUITE DE RENDIMIENTO")
+    print("="*86)
+    print(f"{'Medición':<26} | {'Mediana (µs)':>13} | {'Disp.':>6} | {'Pico (KiB)':>10} | "
+          f"{'vs. base':>8} | Veredicto")
+    print("-"*86)
+    labels = {'ok': 'ok', 'regression': 'REGRESIÓN', 'improvement': 'mejora',
+              'new': 'nuevo', 'missing': 'falta'}
+    for name, result in results['benchmarks'].items():
+        row = verdicts.get(name)
+        ratio = f"{row['time_ratio']:.2f}x" if row and row['time_ratio'] else '-'
+        print(f"{name:<26} | {result['median_s'] * 1e6:>13.1f} | {result['spread']:>6.1%} | "
+              f"{result.get('peak_bytes', 0) / 1024:>10.1f} | {ratio:>8} | "
+              f"{labels[row['status']] if row else '-'}")
+    for row in comparison or []:
+        if row['status'] == 'missing':
+            print(f"{row['name']:<26} | {'-':>13} | {'-':>6} | {'-':>10} | {'-':>8} | falta")
+    print("="*86)
+    speedups = backend_speedups(results)
+    if speedups:
+        print("Mejora del núcleo escalar frente a NumPy: " +
+              ", ".join(f"{name} {ratio:.1f}x" for name, ratio in speedups.items()))
+
+def _parse_thresholds(items):
+    """['nombre=0.2', ...] -> {'nombre': 0.2}"""
+    thresholds = {}
+    for item in items:
+        name, _, value = item.partition('=')
+        if not value:
+            raise argparse.ArgumentTypeError(f"Umbral inválido (use nombre=valor): {item!r}")
+        thresholds[name] = float(value)
+    return thresholds
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Suite de rendimiento del simulador")
+    parser.add_argument('--output', help="Archivo JSON donde guardar los resultados")
+    parser.add_argument('--baseline', help="JSON de una ejecución anterior para comparar")
+    parser.add_argument('--threshold', action='append', default=[],
+                        help="Umbral por medición: nombre=fracción (repetible)")
+    parser.add_argument('--default-threshold', type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument('--memory-threshold', type=float, default=MEMORY_THRESHOLD)
+    parser.add_argument('--sweep-sizes', default=','.join(map(str, SWEEP_SIZES)),
+                        help="Tamaños de rejilla del barrido, separados por comas")
+    parser.add_argument('--only', help="Ejecutar solo las mediciones con este prefijo")
+    parser.add_argument('--quick', action='store_true', help="Menos repeticiones")
+    args = parser.parse_args(argv)
+
+    sizes = tuple(int(n) for n in args.sweep_sizes.split(',') if n)
+    results = run_suite(quick=args.quick, sweep_sizes=sizes, only=args.only)
+
+    comparison = None
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+        if args.only:
+            baseline['benchmarks'] = {name: result for name, result in baseline['benchmarks'].items()
+                                      if name.startswith(args.only)}
+        comparison = compare(results, baseline, _parse_thresholds(args.threshold),
+                             args.default_threshold, args.memory_threshold)
+        results['comparison'] = comparison
+
+    print_results(results, comparison)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"Resultados guardados en {args.output}")
+
+    status = 0
+    regressions = [row['name'] for row in comparison or [] if row['status'] == 'regression']
+    if regressions:
+        print(f"⚠ Regresiones: {', '.join(regressions)}")
+        status = 1
+    for problem in check_budgets(results):
+        print(f"⚠ Presupuesto de importación: {problem}")
+        status = 1
+    return status
+
+if __name__ == "__main__":
+    sys.exit(main())
+# -----------------------------------------------------------------------------
@@ -5,11 +5,14 @@ Script interactivo para explorar diferentes configuraciones del cohete de agua.
 Permite al usuario modificar parámetros y ver los resultados inmediatamente.
 """
 
-import numpy as np
-import pandas as pd
-from utils.parameters import PARAMS, convert_to_si
+from utils.parameters import PARAMS, RocketParams
 from main_simulation import run_simulation
 from visualization import plot_results
+from analysis.optimize import optimize
+from utils.cache import ResultCache
+
+# Caché de la sesión: repetir una configuración no vuelve a simularla
+CACHE = ResultCache()
 
 def print_header():
     """Imprime el encabezado del programa."""
@@ -52,11 +55,10 @@ def run_single_simulation(params):
     print("\n🚀 Ejecutando simulación...")
     print("-" * 70)
     
-    params_si = convert_to_si(params.copy())
-    df = run_simulation(params_si)
+    df = run_simulation(RocketParams.from_dict(params), cache=CACHE)
     
-    max_height = df['Position'].max()
-    max_velocity = df['Velocity'].max()
+    max_height = df['Y_Position'].max()
+    max_velocity = df['Total_Velocity'].max()
     flight_time = df['Time'].iloc[-1]
     
     # Calcular tiempo de vaciado
@@ -70,7 +72,7 @@ def run_single_simulation(params):
     print(f"✓ Tiempo de vaciado:    {t_empty:.3f} s")
     print(f"✓ Tiempo de vuelo:      {flight_time:.2f} s")
     print("-" * 70)
-    print("\n📈 Gráficos generados: 'results_series.png' y 'trajectory.png'")
+    print("\n📈 Gráficos generados: 'results_series_2d.png' y 'trajectory_2d.png'")
     
     plot_results(df)
     
@@ -133,36 +135,23 @@ def modify_nozzle_area(params):
 
 def optimize_water_volume(params):
     """Encuentra el volumen óptimo de agua."""
+    import pandas as pd
+
     print("\n🔬 ANÁLISIS DE OPTIMIZACIÓN - VOLUMEN DE AGUA")
     print("-" * 70)
-    print("Probando diferentes volúmenes de agua...")
+    print("Buscando el volumen de agua óptimo (método de Brent)...")
     
-    volumes = np.linspace(0.2, params['V_r_L'] * 0.95, 15)
-    results = []
+    result = optimize({'V_0w_L': (0.2, params['V_r_L'] * 0.95)}, metric='Max_Height',
+                      base_params=params, xtol=0.01, verbose=False)
     
-    for i, vol in enumerate(volumes):
-        test_params = params.copy()
-        test_params['V_0w_L'] = vol
-        test_params_si = convert_to_si(test_params)
-        
-        df = run_simulation(test_params_si)
-        max_height = df['Position'].max()
-        
-        results.append({
-            'Volumen (L)': vol,
-            'Altura (m)': max_height,
-            '% Llenado': vol/params['V_r_L']*100
-        })
-        
-        # Barra de progreso simple
-        progress = (i + 1) / len(volumes) * 100
-        print(f"Progreso: {progress:.0f}% - V={vol:.2f}L → h={max_height:.2f}m")
-    
-    df_results = pd.DataFrame(results)
-    
-    # Encontrar el óptimo
-    optimal_idx = df_results['Altura (m)'].idxmax()
-    optimal = df_results.iloc[optimal_idx]
+    # Puntos evaluados por el optimizador, ordenados por volumen
+    evaluated = pd.DataFrame(result.history).sort_values('V_0w_L')
+    df_results = pd.DataFrame({
+        'Volumen (L)': evaluated['V_0w_L'],
+        'Altura (m)': evaluated['Max_Height'],
+        '% Llenado': evaluated['V_0w_L'] / params['V_r_L'] * 100,
+    })
+    optimal_volume = result.params['V_0w_L']
     
     print("\n" + "="*70)
     print("📊 RESULTADOS DEL ANÁLISIS:")
@@ -171,33 +160,35 @@ def optimize_water_volume(params):
     print("\n" + "="*70)
     print("🏆 CONFIGURACIÓN ÓPTIMA ENCONTRADA:")
     print("="*70)
-    print(f"Volumen de agua óptimo: {optimal['Volumen (L)']:.2f} L ({optimal['% Llenado']:.1f}% de llenado)")
-    print(f"Altura máxima alcanzada: {optimal['Altura (m)']:.2f} m")
+    print(f"Volumen de agua óptimo: {optimal_volume:.3f} L ({optimal_volume/params['V_r_L']*100:.1f}% de llenado)")
+    print(f"Altura máxima alcanzada: {result.value:.2f} m")
+    print(f"Simulaciones necesarias: {result.evaluations}")
     print("="*70)
     
     apply = input("\n¿Aplicar esta configuración? (s/n): ")
     if apply.lower() == 's':
-        params['V_0w_L'] = optimal['Volumen (L)']
-        print(f"✓ Configuración actualizada a {optimal['Volumen (L)']:.2f} L")
+        params['V_0w_L'] = optimal_volume
+        print(f"✓ Configuración actualizada a {optimal_volume:.3f} L")
     
     input("\nPresiona Enter para continuar...")
 
 def compare_pressures(params):
     """Compara diferentes presiones iniciales."""
+    import pandas as pd
+
     print("\n🔬 COMPARACIÓN DE PRESIONES")
     print("-" * 70)
     
     pressures = [40, 60, 80, 100]
     results = []
+    base = RocketParams.from_dict(params)
     
     for pressure in pressures:
-        test_params = params.copy()
-        test_params['p_manometric_psi'] = pressure
-        test_params_si = convert_to_si(test_params)
+        test_params = base.replace(p_manometric_psi=pressure)
         
-        df = run_simulation(test_params_si)
-        max_height = df['Position'].max()
-        max_velocity = df['Velocity'].max()
+        summary = run_simulation(test_params, record='summary', cache=CACHE)
+        max_height = summary.max_height
+        max_velocity = summary.max_velocity
         
         results.append({
             'Presión (psi)': pressure,
@@ -218,18 +209,8 @@ def compare_pressures(params):
     input("\nPresiona Enter para continuar...")
 
 def reset_params():
-    """Restaura los parámetros predeterminados."""
-    default_params = {
-        'p_manometric_psi': 70.0,
-        'V_r_L': 2.0,
-        'V_0w_L': 0.5,
-        'A_e_cm2': 4.5,
-        'A_r_cm2': 95.0,
-        'M_r_g': 55.0,
-        'H_tube_m': 1.0,
-        'C_D': 0.75,
-        'A_ref_cm2': 100.0,
-    }
+    """Restaura los parámetros predeterminados (diccionario completo, con claves SI)."""
+    default_params = RocketParams().to_dict()
     print("\n✓ Parámetros restaurados a valores predeterminados")
     input("\nPresiona Enter para continuar...")
     return default_params
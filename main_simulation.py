@@ -1,57 +1,57 @@
 # 6. main_simulation.py (Orquestador y Bucle Principal)
 # -----------------------------------------------------------------------------
+from math import sqrt
+import inspect
+import time
+import warnings
 import numpy as np
-import pandas as pd
-from utils.parameters import PARAMS, RHO_W, G, DT, P_ATM
-from utils.euler import euler_step
+from utils.parameters import PARAMS, RHO_W, G, DT, P_ATM, compile_params, as_sim_params
+from utils.integrators import get_integrator
+from utils.recorder import make_recorder, SummaryRecorder, ChunkBuffer, PHASES, PHASE_CODES
+from utils.cache import cache_key
+from utils.instrumentation import StepProbe
 import physics.water_phase as water_phase
-from visualization import plot_results
 
 # Función exportada desde water_phase
 calculate_pressure = water_phase.calculate_pressure
 
-def run_simulation(params):
-    """Ejecuta la simulación completa del cohete en 2D (Fases 1, 2 y 3)."""
-    
-    # Establecer los parámetros actuales para la simulación
-    from physics.derivatives import set_simulation_params
-    set_simulation_params(params)
-    
-    # 1. ESTADO INICIAL (SI) - Ahora en 2D
-    M_0w = params['V_0w'] * RHO_W
-    angle = params['launch_angle_rad']
-    
-    # Y = [x, y, vx, vy, M_w]
-    # Posición inicial en origen, velocidades iniciales en cero
-    Y_n = np.array([0.0, 0.0, 0.0, 0.0, M_0w]) 
-    
-    t = 0.0
-    
-    # Data logging setup
-    results = []
+# Límite de tiempo de seguridad de la integración [s]
+T_MAX = 100.0
+
+# Muestras por bloque: iter_simulation por defecto y run_simulation
+STREAM_CHUNK = 256
+RUN_CHUNK = 1024
+
+def _flight_chunks(steps, sim, buffer):
+    """
+    Recorre los pasos del integrador, determina la fase y genera el vuelo en
+    bloques (data, phase) a medida que buffer (un ChunkBuffer) se llena.
+    """
     
     # Condición de vuelo
-    flight_active = True
     max_height_reached = False
     
-    while flight_active and t < 100.0: # Límite de tiempo de seguridad
+    for t, Y_n in steps:
         
         x_n, y_n, vx_n, vy_n, M_w_n = Y_n
         
         # Velocidad total
-        v_total = np.sqrt(vx_n**2 + vy_n**2)
+        v_total = sqrt(vx_n**2 + vy_n**2)
+        
+        # Presión instantánea (fase y logging)
+        P_n = calculate_pressure(M_w_n, sim)
         
         # 2. DETERMINACIÓN DE LA FASE
         # Distancia recorrida desde el origen
-        dist_from_origin = np.sqrt(x_n**2 + y_n**2)
+        dist_from_origin = sqrt(x_n**2 + y_n**2)
         
-        if dist_from_origin < params['H_tube_m']:
+        if dist_from_origin < sim.H_tube_m:
             phase = 'Launch Tube' # Fase 1
             
         elif M_w_n > 1e-4:
             phase = 'Water' # Fase 2
             
-        elif calculate_pressure(M_w_n, params) > P_ATM and M_w_n <= 1e-4:
+        elif P_n > P_ATM and M_w_n <= 1e-4:
             phase = 'Air' # Fase 3A
             
         else:
@@ -61,64 +61,427 @@ def run_simulation(params):
         if vy_n < 0 and y_n > 0:
             max_height_reached = True
             
-        # 3. CÁLCULO DE VARIABLES AUXILIARES PARA LOGGING
-        P_n = calculate_pressure(M_w_n, params)
-        
-        results.append({
-            'Time': t,
-            'X_Position': x_n,
-            'Y_Position': y_n, 
-            'X_Velocity': vx_n,
-            'Y_Velocity': vy_n,
-            'Total_Velocity': v_total,
-            'Water Mass': M_w_n,
-            'Pressure': P_n,
-            'Phase': phase
-        })
+        # 3. LOGGING
+        if buffer.append(t, x_n, y_n, vx_n, vy_n, v_total, M_w_n, P_n,
+                         PHASE_CODES[phase]):
+            yield buffer.take()
         
         # 4. CONDICIÓN DE FIN DE VUELO
         # Si toca el suelo (y <= 0) después de haber alcanzado altura máxima
         if y_n <= 0 and max_height_reached and t > 0.1:
-            flight_active = False
             # Guardar posición final en el suelo
-            results.append({
-                'Time': t,
-                'X_Position': x_n,
-                'Y_Position': 0.0,
-                'X_Velocity': 0.0,
-                'Y_Velocity': 0.0,
-                'Total_Velocity': 0.0,
-                'Water Mass': 0.0,
-                'Pressure': P_ATM,
-                'Phase': 'Landed'
-            })
+            buffer.append(t, x_n, 0.0, 0.0, 0.0, 0.0, 0.0, P_ATM,
+                          PHASE_CODES['Landed'])
             break
-            
-        # 5. PASO DE INTEGRACIÓN (Euler)
-        Y_n = euler_step(Y_n, params)
-        
-        # Ajuste de condiciones de frontera
-        if Y_n[4] < 0:  # M_w_n
-            Y_n[4] = 0.0
-        
-        t += DT
+    
+    if len(buffer):
+        yield buffer.take()
+
+def _resolve_backend(backend):
+    """'numba' sin Numba instalado se degrada a 'kernel' con una advertencia."""
+    if backend == 'numba':
+        from physics.numba_backend import HAVE_NUMBA
+        if not HAVE_NUMBA:
+            warnings.warn("Numba no está instalado; se usa el backend 'kernel'",
+                          RuntimeWarning, stacklevel=3)
+            return 'kernel'
+    return backend
 
-    df_results = pd.DataFrame(results)
+def _run_numba(sim, integrator, integrator_options, store, stats):
+    """Vuelo completo con el bucle compilado. Retorna (data, phase, summary)."""
+    from physics.numba_backend import run_flight_numba
+    if integrator != 'euler':
+        raise ValueError("El backend 'numba' solo admite el integrador 'euler'")
+    if stats is None:
+        return run_flight_numba(sim, t_max=T_MAX, store=store, **integrator_options)
+    start = time.perf_counter()
+    with stats.profiling():
+        data, phase, summary = run_flight_numba(sim, t_max=T_MAX, store=store,
+                                                **integrator_options)
+    _absorb_numba_stats(stats, phase, summary, time.perf_counter() - start)
+    return data, phase, summary
+
+def _absorb_numba_stats(stats, phase, summary, elapsed):
+    """
+    Estadísticas del backend 'numba': el bucle compilado no puede medirse
+    por dentro, así que todo su tiempo cuenta como física y los pasos por
+    fase salen de los códigos de fase (si se guardó la trayectoria).
+    """
+    n_steps = int(round(summary.flight_time / DT))
+    stats.physics_time = elapsed
+    stats.derivative_evals = n_steps
+    stats.t_end = summary.flight_time
+    stats.capped = summary.flight_time >= T_MAX - DT
+    if len(phase):
+        for name, count in zip(PHASES, np.bincount(phase, minlength=len(PHASES))):
+            stats.steps[name] = int(count)
+
+def _numba_samples(summary):
+    """
+    Muestras de un vuelo del backend 'numba' sin trayectoria guardada: una
+    por paso hasta flight_time, más la fila final 'Landed' si aterrizó.
+    """
+    landed = summary.flight_time < T_MAX - DT
+    return int(round(summary.flight_time / DT)) + 1 + landed
+
+def _open_output(output, sim, integrator, backend):
+    """TrajectoryWriter para output (ruta o writer) con los datos del vuelo."""
+    if output is None:
+        return None
+    from utils.trajectory_file import TrajectoryWriter
+    writer = output if isinstance(output, TrajectoryWriter) else TrajectoryWriter(output)
+    writer.set_params(sim)
+    writer.metadata.update(integrator=integrator, backend=backend)
+    return writer
+
+def _print_summary(params, summary):
+    """Imprime el resumen del vuelo."""
+    print(f"Ángulo de lanzamiento: {params['launch_angle_deg']:.1f}°")
+    print(f"Altura máxima alcanzada: {summary.max_height:.2f} m")
+    print(f"Alcance horizontal máximo: {summary.max_range:.2f} m")
+    print(f"Velocidad máxima: {summary.max_velocity:.2f} m/s")
+
+def run_simulation(params, integrator='euler', integrator_options=None, record='full',
+                   verbose=True, backend='numpy', cache=None, stats=None, output=None):
+    """
+    Ejecuta la simulación completa del cohete en 2D (Fases 1, 2 y 3).
+
+    params es un diccionario tipo PARAMS ya convertido a SI o un
+    utils.parameters.RocketParams (validado y precompilado).
+
+    integrator selecciona el esquema numérico ('euler' con paso fijo DT o
+    'dopri5' adaptativo con detección de eventos); integrator_options se
+    pasa al generador de pasos (p. ej. {'rtol': 1e-8} para 'dopri5').
+    backend elige la implementación de la física: 'numpy' (physics/derivatives),
+    'kernel' (núcleo escalar precompilado), 'table' (núcleo escalar con la fase
+    de agua tabulada, physics/thrust_table.py) o 'numba' (bucle completo
+    compilado; si Numba no está instalado se usa 'kernel'). 'kernel', 'table'
+    y 'numba' solo admiten el integrador 'euler'.
+
+    record es la política de registro (ver utils.recorder.make_recorder):
+    'full', ('every', N), ('interval', dt), 'transitions' o 'summary'.
+    Retorna un DataFrame con la trayectoria, o un FlightSummary si
+    record='summary'. Con verbose=False no se imprime el resumen.
+
+    cache es un utils.cache.ResultCache opcional: si el vuelo (parámetros SI,
+    integrador, registro, backend y versión de la física) ya está guardado,
+    se retorna sin volver a simular. Los eventos del integrador se guardan
+    con el resultado y se reproducen en el event_log del llamador.
+
+    stats es un utils.instrumentation.FlightStats opcional que se rellena con
+    pasos y tiempo por fase, evaluaciones de derivadas, tiempo de física y de
+    registro, si se alcanzó el límite de 100 s y, si se pidió, el perfil de
+    cProfile/pyinstrument. Sin stats el bucle no se instrumenta.
+
+    output es una ruta o un utils.trajectory_file.TrajectoryWriter: el vuelo
+    completo se escribe en él bloque a bloque, sea cual sea record (con
+    record='summary' la trayectoria queda solo en disco), y el archivo se
+    cierra al terminar. Con output no se consulta la caché.
+    """
+    
+    # Parámetros precompilados e inmutables de este vuelo (sin estado global)
+    sim = compile_params(params)
+    integrator_options = dict(integrator_options or {})
+    event_log = integrator_options.get('event_log')
+    captured = []
+    if stats is not None:
+        stats.backend, stats.integrator = backend, integrator
+        start = time.perf_counter()
+    
+    if cache is not None:
+        key = cache_key(sim, integrator, integrator_options, record, backend)
+        found = cache.lookup(key) if output is None else None
+        if found is not None:
+            result, summary, events = found
+            if event_log is not None:
+                event_log.extend(events)
+            if verbose:
+                _print_summary(params, summary)
+            if stats is not None:
+                stats.cache_hit = True
+                stats.total_time = time.perf_counter() - start
+            return result
+    
+    # Data logging setup: buffers columnares o acumulador de resumen
+    recorder = make_recorder(record)
+    backend = _resolve_backend(backend)
+    writer = _open_output(output, sim, integrator, backend)
+    
+    if backend == 'numba' and isinstance(recorder, SummaryRecorder) and writer is None:
+        # Bucle compilado en modo resumen: no se guarda la trayectoria
+        _, _, summary = _run_numba(sim, integrator, integrator_options, False, stats)
+        recorder.absorb(summary, n_samples=_numba_samples(summary))
+    else:
+        if (cache is not None and backend != 'numba' and 'event_log' in
+                inspect.signature(get_integrator(integrator, backend)).parameters):
+            # Con caché los eventos se capturan siempre, para poder reproducirlos
+            integrator_options['event_log'] = captured
+        # El vuelo llega por bloques desde iter_simulation
+        chunks = iter_simulation(sim, RUN_CHUNK, integrator, integrator_options, backend, stats)
+        if writer is None:
+            for data, phase in chunks:
+                recorder.extend(data, phase)
+        else:
+            with writer:
+                for data, phase in chunks:
+                    recorder.extend(data, phase)
+                    writer.extend(data, phase)
+
+    if cache is not None:
+        if event_log is not None:
+            event_log.extend(captured)
+        cache.put(key, recorder, events=captured)
+    
+    if stats is not None:
+        stats.total_time = time.perf_counter() - start
     
     # Log información del vuelo
-    max_height = df_results['Y_Position'].max()
-    max_range = df_results['X_Position'].max()
-    max_velocity = df_results['Total_Velocity'].max()
+    if verbose:
+        _print_summary(params, recorder.summary())
     
-    print(f"Ángulo de lanzamiento: {params['launch_angle_deg']:.1f}°")
-    print(f"Altura máxima alcanzada: {max_height:.2f} m")
-    print(f"Alcance horizontal máximo: {max_range:.2f} m")
-    print(f"Velocidad máxima: {max_velocity:.2f} m/s")
+    return recorder.result()
+
+def iter_simulation(params, every=STREAM_CHUNK, integrator='euler', integrator_options=None,
+                    backend='numpy', stats=None):
+    """
+    Genera el vuelo por bloques a medida que el integrador lo calcula.
+
+    Cada bloque es (data, phase): data con forma (8, n) en el orden de las
+    columnas del DataFrame de run_simulation (utils.recorder.COLUMNS) y phase
+    con los n códigos de fase (índices de PHASES). El primer bloque contiene
+    solo el estado inicial y los siguientes every muestras; el último termina
+    con la fila 'Landed'.
+
+    Los bloques son arrays nuevos que el consumidor puede conservar; si no
+    los guarda, la memoria queda acotada a un bloque. Cortar la iteración
+    (break, close) detiene la integración, p. ej. al llegar al apogeo.
+
+    integrator, integrator_options, backend y stats tienen el mismo
+    significado que en run_simulation. Con backend 'numba' el vuelo se
+    calcula completo en el bucle compilado y luego se entrega por bloques.
+    """
+    if every < 1:
+        raise ValueError(f"every debe ser >= 1: {every!r}")
+    sim = as_sim_params(params)
+    integrator_options = dict(integrator_options or {})
+    backend = _resolve_backend(backend)
+    if stats is not None:
+        stats.backend, stats.integrator = backend, integrator
+
+    if backend == 'numba':
+        data, phase, _ = _run_numba(sim, integrator, integrator_options, True, stats)
+        for i in (0, *range(1, data.shape[1], every)):
+            j = 1 if i == 0 else i + every
+            # Copias: un bloque conservado no retiene el vuelo completo
+            yield data[:, i:j].copy(), phase[i:j].copy()
+        return
+
+    # 1. ESTADO INICIAL (SI) - Ahora en 2D
+    M_0w = sim.V_0w * RHO_W
     
-    return df_results
+    # Y = [x, y, vx, vy, M_w]
+    # Posición inicial en origen, velocidades iniciales en cero
+    Y_n = np.array([0.0, 0.0, 0.0, 0.0, M_0w])
+    
+    # PASO DE INTEGRACIÓN: lo realiza el generador del integrador elegido
+    # (límite de tiempo de seguridad: T_MAX)
+    step_fn = get_integrator(integrator, backend)
+    buffer = ChunkBuffer(every)
+    if stats is None:
+        yield from _flight_chunks(step_fn(Y_n, sim, t_max=T_MAX, **integrator_options),
+                                  sim, buffer)
+        return
+
+    # Los integradores adaptativos cuentan sus propias evaluaciones
+    counts_itself = 'stats' in inspect.signature(step_fn).parameters
+    if counts_itself:
+        integrator_options['stats'] = stats
+    steps = step_fn(Y_n, sim, t_max=T_MAX, **integrator_options)
+    probe = StepProbe(steps, buffer, stats, count_derivatives=not counts_itself)
+    with stats.profiling():
+        yield from _flight_chunks(probe, sim, probe)
+
+def run_simulation_batch(params_table, physics='exact'):
+    """
+    Simula N cohetes en paralelo (lockstep) con operaciones vectorizadas.
+
+    Mantiene un estado (N, 5) [x, y, vx, vy, M_w] que avanza con el mismo
+    esquema de Euler que run_simulation. Los cohetes que aterrizan se
+    congelan y se retiran del lote activo mientras el resto sigue volando.
+
+    physics es 'exact' (funciones de water_phase) o 'table' (tablas de
+    empuje de physics/thrust_table.py, una por configuración de agua
+    distinta); en modo 'table' el error máximo de interpolación se guarda en
+    df.attrs['thrust_table_max_error'].
+
+    Retorna un DataFrame con una fila por configuración (en el orden de
+    entrada) y las métricas de resumen del vuelo.
+    """
+    import pandas as pd
+    from physics.batch import (params_table_to_arrays, subset_arrays, derivatives_batch,
+                               ballistic_step_batch)
+
+    arrays = params_table_to_arrays(params_table)
+    N = len(arrays['V_0w'])
+
+    if physics == 'table':
+        from physics.thrust_table import ThrustTableSet
+        tables = ThrustTableSet(arrays)
+        arrays['table_id'] = tables.table_id
+    elif physics == 'exact':
+        tables = None
+    else:
+        raise ValueError(f"Modo de física desconocido: '{physics}'. Opciones: exact, table")
+
+    # 1. ESTADO INICIAL (SI) para todos los cohetes
+    # Orden Fortran: cada columna (x, y, vx, vy, M_w) es contigua en memoria
+    Y = np.zeros((N, 5), order='F')
+    Y[:, 4] = arrays['V_0w'] * RHO_W
+
+    # Métricas de resumen finales (una por cohete, en el orden de entrada)
+    out = {key: np.full(N, np.nan) for key in
+           ('Max_Height', 'Max_Range', 'Max_Velocity', 'Burnout_Time',
+            'Flight_Time', 'Landing_X')}
+    landed = np.zeros(N, dtype=bool)
+
+    # Índices de los cohetes todavía en vuelo; todos los arrays de trabajo
+    # se mantienen compactados y alineados con 'live'
+    live = np.arange(N)
+    live_arrays = arrays
+    max_height = np.full(N, -np.inf)
+    max_range = np.full(N, -np.inf)
+    max_velocity = np.full(N, -np.inf)
+    burnout_time = np.full(N, np.nan)
+    max_height_reached = np.zeros(N, dtype=bool)
+    flying = np.ones(N, dtype=bool)
+
+    def retire(index, t_end):
+        """Vuelca las métricas de los cohetes en 'index' (máscara o índices) a la salida."""
+        done = live[index]
+        out['Max_Height'][done] = max_height[index]
+        out['Max_Range'][done] = max_range[index]
+        out['Max_Velocity'][done] = max_velocity[index]
+        out['Burnout_Time'][done] = burnout_time[index]
+        out['Flight_Time'][done] = t_end
+        out['Landing_X'][done] = Y[index, 0]
+
+    # Buffers de trabajo reutilizados en cada paso (se recortan al compactar)
+    v_buf = np.empty(N)
+    work = np.empty((3, N))
+    cond = np.empty((2, N), dtype=bool)
+    land_buf = np.empty(N, dtype=bool)
+
+    # Cohetes con agua: su subconjunto de parámetros solo se recalcula cuando
+    # cambia (un cohete se vacía o el lote se compacta). Cuando todos se han
+    # vaciado, el resto del vuelo usa el paso balístico en el lugar.
+    wet = True
+    water = None
+    water_arrays = None
+
+    t = 0.0
+    while live.size > 0 and t < 100.0: # Límite de tiempo de seguridad
+        n = live.size
+        y = Y[:, 1]
+        vy = Y[:, 3]
+        M_w = Y[:, 4]
+        v_total = v_buf[:n]
+        tmp = work[0, :n]
+        np.multiply(Y[:, 2], Y[:, 2], out=v_total)
+        np.multiply(vy, vy, out=tmp)
+        v_total += tmp
+        np.sqrt(v_total, out=v_total)
+
+        # 2. ACTUALIZACIÓN DE MÉTRICAS (equivalente al logging escalar)
+        np.maximum(max_height, y, out=max_height)
+        np.maximum(max_range, Y[:, 0], out=max_range)
+        np.maximum(max_velocity, v_total, out=max_velocity)
+
+        if wet:
+            empty = (M_w <= 1e-4) & np.isnan(burnout_time)
+            burnout_time[empty] = t
+
+        falling, above = cond[0, :n], cond[1, :n]
+        np.less(vy, 0, out=falling)
+        np.greater(y, 0, out=above)
+        falling &= above
+        max_height_reached |= falling
+
+        # 3. MÁSCARA DE ATERRIZAJE: los cohetes que tocan el suelo se congelan
+        # (sus métricas se vuelcan a la salida y se ignoran desde entonces).
+        # Tiene su propio buffer: cond ya respalda a falling y above
+        landing = None
+        if t > 0.1:
+            landing = land_buf[:n]
+            np.less_equal(y, 0, out=landing)
+            landing &= max_height_reached
+            landing &= flying
+        if landing is not None and landing.any():
+            # Pocos cohetes aterrizan en cada paso: se indexa con sus posiciones
+            down = np.flatnonzero(landing)
+            # La fila 'Landed' registra y = 0 y velocidad nula
+            max_height[down] = np.maximum(max_height[down], 0.0)
+            max_velocity[down] = np.maximum(max_velocity[down], 0.0)
+            retire(down, t)
+            landed[live[down]] = True
+            flying[down] = False
+
+            # Compactar el lote solo cuando los congelados son una fracción
+            # apreciable, para no copiar los arrays en cada aterrizaje
+            n_flying = np.count_nonzero(flying)
+            if n_flying == 0:
+                live = live[flying]
+                break
+            if n_flying <= 0.75 * live.size:
+                live = live[flying]
+                Y = np.asfortranarray(Y[flying])
+                max_height = max_height[flying]
+                max_range = max_range[flying]
+                max_velocity = max_velocity[flying]
+                burnout_time = burnout_time[flying]
+                max_height_reached = max_height_reached[flying]
+                live_arrays = subset_arrays(arrays, live)
+                flying = np.ones(live.size, dtype=bool)
+                water = None
+                n = live.size
+                v_total = v_buf[:n]
+                np.multiply(Y[:, 2], Y[:, 2], out=v_total)
+                np.multiply(Y[:, 3], Y[:, 3], out=work[0, :n])
+                v_total += work[0, :n]
+                np.sqrt(v_total, out=v_total)
+
+        # 4. PASO DE INTEGRACIÓN (Euler) para todos los cohetes activos
+        if wet:
+            current = np.flatnonzero(Y[:, 4] > 0)
+            if water is None or current.size != water.size:
+                water = current
+                water_arrays = subset_arrays(live_arrays, water)
+            if water.size:
+                dY = derivatives_batch(Y, live_arrays, water, water_arrays, tables)
+                dY *= DT
+                Y += dY
+                np.maximum(Y[:, 4], 0.0, out=Y[:, 4])
+            else:
+                wet = False
+        if not wet:
+            ballistic_step_batch(Y, live_arrays, v_total, DT, work[:, :n])
+
+        t += DT
+
+    # Cohetes que alcanzaron el límite de seguridad sin aterrizar
+    if live.size > 0:
+        retire(flying, t)
+
+    out['Burnout_Time'] = np.where(np.isnan(out['Burnout_Time']), 0.0, out['Burnout_Time'])
+    out['Landed'] = landed
+    df = pd.DataFrame(out)
+    if tables is not None:
+        df.attrs['thrust_table_max_error'] = tables.max_error
+    return df
 
 # --- EJECUCIÓN DEL ORQUESTADOR ---
 if __name__ == "__main__":
+    from visualization import plot_results
+
     print("Iniciando Simulación del Cohete de Agua...")
     print(f"Parámetros iniciales: P_i_abs = {PARAMS['P_i_abs']:.0f} Pa, V_0w = {PARAMS['V_0w']:.4f} m^3")
 
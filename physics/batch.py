@@ -0,0 +1,146 @@
+# 7. physics/batch.py (Derivadas Vectorizadas para Lotes de Cohetes)
+# -----------------------------------------------------------------------------
+from utils.parameters import RHO_W, G, GAMMA, RHO_AIR, P_ATM, convert_to_si
+import numpy as np
+import pandas as pd
+
+# Claves SI que necesita el motor por lotes (una columna por parámetro)
+BATCH_KEYS = ('P_i_abs', 'V_r', 'V_0w', 'A_e', 'A_r', 'M_r',
+              'A_ref', 'C_D', 'launch_angle_rad', 'H_tube_m')
+
+def params_table_to_arrays(params_table):
+    """
+    Convierte una tabla de parámetros (DataFrame, lista de dicts o dict de
+    secuencias) en un dict de arrays SI de longitud N.
+    Si faltan las claves SI se derivan con convert_to_si. Además se
+    precalculan las constantes por cohete que usan las derivadas.
+    """
+    table = pd.DataFrame(params_table)
+    if table.empty:
+        raise ValueError("La tabla de parámetros está vacía")
+    if any(key not in table.columns for key in BATCH_KEYS):
+        table = convert_to_si(table.copy())
+    arrays = {key: table[key].to_numpy(dtype=float) for key in BATCH_KEYS}
+
+    # Constantes derivadas (una vez por lote, no en cada paso)
+    arrays['V_air_0'] = arrays['V_r'] - arrays['V_0w']
+    arrays['Area_Factor'] = arrays['A_r']**2 / (arrays['A_r']**2 - arrays['A_e']**2)
+    arrays['drag_k'] = 0.5 * RHO_AIR * arrays['C_D'] * arrays['A_ref']
+    arrays['cos_angle'] = np.cos(arrays['launch_angle_rad'])
+    arrays['sin_angle'] = np.sin(arrays['launch_angle_rad'])
+    return arrays
+
+def subset_arrays(arrays, idx):
+    """Extrae las filas idx de cada array de parámetros."""
+    return {key: value[idx] for key, value in arrays.items()}
+
+def calculate_pressure_batch(M_w, arrays):
+    """Versión vectorizada de water_phase.calculate_pressure."""
+    V_air = arrays['V_r'] - M_w / RHO_W
+
+    full = V_air <= 0
+    ratio = arrays['V_air_0'] / np.where(full, 1.0, V_air)
+    return np.where(full, P_ATM, arrays['P_i_abs'] * ratio**GAMMA)
+
+def calculate_escape_velocity_batch(P, M_w, arrays):
+    """Versión vectorizada de water_phase.calculate_escape_velocity."""
+    H_diff = (M_w / RHO_W) / arrays['A_r']
+    Term_Pressure = 2.0 * arrays['Area_Factor'] * (P - P_ATM) / RHO_W
+    Term_Gravity = 2.0 * G * arrays['Area_Factor'] * H_diff
+
+    total = Term_Pressure + Term_Gravity
+    return np.sqrt(np.where(total < 0, 0.0, total))
+
+def derivatives_batch(Y, arrays, water=None, water_arrays=None, tables=None):
+    """
+    Calcula las derivadas de N cohetes a la vez.
+    Y tiene forma (N, 5) con columnas [x, y, vx, vy, M_w].
+    Retorna un array (N, 5) con [dx/dt, dy/dt, dvx/dt, dvy/dt, dMw/dt].
+
+    El empuje solo se evalúa sobre la máscara de cohetes con agua; el resto
+    (la mayor parte del vuelo) solo paga arrastre y gravedad. water (índices
+    con M_w > 0) y water_arrays (subset_arrays(arrays, water)) pueden
+    pasarse precalculados para no repetir la indexación en cada paso.
+    tables es un physics.thrust_table.ThrustTableSet opcional (modo 'table':
+    arrays['table_id'] indica la tabla de cada cohete).
+    """
+    vx = Y[:, 2]
+    vy = Y[:, 3]
+    M_w = Y[:, 4]
+
+    v_total = np.sqrt(vx * vx + vy * vy)
+
+    # 1. Arrastre: F_D = -k |v| v  (nulo en reposo)
+    kv = arrays['drag_k'] * v_total
+    F_x = -kv * vx
+    F_y = -kv * vy
+    M_total = arrays['M_r']
+    dMw_dt = np.zeros_like(M_w)
+
+    # 2. Máscara de fase: cohetes que todavía expulsan agua
+    if water is None:
+        water = np.flatnonzero(M_w > 0)
+    if water.size:
+        sub = subset_arrays(arrays, water) if water_arrays is None else water_arrays
+        M_w_s = M_w[water]
+        v_s = v_total[water]
+
+        if tables is None:
+            P = calculate_pressure_batch(M_w_s, sub)
+            u_e = calculate_escape_velocity_batch(P, M_w_s, sub)
+            dMw_s = -RHO_W * sub['A_e'] * u_e
+        else:
+            _, u_e, dMw_s = tables.evaluate(M_w_s, sub['table_id'])
+        Thrust_mag = -dMw_s * u_e
+
+        # Dirección del empuje: velocidad actual o ángulo de lanzamiento en reposo
+        moving = v_s > 1e-6
+        v_safe = np.where(moving, v_s, 1.0)
+        dir_x = np.where(moving, vx[water] / v_safe, sub['cos_angle'])
+        dir_y = np.where(moving, vy[water] / v_safe, sub['sin_angle'])
+
+        F_x[water] += Thrust_mag * dir_x
+        F_y[water] += Thrust_mag * dir_y
+        dMw_dt[water] = dMw_s
+        M_total = M_total.copy()
+        M_total[water] += M_w_s
+
+    dY = np.empty_like(Y)
+    dY[:, 0] = vx
+    dY[:, 1] = vy
+    dY[:, 2] = F_x / M_total
+    dY[:, 3] = F_y / M_total - G
+    dY[:, 4] = dMw_dt
+    return dY
+
+def ballistic_step_batch(Y, arrays, v_total, dt, work):
+    """
+    Paso de Euler en el lugar para cohetes sin agua (solo arrastre y
+    gravedad), con la misma aritmética que derivatives_batch + Euler pero
+    sin temporales: v_total es |v| del estado actual y work un buffer
+    (3, N) de trabajo.
+    """
+    vx = Y[:, 2]
+    vy = Y[:, 3]
+    kv, ax, ay = work
+
+    np.multiply(arrays['drag_k'], v_total, out=kv)
+    # a = (-k |v| v) / M_r, ya multiplicada por dt
+    np.multiply(kv, vx, out=ax)
+    np.negative(ax, out=ax)
+    ax /= arrays['M_r']
+    ax *= dt
+    np.multiply(kv, vy, out=ay)
+    np.negative(ay, out=ay)
+    ay /= arrays['M_r']
+    ay -= G
+    ay *= dt
+
+    # Posición con la velocidad del paso anterior, luego la velocidad
+    np.multiply(vx, dt, out=kv)
+    Y[:, 0] += kv
+    np.multiply(vy, dt, out=kv)
+    Y[:, 1] += kv
+    vx += ax
+    vy += ay
+# -----------------------------------------------------------------------------
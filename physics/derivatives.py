@@ -1,30 +1,37 @@
 # 3. physics/derivatives.py (EDOs for Euler - 2D Motion)
 # -----------------------------------------------------------------------------
-from utils.parameters import PARAMS, RHO_W, G, RHO_AIR
+import warnings
+from utils.parameters import PARAMS, RHO_W, G, RHO_AIR, as_sim_params
 import physics.water_phase as water_phase
 import numpy as np
 
-# Variable global para parámetros actuales de la simulación
-_current_params = PARAMS
+# Sin estado global: los parámetros de cada vuelo (SimParams) se pasan
+# explícitamente, por lo que varias simulaciones pueden correr a la vez.
 
 def set_simulation_params(params):
-    """Establece los parámetros para la simulación actual."""
-    global _current_params
-    _current_params = params
+    """
+    Obsoleta: pase params a las funciones de física o a run_simulation.
+    Por compatibilidad copia params en PARAMS, que es lo que usan las
+    funciones llamadas con params=None.
+    """
+    warnings.warn("set_simulation_params está obsoleta: pase params explícitamente",
+                  DeprecationWarning, stacklevel=2)
+    PARAMS.update(params)
 
 def get_current_params():
-    """Obtiene los parámetros actuales de la simulación."""
-    return _current_params
+    """Obsoleta: retorna PARAMS, los parámetros que se usan con params=None."""
+    warnings.warn("get_current_params está obsoleta: use utils.parameters.PARAMS",
+                  DeprecationWarning, stacklevel=2)
+    return PARAMS
 
 def calculate_drag_2d(vx_n, vy_n, params=None):
     """
     Calcula la Fuerza de Arrastre Aerodinámico en 2D.
     Retorna (F_Dx, F_Dy) - componentes de la fuerza de arrastre.
     """
-    if params is None:
-        params = _current_params
-    C_D = params['C_D']
-    A_ref = params['A_ref']
+    params = as_sim_params(params)
+    C_D = params.C_D
+    A_ref = params.A_ref
     
     # Magnitud de la velocidad
     v_mag = np.sqrt(vx_n**2 + vy_n**2)
@@ -46,9 +53,9 @@ def derivatives(Y_n, params=None):
     Calcula el vector de derivadas para movimiento 2D.
     Y_n = [x_n, y_n, vx_n, vy_n, M_w_n]
     Retorna: [dx/dt, dy/dt, dvx/dt, dvy/dt, dMw/dt]
+    params es el SimParams del vuelo (un dict SI se precompila; None = PARAMS).
     """
-    if params is None:
-        params = _current_params
+    params = as_sim_params(params)
     
     x_n, y_n, vx_n, vy_n, M_w_n = Y_n
     
@@ -61,7 +68,7 @@ def derivatives(Y_n, params=None):
         u_e_n = water_phase.calculate_escape_velocity(P_n, M_w_n, params)
         
         # Tasa de flujo de masa dMw/dt
-        dMw_dt = -RHO_W * params['A_e'] * u_e_n
+        dMw_dt = -RHO_W * params.A_e * u_e_n
         
         # Magnitud del empuje T(t) = - dMw/dt * u_e
         Thrust_mag = -dMw_dt * u_e_n
@@ -73,17 +80,16 @@ def derivatives(Y_n, params=None):
             Thrust_y = Thrust_mag * (vy_n / v_total)
         else:
             # Al inicio (tubo de lanzamiento), usar ángulo de lanzamiento
-            angle = params['launch_angle_rad']
-            Thrust_x = Thrust_mag * np.cos(angle)
-            Thrust_y = Thrust_mag * np.sin(angle)
+            Thrust_x = Thrust_mag * params.cos_angle
+            Thrust_y = Thrust_mag * params.sin_angle
         
         # Masa Total (Variable)
-        M_total_n = params['M_r'] + M_w_n
+        M_total_n = params.M_r + M_w_n
         
     # 2. Variables Fijas (Fase 3: Ballistic/Air Residual)
     else:
         M_w_n = 0.0 
-        M_total_n = params['M_r']
+        M_total_n = params.M_r
         Thrust_x = 0.0
         Thrust_y = 0.0
         dMw_dt = 0.0
@@ -0,0 +1,69 @@
+# 11. physics/kernel.py (Núcleo Escalar Precompilado: math en lugar de NumPy)
+# -----------------------------------------------------------------------------
+from math import sqrt
+from utils.parameters import RHO_W, G, GAMMA, P_ATM, DT, as_sim_params
+
+# Misma física que physics/derivatives.py, pero sobre floats de Python con las
+# constantes del vuelo precompiladas en SimParams: sin arrays temporales, sin
+# np.sqrt sobre escalares y sin búsquedas en diccionarios en cada paso.
+
+def pressure_kernel(M_w, c):
+    """Presión absoluta P(M_w) = P_i V_air_0^GAMMA / V_air^GAMMA."""
+    V_air = c.V_r - M_w / RHO_W
+    if V_air <= 0:
+        return P_ATM
+    return c.P_V_gamma / V_air**GAMMA
+
+def derivatives_kernel(vx, vy, M_w, c):
+    """
+    Derivadas del estado [x, y, vx, vy, M_w] como tupla de floats.
+    c es el SimParams del vuelo.
+    """
+    v = sqrt(vx * vx + vy * vy)
+
+    if M_w > 0:
+        # Fase de agua: presión adiabática, Bernoulli y empuje
+        term = c.K_pressure * (pressure_kernel(M_w, c) - P_ATM) + c.K_gravity * M_w
+        u_e = sqrt(term) if term > 0 else 0.0
+        dMw_dt = -c.rho_A_e * u_e
+        Thrust = c.rho_A_e * u_e * u_e
+        M_total = c.M_r + M_w
+        if v > 1e-6:
+            T_x = Thrust * vx / v
+            T_y = Thrust * vy / v
+        else:
+            T_x = Thrust * c.cos_angle
+            T_y = Thrust * c.sin_angle
+    else:
+        dMw_dt = 0.0
+        M_total = c.M_r
+        T_x = 0.0
+        T_y = 0.0
+
+    # Arrastre cuadrático: F_D = -k |v| v
+    kv = c.drag_k * v
+    ax = (T_x - kv * vx) / M_total
+    ay = (T_y - kv * vy) / M_total - G
+    return vx, vy, ax, ay, dMw_dt
+
+def kernel_euler_steps(Y_0, params, dt=DT, t_max=100.0):
+    """
+    Generador de pasos de Euler del núcleo escalar (misma interfaz que
+    utils.integrators.euler_steps). Produce (t, (x, y, vx, vy, M_w)).
+    """
+    c = as_sim_params(params)
+    x, y, vx, vy, M_w = (float(v) for v in Y_0)
+    t = 0.0
+    while t < t_max:
+        yield t, (x, y, vx, vy, M_w)
+        dx, dy, dvx, dvy, dMw = derivatives_kernel(vx, vy, M_w, c)
+        x += dx * dt
+        y += dy * dt
+        vx += dvx * dt
+        vy += dvy * dt
+        M_w += dMw * dt
+        # Ajuste de condiciones de frontera
+        if M_w < 0:
+            M_w = 0.0
+        t += dt
+# -----------------------------------------------------------------------------
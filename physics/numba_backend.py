@@ -0,0 +1,203 @@
+# 12. physics/numba_backend.py (Backend Opcional Compilado con Numba)
+# -----------------------------------------------------------------------------
+"""
+Bucle completo de vuelo (Euler + determinación de fase + aterrizaje) compilado
+a código nativo con Numba, escribiendo en arrays de salida preasignados.
+
+Numba es opcional: si no está instalado, HAVE_NUMBA es False, las funciones
+siguen siendo Python puro (mismo resultado, sin compilar) y run_simulation
+recurre al backend 'kernel'.
+"""
+from math import sqrt
+import numpy as np
+from utils.parameters import RHO_W, G, GAMMA, P_ATM, DT, as_sim_params
+from utils.recorder import FlightSummary, COLUMNS, PHASE_CODES, EMPTY_WATER_MASS
+
+try:
+    import numba
+    HAVE_NUMBA = True
+    njit = numba.njit(cache=True)
+except ImportError:
+    HAVE_NUMBA = False
+
+    def njit(func):
+        """Sustituto sin compilación cuando Numba no está instalado."""
+        return func
+
+# Capacidad inicial de los buffers de trayectoria [muestras]: un vuelo típico
+# (unos 3 s) cabe de sobra; uno más largo se repite con la capacidad exacta
+INITIAL_SAMPLES = 8192
+
+# Índices del vector de constantes que recibe el código compilado
+(C_V_R, C_P_V_GAMMA, C_K_PRESSURE, C_K_GRAVITY, C_RHO_A_E,
+ C_M_R, C_DRAG_K, C_COS, C_SIN, C_H_TUBE) = range(10)
+
+# Códigos de fase (deben coincidir con utils.recorder.PHASES)
+_LAUNCH_TUBE = PHASE_CODES['Launch Tube']
+_WATER = PHASE_CODES['Water']
+_AIR = PHASE_CODES['Air']
+_BALLISTIC = PHASE_CODES['Ballistic']
+_LANDED = PHASE_CODES['Landed']
+
+def pack_constants(sim):
+    """Empaqueta las constantes de un SimParams en un array float64."""
+    return np.array([sim.V_r, sim.P_V_gamma, sim.K_pressure, sim.K_gravity,
+                     sim.rho_A_e, sim.M_r, sim.drag_k, sim.cos_angle,
+                     sim.sin_angle, sim.H_tube_m])
+
+@njit
+def _pressure(M_w, c):
+    """Presión absoluta P(M_w) (misma fórmula que physics/kernel.py)."""
+    V_air = c[C_V_R] - M_w / RHO_W
+    if V_air <= 0:
+        return P_ATM
+    return c[C_P_V_GAMMA] / V_air**GAMMA
+
+@njit
+def _derivatives(vx, vy, M_w, c):
+    """Derivadas (dvx/dt, dvy/dt, dMw/dt) del núcleo escalar."""
+    v = sqrt(vx * vx + vy * vy)
+    T_x = 0.0
+    T_y = 0.0
+    dMw_dt = 0.0
+    M_total = c[C_M_R]
+    if M_w > 0:
+        term = c[C_K_PRESSURE] * (_pressure(M_w, c) - P_ATM) + c[C_K_GRAVITY] * M_w
+        u_e = sqrt(term) if term > 0 else 0.0
+        dMw_dt = -c[C_RHO_A_E] * u_e
+        Thrust = c[C_RHO_A_E] * u_e * u_e
+        M_total = c[C_M_R] + M_w
+        if v > 1e-6:
+            T_x = Thrust * vx / v
+            T_y = Thrust * vy / v
+        else:
+            T_x = Thrust * c[C_COS]
+            T_y = Thrust * c[C_SIN]
+    kv = c[C_DRAG_K] * v
+    ax = (T_x - kv * vx) / M_total
+    ay = (T_y - kv * vy) / M_total - G
+    return ax, ay, dMw_dt
+
+@njit
+def _store(out, phase_out, n, t, x, y, vx, vy, v_total, M_w, P, phase):
+    """Escribe la muestra n si hay capacidad en los buffers de salida."""
+    if n < out.shape[1]:
+        out[0, n] = t
+        out[1, n] = x
+        out[2, n] = y
+        out[3, n] = vx
+        out[4, n] = vy
+        out[5, n] = v_total
+        out[6, n] = M_w
+        out[7, n] = P
+        phase_out[n] = phase
+
+@njit
+def integrate_flight(c, M_0w, dt, t_max, out, phase_out, summary):
+    """
+    Integra el vuelo completo hasta el aterrizaje (o t_max).
+
+    Si out tiene capacidad (forma (8, n)), escribe cada muestra en las
+    columnas de utils.recorder.COLUMNS y la fase en phase_out; con
+    capacidad 0 solo acumula el resumen. summary (5 valores) recibe
+    [apogeo, alcance, velocidad máxima, tiempo de vaciado, tiempo de vuelo].
+    Retorna el número de muestras del vuelo.
+    """
+    x = 0.0
+    y = 0.0
+    vx = 0.0
+    vy = 0.0
+    M_w = M_0w
+    t = 0.0
+    t_last = 0.0
+    n = 0
+    max_height_reached = False
+    max_height = -np.inf
+    max_range = -np.inf
+    max_velocity = -np.inf
+    burnout_time = -1.0
+
+    while t < t_max:
+        v_total = sqrt(vx * vx + vy * vy)
+        P = _pressure(M_w, c)
+
+        # Determinación de la fase (igual que run_simulation)
+        if sqrt(x * x + y * y) < c[C_H_TUBE]:
+            phase = _LAUNCH_TUBE
+        elif M_w > 1e-4:
+            phase = _WATER
+        elif P > P_ATM:
+            phase = _AIR
+        else:
+            phase = _BALLISTIC
+
+        if vy < 0 and y > 0:
+            max_height_reached = True
+
+        # Registro de la muestra y del resumen en línea
+        _store(out, phase_out, n, t, x, y, vx, vy, v_total, M_w, P, phase)
+        n += 1
+        t_last = t
+        max_height = max(max_height, y)
+        max_range = max(max_range, x)
+        max_velocity = max(max_velocity, v_total)
+        if burnout_time < 0 and M_w <= EMPTY_WATER_MASS:
+            burnout_time = t
+
+        # Condición de fin de vuelo: fila final en el suelo
+        if y <= 0 and max_height_reached and t > 0.1:
+            _store(out, phase_out, n, t, x, 0.0, 0.0, 0.0, 0.0, 0.0, P_ATM, _LANDED)
+            n += 1
+            max_height = max(max_height, 0.0)
+            max_velocity = max(max_velocity, 0.0)
+            break
+
+        # Paso de Euler
+        ax, ay, dMw_dt = _derivatives(vx, vy, M_w, c)
+        x += vx * dt
+        y += vy * dt
+        vx += ax * dt
+        vy += ay * dt
+        M_w += dMw_dt * dt
+        if M_w < 0:
+            M_w = 0.0
+        t += dt
+
+    summary[0] = max_height
+    summary[1] = max_range
+    summary[2] = max_velocity
+    summary[3] = burnout_time if burnout_time >= 0 else 0.0
+    summary[4] = t_last
+    return n
+
+def run_flight_numba(params, dt=DT, t_max=100.0, store=True):
+    """
+    Ejecuta un vuelo con el bucle compilado.
+    Retorna (data, phase, summary): data es (8, n) en el orden de COLUMNS,
+    phase los códigos int8 y summary un FlightSummary. Con store=False no se
+    guarda la trayectoria (data y phase vacíos).
+
+    Los buffers empiezan con INITIAL_SAMPLES muestras en lugar de t_max / dt
+    (100 000, unos 6 MB); si el vuelo no cabe se repite con su tamaño exacto,
+    y el resultado se recorta a las muestras del vuelo.
+    """
+    sim = as_sim_params(params)
+    constants = pack_constants(sim)
+    max_samples = int(t_max / dt) + 3
+    capacity = min(INITIAL_SAMPLES, max_samples) if store else 0
+    summary = np.empty(5)
+    while True:
+        out = np.empty((len(COLUMNS), capacity))
+        phase_out = np.empty(capacity, dtype=np.int8)
+        n = integrate_flight(constants, sim.V_0w * RHO_W, dt, t_max, out, phase_out, summary)
+        if not store or n <= capacity:
+            break
+        # Vuelo más largo que la estimación: se repite (es determinista) con
+        # la capacidad exacta que retornó el primer intento
+        capacity = n
+    summary = FlightSummary(*(float(v) for v in summary))
+    if n < capacity:
+        # Recorte: la trayectoria no retiene el buffer sobrante
+        return out[:, :n].copy(), phase_out[:n].copy(), summary
+    return out[:, :n], phase_out[:n], summary
+# -----------------------------------------------------------------------------
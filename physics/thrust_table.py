@@ -0,0 +1,222 @@
+# 16. physics/thrust_table.py (Tablas de Empuje Precalculadas para la Fase de Agua)
+# -----------------------------------------------------------------------------
+"""
+Durante la fase de agua P, u_e y dM_w/dt dependen solo de M_w para una
+botella, boquilla y presión dadas (P_i, V_r, V_0w, A_e, A_r). Este módulo las
+tabula una vez en una malla uniforme de M_w y las interpola con Hermite
+cúbico monótono (PCHIP, Fritsch–Carlson), sin sobreoscilaciones.
+
+- get_thrust_table(params): tabla memorizada por clave de agua, compartida
+  por todas las variaciones de ángulo, C_D o masa de un barrido.
+- ThrustTable.errors: error máximo de interpolación respecto a las funciones
+  exactas de physics/water_phase.py.
+- Modo de física 'table': backend de run_simulation (table_euler_steps) y
+  run_simulation_batch(..., physics='table') con ThrustTableSet.
+"""
+from functools import lru_cache
+from math import sqrt
+import numpy as np
+from utils.parameters import RHO_W, G, DT, as_sim_params
+import physics.water_phase as water_phase
+
+# Nodos de la malla de M_w por tabla
+DEFAULT_NODES = 257
+
+# Puntos de control por intervalo al medir el error de interpolación
+ERROR_SAMPLES = 8
+
+# Magnitudes tabuladas (en este orden en los coeficientes)
+QUANTITIES = ('P', 'u_e', 'dMw_dt')
+
+def water_key(sim):
+    """Clave de la fase de agua: los parámetros de los que dependen P y u_e."""
+    return (sim.P_i_abs, sim.V_r, sim.V_0w, sim.A_e, sim.A_r)
+
+def pchip_slopes(h, y):
+    """
+    Pendientes de Fritsch–Carlson para una malla uniforme de paso h: se
+    anulan en extremos locales y usan la media armónica en el resto, de modo
+    que el interpolante conserva la monotonía de los datos. Con h = 0 (sin
+    agua) todas las pendientes son nulas.
+    """
+    d = np.zeros_like(y)
+    if h <= 0:
+        return d
+    delta = np.diff(y) / h
+    same_sign = delta[:-1] * delta[1:] > 0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        harmonic = 2.0 / (1.0 / delta[:-1] + 1.0 / delta[1:])
+    d[1:-1] = np.where(same_sign, harmonic, 0.0)
+    # Extremos: diferencia unilateral, anulada si cambia de signo
+    d[0] = delta[0] if delta[0] * delta[min(1, delta.size - 1)] > 0 else 0.0
+    d[-1] = delta[-1] if delta[-1] * delta[max(-2, -delta.size)] > 0 else 0.0
+    return d
+
+def hermite_coefficients(h, y, d):
+    """
+    Coeficientes (a, b, c, e) por intervalo en la variable local s ∈ [0, 1]:
+    f = a + s (b + s (c + s e)).
+    """
+    y0, y1 = y[:-1], y[1:]
+    m0, m1 = d[:-1] * h, d[1:] * h
+    return np.stack([y0, m0, 3.0 * (y1 - y0) - 2.0 * m0 - m1,
+                     2.0 * (y0 - y1) + m0 + m1], axis=-1)
+
+class ThrustTable:
+    """
+    Tabla P(M_w), u_e(M_w), dM_w/dt(M_w) de una configuración de agua.
+
+    evaluate(M_w) es la versión escalar (floats de Python) y evaluate_array
+    la vectorizada; fuera de [0, M_0w] se usa el intervalo extremo.
+    """
+    __slots__ = ('key', 'M_max', 'inv_h', 'n_intervals', 'coefs', '_rows', 'errors')
+
+    def __init__(self, params, n_nodes=DEFAULT_NODES):
+        sim = as_sim_params(params)
+        self.key = water_key(sim)
+        self.M_max = sim.V_0w * RHO_W
+        h = self.M_max / (n_nodes - 1)
+        self.inv_h = 1.0 / h if h > 0 else 0.0
+        self.n_intervals = n_nodes - 1
+
+        M = np.linspace(0.0, self.M_max, n_nodes)
+        exact = self.exact(M, sim)
+        # coefs: (intervalos, magnitud, 4)
+        self.coefs = np.stack([hermite_coefficients(h, y, pchip_slopes(h, y))
+                               for y in exact], axis=1)
+        self._rows = [tuple(map(tuple, row)) for row in self.coefs.tolist()]
+        self.errors = self._measure_errors(sim)
+
+    @staticmethod
+    def exact(M_w, sim):
+        """Valores exactos de water_phase en los puntos M_w: (P, u_e, dMw_dt)."""
+        P = np.array([water_phase.calculate_pressure(m, sim) for m in M_w])
+        u_e = np.array([water_phase.calculate_escape_velocity(p, m, sim)
+                        for p, m in zip(P, M_w)])
+        return P, u_e, -RHO_W * sim.A_e * u_e
+
+    def _measure_errors(self, sim):
+        """
+        Error máximo de interpolación entre nodos, relativo al valor máximo
+        absoluto de cada magnitud: {'P': ..., 'u_e': ..., 'dMw_dt': ...}.
+        """
+        s = (np.arange(ERROR_SAMPLES) + 0.5) / ERROR_SAMPLES
+        M = ((np.arange(self.n_intervals)[:, None] + s) / self.n_intervals * self.M_max).ravel()
+        approx = self.evaluate_array(M)
+        errors = {}
+        for name, y, y_exact in zip(QUANTITIES, approx, self.exact(M, sim)):
+            scale = np.max(np.abs(y_exact))
+            errors[name] = float(np.max(np.abs(y - y_exact)) / scale) if scale > 0 else 0.0
+        return errors
+
+    @property
+    def max_error(self):
+        """Mayor de los errores relativos de interpolación."""
+        return max(self.errors.values())
+
+    def evaluate(self, M_w):
+        """(P, u_e, dMw_dt) interpolados para un M_w escalar."""
+        u = M_w * self.inv_h
+        i = int(u)
+        if i >= self.n_intervals:
+            i = self.n_intervals - 1
+        elif i < 0:
+            i = 0
+        s = u - i
+        (a0, b0, c0, e0), (a1, b1, c1, e1), (a2, b2, c2, e2) = self._rows[i]
+        return (a0 + s * (b0 + s * (c0 + s * e0)),
+                a1 + s * (b1 + s * (c1 + s * e1)),
+                a2 + s * (b2 + s * (c2 + s * e2)))
+
+    def evaluate_array(self, M_w):
+        """(P, u_e, dMw_dt) interpolados para un array de M_w."""
+        u = np.asarray(M_w, dtype=float) * self.inv_h
+        i = np.clip(u.astype(np.int64), 0, self.n_intervals - 1)
+        s = (u - i)[:, None]
+        a, b, c, e = np.moveaxis(self.coefs[i], -1, 0)
+        return tuple((a + s * (b + s * (c + s * e))).T)
+
+@lru_cache(maxsize=1024)
+def _table_for_key(key, n_nodes):
+    P_i_abs, V_r, V_0w, A_e, A_r = key
+    params = {'P_i_abs': P_i_abs, 'V_r': V_r, 'V_0w': V_0w, 'A_e': A_e, 'A_r': A_r,
+              # Irrelevantes para la fase de agua
+              'M_r': 1.0, 'A_ref': 1.0, 'C_D': 0.0, 'launch_angle_rad': 0.0, 'H_tube_m': 0.0}
+    return ThrustTable(params, n_nodes)
+
+def get_thrust_table(params, n_nodes=DEFAULT_NODES):
+    """
+    Tabla de empuje de una configuración, memorizada por (P_i, V_r, V_0w,
+    A_e, A_r): un barrido de ángulos, C_D o masas construye una sola tabla.
+    """
+    return _table_for_key(water_key(as_sim_params(params)), n_nodes)
+
+class ThrustTableSet:
+    """
+    Tablas de un lote de cohetes para el motor vectorizado: una por clave de
+    agua distinta, apiladas para evaluar todas con indexado avanzado.
+    table_id (longitud N) indica la tabla de cada cohete.
+    """
+
+    def __init__(self, arrays, n_nodes=DEFAULT_NODES):
+        keys = np.column_stack([arrays[k] for k in ('P_i_abs', 'V_r', 'V_0w', 'A_e', 'A_r')])
+        unique, self.table_id = np.unique(keys, axis=0, return_inverse=True)
+        self.table_id = self.table_id.ravel()
+        self.tables = [_table_for_key(tuple(map(float, key)), n_nodes) for key in unique]
+        self.coefs = np.stack([table.coefs for table in self.tables])
+        self.inv_h = np.array([table.inv_h for table in self.tables])
+        self.n_intervals = n_nodes - 1
+
+    @property
+    def max_error(self):
+        """Mayor error relativo de interpolación entre todas las tablas del lote."""
+        return max(table.max_error for table in self.tables)
+
+    def evaluate(self, M_w, table_id):
+        """(P, u_e, dMw_dt) para cohetes con tablas table_id y masas M_w."""
+        u = M_w * self.inv_h[table_id]
+        i = np.clip(u.astype(np.int64), 0, self.n_intervals - 1)
+        s = (u - i)[:, None]
+        a, b, c, e = np.moveaxis(self.coefs[table_id, i], -1, 0)
+        return tuple((a + s * (b + s * (c + s * e))).T)
+
+def table_euler_steps(Y_0, params, dt=DT, t_max=100.0, thrust_table=None):
+    """
+    Generador de pasos de Euler con la física de agua tabulada (misma
+    interfaz que physics.kernel.kernel_euler_steps). thrust_table permite
+    reutilizar una tabla ya construida; por defecto se usa get_thrust_table.
+    """
+    c = as_sim_params(params)
+    table = get_thrust_table(c) if thrust_table is None else thrust_table
+    x, y, vx, vy, M_w = (float(v) for v in Y_0)
+    t = 0.0
+    while t < t_max:
+        yield t, (x, y, vx, vy, M_w)
+        v = sqrt(vx * vx + vy * vy)
+        if M_w > 0:
+            _, u_e, dMw_dt = table.evaluate(M_w)
+            Thrust = -dMw_dt * u_e
+            M_total = c.M_r + M_w
+            if v > 1e-6:
+                T_x = Thrust * vx / v
+                T_y = Thrust * vy / v
+            else:
+                T_x = Thrust * c.cos_angle
+                T_y = Thrust * c.sin_angle
+        else:
+            dMw_dt = 0.0
+            M_total = c.M_r
+            T_x = 0.0
+            T_y = 0.0
+        kv = c.drag_k * v
+        ax = (T_x - kv * vx) / M_total
+        ay = (T_y - kv * vy) / M_total - G
+        x += vx * dt
+        y += vy * dt
+        vx += ax * dt
+        vy += ay * dt
+        M_w += dMw_dt * dt
+        if M_w < 0:
+            M_w = 0.0
+        t += dt
+# -----------------------------------------------------------------------------
@@ -1,22 +1,22 @@
 # 2. physics/water_phase.py (Core Functions: P(t) and u_e(t))
 # -----------------------------------------------------------------------------
-from utils.parameters import PARAMS, GAMMA, P_ATM, RHO_W, G
+from utils.parameters import GAMMA, P_ATM, RHO_W, G, as_sim_params
 import numpy as np
 
 def calculate_pressure(M_w_n, params=None):
-    """Calcula la presión absoluta instantánea P(t) usando la Ley Adiabática."""
-    if params is None:
-        params = PARAMS
-    P_i = params['P_i_abs']
-    V_r = params['V_r']
-    V_0w = params['V_0w']
+    """
+    Calcula la presión absoluta instantánea P(t) usando la Ley Adiabática.
+    params es el SimParams del vuelo (un dict SI se precompila; None = PARAMS).
+    """
+    params = as_sim_params(params)
+    P_i = params.P_i_abs
     
     # 1. Volumen de agua instantáneo
     V_w_n = M_w_n / RHO_W
     
-    # 2. Volumen de aire instantáneo y volumen inicial de aire
-    V_air_n = V_r - V_w_n
-    V_air_0 = V_r - V_0w
+    # 2. Volumen de aire instantáneo y volumen inicial de aire (precompilado)
+    V_air_n = params.V_r - V_w_n
+    V_air_0 = params.V_air_0
     
     # 3. Cálculo de la presión P(t)
     if V_air_n <= 0:
@@ -30,10 +30,8 @@ def calculate_escape_velocity(P_n, M_w_n, params=None):
     Calcula la velocidad de escape instantánea u_e(t) usando la fórmula completa de Bernoulli.
     Esta es la 'solución exacta' pedida, incluyendo el término hidrostático dinámico. [1]
     """
-    if params is None:
-        params = PARAMS
-    A_r = params['A_r']
-    A_e = params['A_e']
+    params = as_sim_params(params)
+    A_r = params.A_r
     
     V_w_n = M_w_n / RHO_W
     
@@ -41,8 +39,8 @@ def calculate_escape_velocity(P_n, M_w_n, params=None):
     # Asumiendo que V_w(t) está distribuido en el área A_r: h_diff = V_w(t) / A_r
     H_diff_n = V_w_n / A_r 
 
-    # 2. Factor geométrico de área
-    Area_Factor = A_r**2 / (A_r**2 - A_e**2)
+    # 2. Factor geométrico de área (precompilado: A_r^2 / (A_r^2 - A_e^2))
+    Area_Factor = params.Area_Factor
     
     # 3. Término de Presión (dominante)
     Term_Pressure = 2.0 * Area_Factor * (P_n - P_ATM) / RHO_W
@@ -1,9 +1,10 @@
 # quick_start_2d.py - Inicio rápido para simulación 2D
 # -----------------------------------------------------------------------------
 import numpy as np
-from utils.parameters import PARAMS
-from main_simulation import run_simulation
 from visualization import plot_results
+from rendering import plot_comparison
+from analysis.sweep import run_sweep
+from analysis.optimize import optimize
 
 print("="*70)
 print(" "*15 + "🚀 COHETE DE AGUA - SIMULACIÓN 2D 🚀")
@@ -19,63 +20,47 @@ print("-"*70)
 print(f"{'Ángulo':>8} | {'Altura Máx':>12} | {'Alcance Máx':>12} | {'Velocidad Máx':>14}")
 print("-"*70)
 
-results_comparison = []
+# Refinar el ángulo óptimo para alcance (Brent acotado entre los ángulos probados)
+best = optimize({'launch_angle_deg': (min(angles_to_test), max(angles_to_test))},
+                metric='Max_Range', verbose=False)
+best_angle = best.params['launch_angle_deg']
+best_range = best.value
 
-for angle in angles_to_test:
-    # Configurar parámetros
-    test_params = PARAMS.copy()
-    test_params['launch_angle_deg'] = angle
-    test_params['launch_angle_rad'] = np.radians(angle)
-    
-    # Ejecutar simulación (silenciosa)
-    import io
-    import sys
-    old_stdout = sys.stdout
-    sys.stdout = io.StringIO()
-    
-    df = run_simulation(test_params)
-    
-    sys.stdout = old_stdout
-    
-    # Extraer resultados
-    max_height = df['Y_Position'].max()
-    max_range = df['X_Position'].max()
-    max_velocity = df['Total_Velocity'].max()
-    
-    print(f"{angle:>8}° | {max_height:>10.2f} m | {max_range:>10.2f} m | {max_velocity:>12.2f} m/s")
+# Un solo barrido con trayectorias: tabla, comparación y vuelo detallado
+# salen de él, sin volver a simular ningún ángulo
+comparison_angles = np.linspace(20.0, 85.0, 50)
+all_angles = np.unique(np.concatenate([angles_to_test, comparison_angles, [best_angle]]))
+sweep = run_sweep({'launch_angle_deg': all_angles}, workers=1, verbose=False,
+                  backend='kernel', record='full')
+
+for row in sweep[sweep['launch_angle_deg'].isin(angles_to_test)].itertuples(index=False):
+    angle = row.launch_angle_deg
+    max_height = row.Max_Height
+    max_range = row.Max_Range
+    max_velocity = row.Max_Velocity
     
-    results_comparison.append({
-        'angle': angle,
-        'height': max_height,
-        'range': max_range,
-        'velocity': max_velocity
-    })
+    print(f"{angle:>8.0f}° | {max_height:>10.2f} m | {max_range:>10.2f} m | {max_velocity:>12.2f} m/s")
 
 print("-"*70)
 
-# Encontrar el ángulo óptimo para alcance
-best_range_idx = max(range(len(results_comparison)), key=lambda i: results_comparison[i]['range'])
-best_angle = results_comparison[best_range_idx]['angle']
-best_range = results_comparison[best_range_idx]['range']
-
-print(f"\n🎯 ÁNGULO ÓPTIMO PARA MÁXIMO ALCANCE: {best_angle}°")
-print(f"   Alcance máximo logrado: {best_range:.2f} m")
+print(f"\n🎯 ÁNGULO ÓPTIMO PARA MÁXIMO ALCANCE: {best_angle:.1f}°")
+print(f"   Alcance máximo logrado: {best_range:.2f} m ({best.evaluations} simulaciones)")
 print("="*70)
 
-# Ejecutar simulación detallada con el ángulo óptimo
-print(f"\n🚀 EJECUTANDO SIMULACIÓN DETALLADA CON {best_angle}°...")
+# Gráficas del vuelo óptimo (su trayectoria ya está en el barrido)
+print(f"\n🚀 GRÁFICAS DEL VUELO CON {best_angle:.1f}°...")
 print("-"*70)
 
-optimal_params = PARAMS.copy()
-optimal_params['launch_angle_deg'] = best_angle
-optimal_params['launch_angle_rad'] = np.radians(best_angle)
+best_row = int(np.flatnonzero(sweep['launch_angle_deg'] == best_angle)[0])
+plot_results(sweep['Trajectory'].iloc[best_row])
 
-df_final = run_simulation(optimal_params)
-plot_results(df_final)
+# Comparación de todos los ángulos (una figura por métrica)
+plot_comparison(sweep, highlight=best_row)
 
 print("\n📈 Gráficos generados:")
 print("   • trajectory_2d.png       - Trayectoria X vs Y")
 print("   • results_series_2d.png   - Series de tiempo completas")
+print(f"   • comparison_*.png         - {len(sweep)} ángulos superpuestos")
 print()
 print("="*70)
 print("✅ SIMULACIÓN 2D COMPLETADA")
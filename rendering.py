@@ -0,0 +1,365 @@
+# 21. rendering.py (Renderizado por Lotes con Plantillas Reutilizables)
+# -----------------------------------------------------------------------------
+"""
+Renderizado rápido de las gráficas de plot_results para muchos vuelos.
+
+- Se usa el backend Agg explícitamente (Figure + FigureCanvasAgg), sin pyplot:
+  no hay figuras globales que se acumulen entre llamadas.
+- FlightRenderer construye las dos figuras y sus líneas una sola vez; cada
+  vuelo solo actualiza los datos de las líneas y los límites de los ejes.
+- Las series de 1 ms se diezman a la resolución de la imagen (mínimo y
+  máximo por columna de píxeles) antes de dibujar.
+- render_many reparte los vuelos entre procesos trabajadores, cada uno con
+  su propia plantilla, y escribe cada vuelo en rutas con nombre propio.
+- plot_comparison superpone muchos vuelos (p. ej. un barrido con
+  record != 'summary') en una figura por métrica, con una sola
+  LineCollection por figura en lugar de una línea por vuelo.
+"""
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+from matplotlib.collections import LineCollection
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from utils.recorder import PHASES
+
+# Resolución de salida [dpi] (la misma que plot_results)
+DPI = 150
+
+# Colores por fase de la trayectoria 2D
+PHASE_COLORS = {'Launch Tube': 'purple', 'Water': 'blue', 'Air': 'red',
+                'Ballistic': 'gray', 'Landed': 'green'}
+
+# Series de tiempo: (panel, columna, escala, etiqueta, color)
+SERIES = (
+    ((0, 0), 'X_Position', 1.0, None, 'blue'),
+    ((0, 1), 'Y_Position', 1.0, None, 'red'),
+    ((1, 0), 'Total_Velocity', 1.0, None, 'purple'),
+    ((1, 1), 'X_Velocity', 1.0, 'Vx', 'blue'),
+    ((1, 1), 'Y_Velocity', 1.0, 'Vy', 'red'),
+    ((2, 0), 'Pressure', 1e-3, None, 'green'),
+    ((2, 1), 'Water Mass', 1e3, None, 'orange'),
+)
+
+# Títulos y etiquetas de los paneles de series: (título, eje Y)
+PANELS = {
+    (0, 0): ('Alcance Horizontal vs. Tiempo', 'Posición X (m)'),
+    (0, 1): ('Altura vs. Tiempo', 'Posición Y (m)'),
+    (1, 0): ('Velocidad vs. Tiempo', 'Velocidad Total (m/s)'),
+    (1, 1): ('Componentes de Velocidad', 'Velocidad (m/s)'),
+    (2, 0): ('Presión Interna vs. Tiempo', 'Presión (kPa Abs)'),
+    (2, 1): ('Masa de Agua vs. Tiempo', 'Masa de Agua (g)'),
+}
+
+# Vuelos por bloque enviado a cada proceso trabajador
+RENDER_CHUNK = 8
+
+# Métricas de plot_comparison: columna -> (título, eje Y, escala)
+COMPARISON_METRICS = {
+    'X_Position': ('Alcance Horizontal vs. Tiempo', 'Posición X (m)', 1.0),
+    'Y_Position': ('Altura vs. Tiempo', 'Posición Y (m)', 1.0),
+    'Total_Velocity': ('Velocidad vs. Tiempo', 'Velocidad Total (m/s)', 1.0),
+    'X_Velocity': ('Velocidad Horizontal vs. Tiempo', 'Vx (m/s)', 1.0),
+    'Y_Velocity': ('Velocidad Vertical vs. Tiempo', 'Vy (m/s)', 1.0),
+    'Pressure': ('Presión Interna vs. Tiempo', 'Presión (kPa Abs)', 1e-3),
+    'Water Mass': ('Masa de Agua vs. Tiempo', 'Masa de Agua (g)', 1e3),
+}
+
+def decimate_indices(max_points, *series):
+    """
+    Índices crecientes que conservan el mínimo y el máximo de cada serie en
+    max_points // 2 tramos consecutivos, más el primero y el último. Con
+    n <= max_points se retornan todos los índices.
+    """
+    n = len(series[0])
+    if n <= max_points:
+        return np.arange(n)
+    buckets = max(1, max_points // 2)
+    size = -(-n // buckets)
+    offsets = np.arange(buckets) * size
+    keep = [np.array([0, n - 1])]
+    for values in series:
+        values = np.asarray(values, dtype=float)
+        # Relleno con el último valor para formar una matriz (tramos, tamaño)
+        padded = np.concatenate([values, np.full(buckets * size - n, values[-1])])
+        blocks = padded.reshape(buckets, size)
+        keep.append(offsets + blocks.argmin(axis=1))
+        keep.append(offsets + blocks.argmax(axis=1))
+    return np.unique(np.minimum(np.concatenate(keep), n - 1))
+
+class FlightRenderer:
+    """
+    Plantilla de las gráficas de un vuelo (trayectoria 2D y series de
+    tiempo) que se reutiliza entre vuelos. No es segura entre hilos: cada
+    hilo o proceso debe usar su propia instancia.
+    """
+
+    def __init__(self, dpi=DPI):
+        self.dpi = dpi
+        self._build_trajectory()
+        self._build_series()
+
+    def _build_trajectory(self):
+        fig = Figure(figsize=(12, 8))
+        FigureCanvasAgg(fig)
+        ax = fig.add_subplot()
+        self._phase_lines = {phase: ax.plot([], [], label=phase, color=PHASE_COLORS[phase],
+                                            linewidth=2)[0]
+                             for phase in PHASES}
+        self._ground = ax.axhline(y=0, color='green', linestyle='-', linewidth=3, alpha=0.5,
+                                  label='Suelo')
+        ax.set_xlabel('Alcance Horizontal (m)', fontsize=12)
+        ax.set_ylabel('Altura (m)', fontsize=12)
+        ax.set_title('Trayectoria 2D del Cohete de Agua', fontsize=14, fontweight='bold')
+        ax.grid(True, alpha=0.3)
+        ax.set_aspect('equal', adjustable='datalim')
+        self._trajectory = (fig, ax)
+        self._trajectory_laid_out = False
+
+    def _build_series(self):
+        fig = Figure(figsize=(14, 12))
+        FigureCanvasAgg(fig)
+        axes = fig.subplots(3, 2)
+        for (row, col), (title, ylabel) in PANELS.items():
+            ax = axes[row, col]
+            ax.set_title(title)
+            ax.set_ylabel(ylabel)
+            ax.grid(True)
+            if row == 2:
+                ax.set_xlabel('Tiempo (s)')
+        self._series_lines = [(column, scale, axes[panel].plot([], [], label=label, color=color,
+                                                               linewidth=2)[0])
+                              for panel, column, scale, label, color in SERIES]
+        axes[1, 1].legend()
+        self._series = (fig, axes)
+        self._series_laid_out = False
+
+    def _max_points(self, fig, columns=1):
+        """Dos puntos por columna de píxeles de cada panel."""
+        return 2 * int(fig.get_figwidth() * self.dpi / columns)
+
+    def draw_trajectory(self, df):
+        """Actualiza la figura de trayectoria con el vuelo df y la retorna."""
+        fig, ax = self._trajectory
+        x = df['X_Position'].to_numpy()
+        y = df['Y_Position'].to_numpy()
+        codes = df['Phase'].cat.codes.to_numpy()
+        limit = self._max_points(fig)
+        present = []
+        for code, phase in enumerate(PHASES):
+            line = self._phase_lines[phase]
+            mask = codes == code
+            if mask.any():
+                px, py = x[mask], y[mask]
+                keep = decimate_indices(limit, px, py)
+                line.set_data(px[keep], py[keep])
+                line.set_visible(True)
+                present.append(line)
+            else:
+                line.set_data([], [])
+                line.set_visible(False)
+        ax.legend(handles=present + [self._ground])
+        ax.relim(visible_only=True)
+        ax.autoscale_view()
+        if not self._trajectory_laid_out:
+            fig.tight_layout()
+            self._trajectory_laid_out = True
+        return fig
+
+    def draw_series(self, df):
+        """Actualiza la figura de series de tiempo con el vuelo df y la retorna."""
+        fig, axes = self._series
+        t = df['Time'].to_numpy()
+        columns = {column: df[column].to_numpy() * scale
+                   for column, scale, _ in self._series_lines}
+        keep = decimate_indices(self._max_points(fig, columns=2), *columns.values())
+        for column, _, line in self._series_lines:
+            line.set_data(t[keep], columns[column][keep])
+        for ax in axes.flat:
+            ax.relim()
+            ax.autoscale_view()
+        if not self._series_laid_out:
+            fig.tight_layout()
+            self._series_laid_out = True
+        return fig
+
+    def render(self, df, trajectory_path='trajectory_2d.png', series_path='results_series_2d.png'):
+        """Dibuja el vuelo df y escribe las dos imágenes (None omite una de ellas)."""
+        if trajectory_path is not None:
+            self.draw_trajectory(df).savefig(trajectory_path, dpi=self.dpi)
+        if series_path is not None:
+            self.draw_series(df).savefig(series_path, dpi=self.dpi)
+        return trajectory_path, series_path
+
+# Plantilla de cada proceso trabajador (se crea en el primer vuelo)
+_worker_renderer = None
+
+def _render_chunk(jobs, dpi):
+    """Renderiza un bloque de (vuelo, ruta de trayectoria, ruta de series)."""
+    global _worker_renderer
+    if _worker_renderer is None or _worker_renderer.dpi != dpi:
+        _worker_renderer = FlightRenderer(dpi)
+    for flight, trajectory_path, series_path in jobs:
+        if isinstance(flight, (str, os.PathLike)):
+            from utils.trajectory_file import read_trajectory
+            flight = read_trajectory(flight)
+        _worker_renderer.render(flight, trajectory_path, series_path)
+    return len(jobs)
+
+def render_many(flights, output_dir, workers=None, dpi=DPI, chunksize=RENDER_CHUNK):
+    """
+    Renderiza muchos vuelos en output_dir y retorna {nombre: (trayectoria,
+    series)} con las rutas escritas.
+
+    flights es un dict {nombre: vuelo} o una lista de vuelos (nombres
+    flight_0000, flight_0001...). Cada vuelo es un DataFrame de
+    run_simulation o la ruta de un archivo .rtraj; las rutas son preferibles
+    con varios procesos, ya que cada trabajador lee su archivo en lugar de
+    recibir el DataFrame serializado.
+
+    workers es el número de procesos (None = todos los núcleos; 1 = en
+    serie en este proceso).
+    """
+    if not isinstance(flights, dict):
+        flights = {f"flight_{i:04d}": flight for i, flight in enumerate(flights)}
+    os.makedirs(output_dir, exist_ok=True)
+    outputs = {name: (os.path.join(output_dir, f"{name}_trajectory.png"),
+                      os.path.join(output_dir, f"{name}_series.png"))
+               for name in flights}
+    jobs = [(flight, *outputs[name]) for name, flight in flights.items()]
+    chunks = [jobs[i:i + chunksize] for i in range(0, len(jobs), chunksize)]
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = max(1, min(workers, len(chunks)))
+    if workers == 1:
+        for chunk in chunks:
+            _render_chunk(chunk, dpi)
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            list(executor.map(_render_chunk, chunks, itertools.repeat(dpi)))
+    return outputs
+
+
+def _comparison_flights(flights, color_by):
+    """
+    (trayectorias, etiquetas, valores de color o None, nombre del color).
+
+    Con un dict o una lista, color_by es una columna de las trayectorias
+    (se toma su valor inicial) o una secuencia explícita con un valor por
+    vuelo.
+    """
+    if hasattr(flights, 'columns'):
+        if 'Trajectory' not in flights:
+            raise ValueError("El DataFrame no tiene columna 'Trajectory' "
+                             "(use run_sweep(..., record='full'))")
+        if color_by is None:
+            color_by = flights.columns[0]
+        values = flights[color_by].to_numpy()
+        if np.issubdtype(values.dtype, np.number):
+            labels = [f"{color_by}={value:g}" for value in values]
+        else:
+            labels = [str(value) for value in values]
+        return list(flights['Trajectory']), labels, values, color_by
+    if isinstance(flights, dict):
+        labels = [str(name) for name in flights]
+        trajectories = list(flights.values())
+    else:
+        trajectories = list(flights)
+        labels = [f"flight_{i:04d}" for i in range(len(trajectories))]
+    values = None
+    if isinstance(color_by, str):
+        missing = [label for label, df in zip(labels, trajectories) if color_by not in df]
+        if missing:
+            raise KeyError(f"color_by={color_by!r} no es una columna de la trayectoria "
+                           f"({', '.join(missing[:3])}); pase los valores explícitos, "
+                           f"uno por vuelo")
+        values = np.array([df[color_by].iloc[0] for df in trajectories])
+    elif color_by is not None:
+        values = np.asarray(color_by)
+        if len(values) != len(trajectories):
+            raise ValueError(f"color_by tiene {len(values)} valores para "
+                             f"{len(trajectories)} vuelos")
+        color_by = ''
+    return trajectories, labels, values, color_by
+
+def _overlay(ax, segments, values, cmap, color_by, fig):
+    """Añade todas las curvas como una sola LineCollection."""
+    collection = LineCollection(segments, linewidths=1.2, alpha=0.8)
+    if values is not None and np.issubdtype(np.asarray(values).dtype, np.number):
+        collection.set_array(np.asarray(values, dtype=float))
+        collection.set_cmap(cmap)
+        fig.colorbar(collection, ax=ax, label=color_by)
+    else:
+        collection.set_color([f"C{i % 10}" for i in range(len(segments))])
+    ax.add_collection(collection, autolim=True)
+    ax.autoscale_view()
+    return collection
+
+def plot_comparison(flights, output_dir='.', prefix='comparison',
+                    metrics=('Y_Position', 'Total_Velocity'), color_by=None, highlight=None,
+                    cmap='viridis', dpi=DPI):
+    """
+    Superpone muchos vuelos: la trayectoria 2D y una serie de tiempo por
+    métrica (COMPARISON_METRICS), cada una en su propia figura.
+
+    flights es un barrido de run_sweep con columna 'Trajectory' (el color
+    sigue a la primera columna barrida, o a color_by), un dict {nombre:
+    DataFrame} o una lista de DataFrames; en estos dos casos color_by es
+    una columna de las trayectorias o una secuencia con un valor por
+    vuelo. highlight es la posición (o el nombre, con un dict) de un
+    vuelo que se dibuja destacado.
+
+    Retorna {'trajectory' o métrica: ruta del PNG} con archivos
+    <prefix>_trajectory.png y <prefix>_<métrica>.png en output_dir.
+    """
+    unknown = [metric for metric in metrics if metric not in COMPARISON_METRICS]
+    if unknown:
+        raise KeyError(f"Métricas desconocidas: {', '.join(unknown)}. "
+                       f"Opciones: {', '.join(COMPARISON_METRICS)}")
+    trajectories, labels, values, color_by = _comparison_flights(flights, color_by)
+    if isinstance(highlight, str):
+        highlight = labels.index(highlight)
+    os.makedirs(output_dir, exist_ok=True)
+
+    plots = [('trajectory', 'X_Position', 'Y_Position', 1.0,
+              'Trayectorias 2D', 'Alcance Horizontal (m)', 'Altura (m)', (12, 8))]
+    for metric in metrics:
+        title, ylabel, scale = COMPARISON_METRICS[metric]
+        plots.append((metric, 'Time', metric, scale, title, 'Tiempo (s)', ylabel, (12, 6)))
+
+    outputs = {}
+    for name, xcol, ycol, scale, title, xlabel, ylabel, figsize in plots:
+        fig = Figure(figsize=figsize)
+        FigureCanvasAgg(fig)
+        ax = fig.add_subplot()
+        # Un punto por cada dos píxeles: con muchas curvas superpuestas el
+        # costo de dibujo crece con el total de vértices
+        limit = int(figsize[0] * dpi) // 2
+        segments = []
+        for df in trajectories:
+            x = df[xcol].to_numpy()
+            y = df[ycol].to_numpy() * scale
+            keep = decimate_indices(limit, x, y)
+            segments.append(np.column_stack([x[keep], y[keep]]))
+        _overlay(ax, segments, values, cmap, color_by, fig)
+        if highlight is not None:
+            best = segments[highlight]
+            ax.plot(best[:, 0], best[:, 1], color='black', linewidth=2.5, linestyle='--',
+                    label=labels[highlight])
+            ax.legend()
+        if name == 'trajectory':
+            ax.axhline(y=0, color='green', linestyle='-', linewidth=3, alpha=0.5)
+            ax.set_aspect('equal', adjustable='datalim')
+        ax.set_title(f"{title} ({len(segments)} vuelos)", fontsize=14, fontweight='bold')
+        ax.set_xlabel(xlabel, fontsize=12)
+        ax.set_ylabel(ylabel, fontsize=12)
+        ax.grid(True, alpha=0.3)
+        # Márgenes fijos: tight_layout exigiría un dibujo adicional
+        fig.subplots_adjust(left=0.08, right=0.97, bottom=0.09, top=0.93)
+        path = os.path.join(output_dir, f"{prefix}_{name.replace(' ', '_')}.png")
+        fig.savefig(path, dpi=dpi)
+        outputs[name] = path
+    return outputs
+# -----------------------------------------------------------------------------
@@ -0,0 +1,552 @@
+# rocket.py - Interfaz de Línea de Comandos del Simulador
+# -----------------------------------------------------------------------------
+"""
+Punto de entrada único para el motor de simulación:
+
+    python rocket.py simulate   --set launch_angle_deg=60 --output vuelo.rtraj
+    python rocket.py sweep      --grid launch_angle_deg=20:85:14 --workers 4 --output barrido.csv
+    python rocket.py optimize   --bound launch_angle_deg=20:85 --metric Max_Range
+    python rocket.py montecarlo --dist p_manometric_psi=normal:70:2 -n 10000 --store resultados/
+    python rocket.py bench      --quick --only run_simulation
+    python rocket.py run        trabajos.json --workers 4 --output-dir salida/
+
+Los parámetros se dan en las unidades de enseñanza de PARAMS (psi, L, cm², g,
+grados); las claves que falten se toman de PARAMS.
+
+Sin --output el resultado se escribe como JSON en la salida estándar. Con
+--output el formato sale de la extensión: .json, .csv (la tabla del
+resultado: filas del barrido, muestras Monte Carlo, historial de la
+optimización o trayectoria) o .rtraj (trayectoria de simulate).
+
+Un archivo de trabajos (JSON, o YAML si PyYAML está instalado) describe
+muchas ejecuciones con los mismos campos que las opciones:
+
+    {"defaults": {"backend": "kernel"},
+     "jobs": [{"command": "simulate", "name": "a60", "params": {"launch_angle_deg": 60}},
+              {"command": "sweep", "grid": {"launch_angle_deg": [30, 45, 60]}},
+              {"command": "montecarlo", "distributions": {"C_D": ["normal", 0.75, 0.05]},
+               "n_samples": 5000, "seed": 1}]}
+
+En simulate, "trajectory": true (o una ruta) guarda además el vuelo completo
+como .rtraj, y "record" (p. ej. ["every", 10]) añade la trayectoria a la tabla.
+
+Con --workers N los trabajos de un solo proceso (simulate, optimize) se
+reparten en un ProcessPoolExecutor y los barridos y Monte Carlo usan N
+procesos cada uno. Con --output-dir cada trabajo deja <nombre>.json (y
+<nombre>.csv o <nombre>.rtraj) más un manifest.json; sin él, todo sale como
+un único JSON por la salida estándar. Un trabajo que falla no detiene a los
+demás: queda con "status": "error" y el proceso termina con código 1.
+
+Todas las importaciones pesadas son perezosas: `rocket --help` no carga
+pandas ni matplotlib.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+COMMANDS = ('simulate', 'sweep', 'optimize', 'montecarlo', 'bench')
+
+# Trabajos que usan un solo proceso: con --workers > 1 se reparten en el pool
+POOLED_COMMANDS = ('simulate', 'optimize')
+
+class JobError(ValueError):
+    """Trabajo o archivo de trabajos inválido."""
+
+# --- Parámetros y valores desde texto ---
+
+def _number(text):
+    try:
+        return float(text)
+    except ValueError:
+        raise JobError(f"Se esperaba un número: {text!r}") from None
+
+def _split_assignment(item):
+    key, sep, value = item.partition('=')
+    if not sep or not key:
+        raise JobError(f"Se esperaba clave=valor: {item!r}")
+    return key.strip(), value.strip()
+
+def parse_values(text):
+    """'30,45,60' → lista; 'inicio:fin:n' → n valores equiespaciados (extremos incluidos)."""
+    if ':' in text:
+        parts = text.split(':')
+        if len(parts) != 3:
+            raise JobError(f"Rango inválido {text!r}: use inicio:fin:n")
+        start, stop, num = (_number(part) for part in parts)
+        if num < 1 or num != int(num):
+            raise JobError(f"Número de valores inválido en {text!r}")
+        num = int(num)
+        if num == 1:
+            return [start]
+        return [start + (stop - start) * i / (num - 1) for i in range(num)]
+    return [_number(part) for part in text.split(',') if part]
+
+def parse_bound(text):
+    """'mín:máx' → [mín, máx]."""
+    parts = text.split(':')
+    if len(parts) != 2:
+        raise JobError(f"Límites inválidos {text!r}: use mín:máx")
+    return [_number(part) for part in parts]
+
+def parse_distribution(text):
+    """'70' → constante; 'normal:70:2' → ('normal', 70, 2) (ver analysis.montecarlo._draw)."""
+    kind, *args = text.split(':')
+    if not args:
+        return _number(kind)
+    return [kind, *(_number(arg) for arg in args)]
+
+def base_params(overrides=None):
+    """PARAMS con overrides en unidades de enseñanza (valida claves y valores)."""
+    from utils.parameters import PARAMS
+
+    overrides = overrides or {}
+    if not isinstance(overrides, dict):
+        raise JobError("'params' debe ser un objeto {clave: valor}")
+    _check_keys(overrides)
+    params = PARAMS.copy()
+    try:
+        params.update({key: float(value) for key, value in overrides.items()})
+    except (TypeError, ValueError):
+        raise JobError("Los valores de los parámetros deben ser números") from None
+    return params
+
+def _check_keys(mapping, extra=()):
+    from utils.parameters import PARAMS
+
+    unknown = [key for key in mapping if key not in PARAMS and key not in extra]
+    if unknown:
+        raise JobError(f"Claves de parámetros desconocidas: {', '.join(unknown)}")
+
+def _si_params(overrides):
+    """Parámetros SI completos de un vuelo (las claves SI dadas prevalecen)."""
+    from utils.parameters import SI_KEYS, convert_to_si, physical_mask
+
+    params = convert_to_si(base_params(overrides))
+    params.update({key: float(value) for key, value in (overrides or {}).items()
+                   if key in SI_KEYS})
+    if not physical_mask(params):
+        raise JobError("Parámetros fuera de los límites físicos")
+    return params
+
+def _record_policy(record):
+    """Política de registro desde JSON/texto: "full", ["every", 10], {"every": 10}..."""
+    from utils.recorder import make_recorder
+
+    if isinstance(record, dict) and len(record) == 1:
+        record = next(iter(record.items()))
+    elif isinstance(record, list):
+        record = tuple(record)
+    elif isinstance(record, str) and ':' in record:
+        kind, value = record.split(':', 1)
+        record = (kind, _number(value))
+    try:
+        make_recorder(record)
+    except (ValueError, TypeError):
+        raise JobError(f"Política de registro desconocida: {record!r}") from None
+    return record
+
+# --- Ejecución de trabajos (funciones de módulo: deben poder serializarse) ---
+
+def _simulate(job):
+    from main_simulation import RUN_CHUNK, iter_simulation, run_simulation
+    from utils.recorder import SummaryRecorder, make_recorder
+
+    params = _si_params(job.get('params'))
+    integrator = job.get('integrator', 'euler')
+    backend = job.get('backend', 'kernel')
+    record = _record_policy(job.get('record', 'summary'))
+    result = {'params': job.get('params') or {}}
+    trajectory = job.get('trajectory')
+    if trajectory:
+        # El archivo .rtraj guarda el vuelo completo; el resumen sale del escritor
+        summary = run_simulation(params, integrator=integrator, record='summary',
+                                 verbose=False, backend=backend, output=trajectory)
+        return {**result, 'summary': summary.as_row(), 'trajectory': trajectory}
+    if record == 'summary':
+        summary = run_simulation(params, integrator=integrator, record='summary',
+                                 verbose=False, backend=backend)
+        return {**result, 'summary': summary.as_row()}
+    summary, recorder = SummaryRecorder(), make_recorder(record)
+    for data, phase in iter_simulation(params, RUN_CHUNK, integrator, None, backend):
+        summary.extend(data, phase)
+        recorder.extend(data, phase)
+    return {**result, 'summary': summary.summary().as_row(), 'table': recorder.result()}
+
+def _sweep(job, workers):
+    from analysis.sweep import run_sweep
+
+    grid = job.get('grid')
+    if not isinstance(grid, dict) or not grid:
+        raise JobError("'grid' debe ser un objeto {clave: [valores]} no vacío")
+    _check_keys(grid)
+    store = _open_store(job)
+    df = run_sweep({key: list(values) for key, values in grid.items()},
+                   base_params=base_params(job.get('base')), workers=workers,
+                   chunksize=job.get('chunksize'), integrator=job.get('integrator', 'euler'),
+                   verbose=False, backend=job.get('backend', 'kernel'), store=store)
+    result = {key: df.attrs[key] for key in ('runs', 'workers', 'elapsed_s', 'runs_per_s')}
+    if 'sweep_id' in df.attrs:
+        result['sweep_id'] = df.attrs['sweep_id']
+    return {**result, 'table': df}
+
+def _optimize(job):
+    from analysis.optimize import max_fill_ratio, max_pressure, optimize
+
+    bounds = job.get('bounds')
+    if not isinstance(bounds, dict) or not bounds:
+        raise JobError("'bounds' debe ser un objeto {clave: [mín, máx]} no vacío")
+    _check_keys(bounds)
+    constraints = []
+    if job.get('max_pressure_psi') is not None:
+        constraints.append(max_pressure(float(job['max_pressure_psi'])))
+    if job.get('max_fill_ratio') is not None:
+        constraints.append(max_fill_ratio(float(job['max_fill_ratio'])))
+    result = optimize({key: tuple(map(float, bound)) for key, bound in bounds.items()},
+                      metric=job.get('metric', 'Max_Range'), target=job.get('target'),
+                      base_params=base_params(job.get('base')), constraints=constraints,
+                      method=job.get('method'), xtol=job.get('xtol', 1e-3),
+                      max_evals=job.get('max_evals', 200),
+                      backend=job.get('backend', 'kernel'), verbose=False)
+    return {'params': result.params, 'value': result.value, 'summary': result.summary,
+            'evaluations': result.evaluations, 'calls': result.calls,
+            'method': result.method, 'table': result.history}
+
+def _montecarlo(job, workers):
+    from analysis.montecarlo import CHUNK_SIZE, run_montecarlo
+
+    distributions = job.get('distributions')
+    if not isinstance(distributions, dict) or not distributions:
+        raise JobError("'distributions' debe ser un objeto {clave: distribución} no vacío")
+    _check_keys(distributions, extra=('azimuth_deg',))
+    store = _open_store(job)
+    result = run_montecarlo(distributions, int(job.get('n_samples', 1000)),
+                            seed=job.get('seed', 0), base_params=base_params(job.get('base')),
+                            workers=workers, chunk_size=job.get('chunk_size', CHUNK_SIZE),
+                            confidence=job.get('confidence', 0.95), verbose=False,
+                            store=store)
+    output = {
+        'runs': len(result.samples),
+        'excluded': result.excluded,
+        'runs_per_s': result.runs_per_s,
+        'percentiles': result.percentiles.to_dict('index'),
+        'downrange': result.downrange,
+        'ellipse': result.ellipse,
+        'sensitivity': result.sensitivity.to_dict('index'),
+    }
+    if 'sweep_id' in result.samples.attrs:
+        output['sweep_id'] = result.samples.attrs['sweep_id']
+    return {**output, 'table': result.samples}
+
+def _bench(job):
+    from benchmarks.suite import check_budgets, run_suite
+
+    results = run_suite(quick=job.get('quick', True), only=job.get('only'))
+    return {**results, 'budget_problems': check_budgets(results)}
+
+def _open_store(job):
+    if not job.get('store'):
+        return None
+    from utils.results_store import ResultsStore
+    return ResultsStore(job['store'], partition_by=tuple(job.get('partition_by', ())))
+
+def execute(job, workers=1):
+    """
+    Ejecuta un trabajo ({'command': ..., opciones}) y retorna un dict
+    serializable; 'table' (si existe) es la tabla del resultado.
+    """
+    command = job.get('command')
+    if command == 'simulate':
+        return _simulate(job)
+    if command == 'sweep':
+        return _sweep(job, workers)
+    if command == 'optimize':
+        return _optimize(job)
+    if command == 'montecarlo':
+        return _montecarlo(job, workers)
+    if command == 'bench':
+        return _bench(job)
+    raise JobError(f"Comando desconocido: {command!r}. Opciones: {', '.join(COMMANDS)}")
+
+def _run_job(job, workers=1):
+    """execute con captura de errores: retorna (estado, resultado o mensaje, segundos)."""
+    start = time.perf_counter()
+    try:
+        result = execute(job, workers)
+    except (ValueError, KeyError, TypeError, OSError) as error:
+        message = error.args[0] if isinstance(error, KeyError) and error.args else str(error)
+        return 'error', message, time.perf_counter() - start
+    return 'ok', result, time.perf_counter() - start
+
+# --- Archivos de trabajos ---
+
+def load_jobs(path):
+    """
+    Lee un archivo de trabajos: una lista de trabajos o {'defaults': {...},
+    'jobs': [...]}. Los defaults se aplican a cada trabajo y cada uno recibe
+    un nombre único (por defecto '<índice>-<comando>').
+    """
+    with open(path, encoding='utf-8') as f:
+        text = f.read()
+    if os.path.splitext(path)[1].lower() in ('.yaml', '.yml'):
+        try:
+            import yaml
+        except ImportError:
+            raise JobError("Los archivos YAML necesitan PyYAML (pip install pyyaml); "
+                           "use JSON en su lugar") from None
+        spec = yaml.safe_load(text)
+    else:
+        try:
+            spec = json.loads(text)
+        except json.JSONDecodeError as error:
+            raise JobError(f"JSON inválido en {path}: {error}") from None
+
+    defaults = {}
+    if isinstance(spec, dict):
+        defaults = spec.get('defaults') or {}
+        spec = spec.get('jobs')
+    if not isinstance(spec, list) or not all(isinstance(job, dict) for job in spec):
+        raise JobError("El archivo de trabajos debe contener una lista de objetos en 'jobs'")
+
+    jobs = []
+    names = set()
+    for i, job in enumerate(spec):
+        job = {**defaults, **job}
+        if job.get('command') not in COMMANDS:
+            raise JobError(f"Trabajo {i}: comando desconocido {job.get('command')!r}")
+        name = str(job.get('name') or f"{i:03d}-{job['command']}")
+        if name in names or os.sep in name:
+            raise JobError(f"Trabajo {i}: nombre repetido o inválido {name!r}")
+        names.add(name)
+        jobs.append({**job, 'name': name})
+    return jobs
+
+def run_jobs(jobs, workers=1, output_dir=None):
+    """
+    Ejecuta los trabajos y retorna el manifiesto (una entrada por trabajo,
+    en el orden del archivo). Con output_dir los resultados se escriben en
+    archivos y el manifiesto en manifest.json; sin él, cada entrada lleva su
+    resultado completo.
+    """
+    if output_dir is not None:
+        os.makedirs(output_dir, exist_ok=True)
+    for job in jobs:
+        # "trajectory": true → <nombre>.rtraj en el directorio de salida
+        if job['command'] == 'simulate' and job.get('trajectory') is True:
+            job['trajectory'] = os.path.join(output_dir or '.', f"{job['name']}.rtraj")
+
+    outcomes = {}
+    pooled = [job for job in jobs if job['command'] in POOLED_COMMANDS]
+    executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 and pooled else None
+    try:
+        futures = {}
+        if executor is not None:
+            futures = {job['name']: executor.submit(_run_job, job) for job in pooled}
+        # Barridos y Monte Carlo reparten su propio trabajo entre workers procesos
+        for job in jobs:
+            if job['name'] not in futures:
+                outcomes[job['name']] = _run_job(job, workers)
+        for name, future in futures.items():
+            outcomes[name] = future.result()
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    manifest = []
+    for job in jobs:
+        status, result, elapsed = outcomes[job['name']]
+        entry = {'name': job['name'], 'command': job['command'], 'status': status,
+                 'elapsed_s': elapsed}
+        if status == 'error':
+            entry['error'] = result
+        elif output_dir is None:
+            entry['result'] = result
+        else:
+            entry['outputs'] = write_result(result, os.path.join(output_dir, job['name']))
+        manifest.append(entry)
+    if output_dir is not None:
+        write_json(manifest, os.path.join(output_dir, 'manifest.json'))
+    return manifest
+
+# --- Salida legible por máquina ---
+
+def _json_default(obj):
+    """Conversión de tipos de NumPy/pandas para json.dump."""
+    import numpy as np
+
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if hasattr(obj, 'to_dict'):
+        # DataFrame: lista de registros (la fase como texto)
+        return obj.to_dict('records')
+    raise TypeError(f"Objeto no serializable: {type(obj).__name__}")
+
+def dump_json(obj, stream):
+    json.dump(obj, stream, indent=2, default=_json_default)
+    stream.write('\n')
+
+def write_json(obj, path):
+    with open(path, 'w', encoding='utf-8') as f:
+        dump_json(obj, f)
+    return path
+
+def _table_frame(table):
+    if hasattr(table, 'to_csv'):
+        return table.drop(columns='Trajectory', errors='ignore')
+    import pandas as pd
+    return pd.DataFrame(table)
+
+def write_result(result, stem):
+    """
+    Escribe <stem>.json con el resultado (sin la tabla) y <stem>.csv con la
+    tabla, si la hay. Retorna la lista de archivos escritos (la trayectoria
+    .rtraj de simulate ya está en disco y se incluye).
+    """
+    outputs = []
+    result = dict(result)
+    table = result.pop('table', None)
+    if table is not None:
+        path = f"{stem}.csv"
+        _table_frame(table).to_csv(path, index=False)
+        result['table'] = os.path.basename(path)
+        outputs.append(path)
+    outputs.insert(0, write_json(result, f"{stem}.json"))
+    if result.get('trajectory'):
+        outputs.append(result['trajectory'])
+    return outputs
+
+def emit(result, output=None):
+    """Salida de un subcomando: JSON por stdout o el archivo output (.json, .csv, .rtraj)."""
+    if output is None:
+        dump_json(result, sys.stdout)
+        return
+    extension = os.path.splitext(output)[1].lower()
+    if extension == '.csv':
+        if result.get('table') is None:
+            raise JobError("Este resultado no tiene tabla: use --record o una salida .json")
+        _table_frame(result['table']).to_csv(output, index=False)
+    elif extension == '.json':
+        write_json(result, output)
+    elif extension != '.rtraj' or not result.get('trajectory'):
+        raise JobError(f"Formato de salida no válido aquí: {output!r} (.json, .csv; "
+                       ".rtraj solo con simulate)")
+
+# --- Línea de comandos ---
+
+def _assignments(items, parse):
+    values = {}
+    for item in items:
+        key, value = _split_assignment(item)
+        values[key] = parse(value)
+    return values
+
+def _common(parser, workers=True):
+    parser.add_argument('--set', action='append', default=[], metavar='CLAVE=VALOR',
+                        help="Parámetro base en unidades de enseñanza (repetible)")
+    parser.add_argument('--backend', default='kernel',
+                        choices=('numpy', 'kernel', 'table', 'numba'))
+    parser.add_argument('--output', help="Archivo de salida (.json, .csv o .rtraj)")
+    if workers:
+        parser.add_argument('--workers', type=int, default=None,
+                            help="Procesos (por defecto, todos los núcleos)")
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='rocket', description="Simulador de cohete de agua")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    simulate = commands.add_parser('simulate', help="Un vuelo")
+    _common(simulate, workers=False)
+    simulate.add_argument('--integrator', default='euler', choices=('euler', 'dopri5'))
+    simulate.add_argument('--record', default='summary',
+                          help="summary, full, transitions, every:N o interval:DT")
+
+    sweep = commands.add_parser('sweep', help="Barrido de parámetros (producto cartesiano)")
+    _common(sweep)
+    sweep.add_argument('--grid', action='append', required=True, metavar='CLAVE=VALORES',
+                       help="Valores barridos: a,b,c o inicio:fin:n (repetible)")
+    sweep.add_argument('--store', help="Directorio de un ResultsStore donde guardar las filas")
+
+    optimize = commands.add_parser('optimize', help="Optimización de parámetros")
+    _common(optimize, workers=False)
+    optimize.add_argument('--bound', action='append', required=True, metavar='CLAVE=MÍN:MÁX',
+                          help="Variable a optimizar y sus límites (repetible)")
+    optimize.add_argument('--metric', default='Max_Range')
+    optimize.add_argument('--target', type=float, help="Buscar metric == target")
+    optimize.add_argument('--method', choices=('brent', 'nelder-mead'))
+    optimize.add_argument('--max-evals', type=int, default=200)
+    optimize.add_argument('--max-pressure-psi', type=float)
+    optimize.add_argument('--max-fill-ratio', type=float)
+
+    montecarlo = commands.add_parser('montecarlo', help="Dispersión Monte Carlo")
+    _common(montecarlo)
+    montecarlo.add_argument('--dist', action='append', required=True, metavar='CLAVE=DIST',
+                            help="valor, normal:media:sigma, uniform:mín:máx, "
+                                 "triangular:mín:moda:máx o lognormal:mu:sigma (repetible)")
+    montecarlo.add_argument('-n', '--samples', type=int, default=1000)
+    montecarlo.add_argument('--seed', type=int, default=0)
+    montecarlo.add_argument('--store',
+                            help="Directorio de un ResultsStore donde guardar las muestras")
+
+    bench = commands.add_parser('bench', help="Suite de rendimiento (opciones de benchmarks.suite)")
+    bench.add_argument('args', nargs=argparse.REMAINDER)
+
+    run = commands.add_parser('run', help="Archivo de trabajos JSON/YAML")
+    run.add_argument('jobs', help="Archivo de trabajos")
+    run.add_argument('--workers', type=int, default=1,
+                     help="Procesos para repartir los trabajos y para cada barrido")
+    run.add_argument('--output-dir', help="Directorio de resultados (más manifest.json)")
+    return parser
+
+def _job_from_args(args):
+    """Convierte las opciones de un subcomando en un trabajo de execute."""
+    job = {'command': args.command, 'backend': args.backend}
+    if args.command == 'simulate':
+        job.update(params=_assignments(args.set, _number), integrator=args.integrator,
+                   record=args.record)
+        if args.output and args.output.lower().endswith('.rtraj'):
+            job['trajectory'] = args.output
+        return job
+    job['base'] = _assignments(args.set, _number)
+    if args.command == 'sweep':
+        job.update(grid=_assignments(args.grid, parse_values), store=args.store)
+    elif args.command == 'optimize':
+        job.update(bounds=_assignments(args.bound, parse_bound), metric=args.metric,
+                   target=args.target, method=args.method, max_evals=args.max_evals,
+                   max_pressure_psi=args.max_pressure_psi, max_fill_ratio=args.max_fill_ratio)
+    elif args.command == 'montecarlo':
+        job.update(distributions=_assignments(args.dist, parse_distribution),
+                   n_samples=args.samples, seed=args.seed, store=args.store)
+    return job
+
+def main(argv=None):
+    """Ejecuta la línea de comandos. Retorna el código de salida (0 = éxito)."""
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    if args.command == 'bench':
+        from benchmarks.suite import main as bench_main
+        return bench_main(args.args)
+
+    try:
+        if args.command == 'run':
+            manifest = run_jobs(load_jobs(args.jobs), max(1, args.workers), args.output_dir)
+            dump_json(manifest if args.output_dir else {'jobs': manifest}, sys.stdout)
+            return 1 if any(entry['status'] == 'error' for entry in manifest) else 0
+        job = _job_from_args(args)
+        result = execute(job, getattr(args, 'workers', 1))
+        emit(result, args.output)
+    except JobError as error:
+        print(f"rocket: error: {error}", file=sys.stderr)
+        return 2
+    except (ValueError, KeyError, OSError) as error:
+        print(f"rocket: error: {error}", file=sys.stderr)
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
+# -----------------------------------------------------------------------------
@@ -1,83 +1,637 @@
 # start_web_server.py - Inicia el servidor web para la aplicación
 # -----------------------------------------------------------------------------
 """
-Script para iniciar un servidor HTTP simple que sirve la aplicación web.
-Abre automáticamente el navegador en la dirección correcta.
+Script para iniciar el servidor HTTP de la aplicación web: sirve los archivos
+de web_app/ y expone el motor de Python como API JSON, de modo que todos los
+clientes usan la misma física (la de este repositorio).
+
+- POST /api/simulate  {"params": {...}, "record": "summary", "backend": "kernel"}
+- POST /api/sweep     {"grid": {"launch_angle_deg": [30, 45, 60]}, "base": {...}}
+- GET  /api/stream?launch_angle_deg=60&every=10&speed=1
+                      server-sent events con la trayectoria en vivo
+- GET  /api/stats     contadores de la caché y de los lotes
+
+Los parámetros se dan en las unidades de enseñanza de PARAMS (psi, L, cm², g,
+grados); las claves que falten se toman de PARAMS.
+
+Cada petición se atiende en su propio hilo (ThreadingHTTPServer) y las
+simulaciones se ejecutan en un ProcessPoolExecutor, así los archivos estáticos
+nunca esperan a la física. Las peticiones de solo resumen que llegan casi a la
+vez se agrupan en un único lote de run_simulation_batch; las peticiones
+idénticas en curso comparten el mismo resultado, y los resultados se guardan
+en una ResultCache. Cada petición tiene un tiempo máximo (504 si se supera).
+
+/api/stream transmite cuadros decimados al ritmo del vuelo real (speed > 1:
+más rápido; speed=0: sin pausas). Los espectadores del mismo lanzamiento
+comparten el vuelo guardado, y un cliente lento recibe cuadros más
+espaciados en lugar de acumular memoria en el servidor.
 """
 
+import argparse
+import functools
+import hashlib
 import http.server
-import socketserver
-import webbrowser
+import json
 import os
 import sys
+import threading
+import time
+import webbrowser
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor
 from pathlib import Path
+from urllib.parse import parse_qs, urlsplit
 
 # Configuración
 PORT = 8000
 WEB_APP_DIR = Path(__file__).parent / "web_app"
 
-def start_server():
+# Tiempo máximo por petición [s]
+REQUEST_TIMEOUT = 30.0
+
+# Agrupación de peticiones de resumen: ventana de espera [s] y tamaño máximo
+BATCH_WINDOW = 0.005
+BATCH_MAX = 512
+
+# Vuelos por trabajo de un barrido y límite de vuelos por petición
+SWEEP_CHUNK = 2000
+MAX_SWEEP_RUNS = 200_000
+
+# Barridos completos guardados (respuestas) y tamaño máximo del cuerpo [bytes]
+SWEEP_CACHE_SIZE = 64
+MAX_BODY = 1024**2
+
+# Backend por defecto de las trayectorias (núcleo escalar: mismo resultado, más rápido)
+DEFAULT_BACKEND = 'kernel'
+
+# Transmisión en vivo: decimación por defecto, cuadros por segundo, muestras
+# máximas por cuadro y tiempo máximo de bloqueo al escribir a un cliente [s]
+STREAM_EVERY = 10
+STREAM_FPS = 30.0
+MAX_FRAME_SAMPLES = 64
+STREAM_WRITE_TIMEOUT = 10.0
+
+class RequestError(ValueError):
+    """Petición inválida (se responde con 400)."""
+
+def build_params(overrides, base=None):
+    """
+    Parámetros SI completos: base (PARAMS) + overrides en unidades de
+    enseñanza (las claves SI, si se dan, prevalecen sobre la conversión).
+    """
+    from utils.parameters import PARAMS, SI_KEYS, convert_to_si, physical_mask
+
+    base = PARAMS if base is None else base
+    if not isinstance(overrides, dict):
+        raise RequestError("'params' debe ser un objeto JSON")
+    unknown = [key for key in overrides if key not in base]
+    if unknown:
+        raise RequestError(f"Claves de parámetros desconocidas: {', '.join(unknown)}")
+    try:
+        values = {key: float(value) for key, value in overrides.items()}
+    except (TypeError, ValueError):
+        raise RequestError("Los valores de los parámetros deben ser números") from None
+    params = base.copy()
+    params.update({k: v for k, v in values.items() if k not in SI_KEYS})
+    params = convert_to_si(params)
+    params.update({k: v for k, v in values.items() if k in SI_KEYS})
+    if not physical_mask(params):
+        raise RequestError("Parámetros fuera de los límites físicos")
+    return params
+
+def parse_backend(backend):
+    """Backend de run_simulation pedido por el cliente."""
+    if backend not in ('numpy', 'kernel', 'table', 'numba'):
+        raise RequestError(f"Backend desconocido: {backend!r}")
+    return backend
+
+def parse_record(record):
+    """Política de registro desde JSON: "summary", "full", {"every": N}..."""
+    if isinstance(record, dict) and len(record) == 1:
+        record = next(iter(record.items()))
+    elif isinstance(record, list):
+        record = tuple(record)
+    from utils.recorder import make_recorder
+    try:
+        make_recorder(record)
+    except (ValueError, TypeError):
+        raise RequestError(f"Política de registro desconocida: {record!r}") from None
+    return record
+
+# --- Trabajos de los procesos (funciones de módulo: deben poder serializarse) ---
+
+def _trajectory_job(params, record, backend):
+    """Un vuelo con trayectoria. Retorna (data, phase) en el orden de COLUMNS."""
+    import numpy as np
+    from main_simulation import run_simulation
+    from utils.recorder import COLUMNS
+
+    result = run_simulation(params, record=record, verbose=False, backend=backend)
+    data = np.array([result[name].to_numpy() for name in COLUMNS])
+    return data, result['Phase'].cat.codes.to_numpy()
+
+def _summary_batch_job(configs):
+    """Resúmenes de varios vuelos con el motor vectorizado (una fila por vuelo)."""
+    import pandas as pd
+    from main_simulation import run_simulation_batch
+    return run_simulation_batch(pd.DataFrame(configs)).to_dict('records')
+
+def _sweep_job(configs):
+    """Bloque de un barrido: métricas de resumen con el motor vectorizado."""
+    return _summary_batch_job(configs)
+
+def trajectory_frames(result, speed=1.0, fps=STREAM_FPS, max_samples=MAX_FRAME_SAMPLES,
+                      clock=time.monotonic, sleep=time.sleep):
+    """
+    Cuadros de una trayectoria ya calculada, al ritmo del vuelo real
+    multiplicado por speed (speed=0: sin pausas, lo más rápido posible).
+
+    Cada cuadro es un dict {'index': primera muestra, columna: [valores]}
+    con las muestras cuyo tiempo ya transcurrió. Como el generador solo
+    avanza cuando el cliente acepta el cuadro anterior, un cliente lento
+    recibe cuadros más espaciados y decimados (como máximo max_samples
+    muestras, incluida siempre la última) en lugar de acumular una cola.
+    """
+    import numpy as np
+
+    times = result['Time'].to_numpy()
+    columns = {name: result[name].to_numpy() for name in result.columns if name != 'Phase'}
+    phases = result['Phase'].astype(str).to_numpy()
+    n = len(times)
+    start = clock()
+    sent = 0
+    while sent < n:
+        if speed > 0:
+            due = int(np.searchsorted(times, (clock() - start) * speed, side='right'))
+            end = min(n, max(due, sent + 1))
+        else:
+            end = min(n, sent + max_samples)
+        index = np.arange(sent, end)
+        if index.size > max_samples:
+            # Cliente atrasado: se envía un resumen decimado del tramo pendiente
+            index = index[np.linspace(0, index.size - 1, max_samples).round().astype(int)]
+        frame = {'index': sent}
+        frame.update({name: values[index].tolist() for name, values in columns.items()})
+        frame['Phase'] = phases[index].tolist()
+        yield frame
+        sent = end
+        if speed > 0 and sent < n:
+            sleep(max(1.0 / fps, times[sent] / speed - (clock() - start)))
+
+class SummaryBatcher:
+    """
+    Agrupa peticiones de solo resumen: las que llegan dentro de BATCH_WINDOW
+    (o hasta BATCH_MAX) se simulan juntas en un trabajo de run_simulation_batch.
+    submit retorna un Future con la fila de métricas del vuelo.
+    """
+
+    def __init__(self, executor, window=BATCH_WINDOW, max_size=BATCH_MAX):
+        self.executor = executor
+        self.window = window
+        self.max_size = max_size
+        self.batches = 0
+        self._pending = []
+        self._timer = None
+        self._lock = threading.Lock()
+
+    def submit(self, params):
+        future = Future()
+        with self._lock:
+            self._pending.append((params, future))
+            if len(self._pending) >= self.max_size:
+                batch = self._take()
+            else:
+                batch = None
+                if self._timer is None:
+                    self._timer = threading.Timer(self.window, self.flush)
+                    self._timer.daemon = True
+                    self._timer.start()
+        if batch:
+            self._dispatch(batch)
+        return future
+
+    def _take(self):
+        """Extrae las peticiones pendientes (se llama con el lock tomado)."""
+        batch, self._pending = self._pending, []
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        return batch
+
+    def flush(self):
+        with self._lock:
+            batch = self._take()
+        if batch:
+            self._dispatch(batch)
+
+    def _dispatch(self, batch):
+        self.batches += 1
+        futures = [future for _, future in batch]
+        try:
+            job = self.executor.submit(_summary_batch_job, [params for params, _ in batch])
+        except Exception as e:
+            for future in futures:
+                future.set_exception(e)
+            return
+
+        def deliver(job):
+            error = job.exception()
+            for i, future in enumerate(futures):
+                if future.cancelled():
+                    continue
+                if error is not None:
+                    future.set_exception(error)
+                else:
+                    future.set_result(job.result()[i])
+        job.add_done_callback(deliver)
+
+class SimulationService:
+    """
+    Motor compartido por todas las peticiones: pool de procesos, agrupador
+    de resúmenes, ResultCache de vuelos y LRU de barridos completos.
+    """
+
+    def __init__(self, workers=None, timeout=REQUEST_TIMEOUT, cache=None):
+        from utils.cache import ResultCache
+
+        self.timeout = timeout
+        self.executor = ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1)
+        self.batcher = SummaryBatcher(self.executor)
+        self.cache = ResultCache() if cache is None else cache
+        self.requests = 0
+        self.coalesced = 0
+        self.active_streams = 0
+        self._inflight = {}
+        self._sweeps = OrderedDict()
+        self._lock = threading.Lock()
+
+    def close(self):
+        self.batcher.flush()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def _shared(self, key, start):
+        """
+        Future compartido por las peticiones idénticas en curso: solo la
+        primera llama a start() para lanzar el trabajo.
+        """
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is not None:
+                self.coalesced += 1
+                return future
+            future = start()
+            self._inflight[key] = future
+        future.add_done_callback(lambda _: self._forget(key))
+        return future
+
+    def _count(self, name, delta=1):
+        """Suma delta al contador name bajo el candado."""
+        with self._lock:
+            setattr(self, name, getattr(self, name) + delta)
+
+    def _forget(self, key):
+        with self._lock:
+            self._inflight.pop(key, None)
+
+    def _wait(self, future, deadline=None):
+        """
+        Resultado del trabajo dentro del tiempo máximo de la petición. Los
+        trabajos compartidos no se cancelan: otras peticiones pueden esperarlos.
+        """
+        timeout = self.timeout if deadline is None else max(0.0, deadline - time.monotonic())
+        try:
+            return future.result(timeout=timeout)
+        except TimeoutError:
+            raise TimeoutError(f"La simulación superó el tiempo máximo de {self.timeout:g} s")
+
+    def simulate(self, body):
+        """POST /api/simulate: un vuelo (resumen o trayectoria)."""
+        self._count('requests')
+        params = build_params(body.get('params', {}))
+        record = parse_record(body.get('record', 'summary'))
+        backend = parse_backend(body.get('backend', DEFAULT_BACKEND))
+        result, summary, cached = self.flight(params, record, backend)
+        return self._response(result, summary, cached=cached, batched=record == 'summary')
+
+    def flight(self, params, record, backend):
+        """
+        Un vuelo desde la caché, desde una petición idéntica en curso o
+        simulado en el pool. Retorna (resultado, resumen, cached).
+        """
+        from utils.parameters import compile_params
+        from utils.cache import cache_key
+        from utils.recorder import SummaryRecorder, TrajectoryRecorder, FlightSummary
+
+        # Los resúmenes agrupados usan el motor vectorizado (misma física que 'numpy')
+        batched = record == 'summary'
+        key = cache_key(compile_params(params), 'euler', None, record,
+                        'batch' if batched else backend)
+        found = self.cache.lookup(key)
+        if found is not None:
+            result, summary, _ = found
+            return result, summary, True
+
+        if batched:
+            row = self._wait(self._shared(key, lambda: self.batcher.submit(params)))
+            summary = FlightSummary(row['Max_Height'], row['Max_Range'], row['Max_Velocity'],
+                                    row['Burnout_Time'], row['Flight_Time'])
+            recorder = SummaryRecorder()
+            recorder.absorb(summary)
+        else:
+            data, phase = self._wait(self._shared(key, lambda: self.executor.submit(
+                _trajectory_job, params, record, backend)))
+            recorder = TrajectoryRecorder(capacity=max(1, data.shape[1]))
+            recorder.extend(data, phase)
+        self.cache.put(key, recorder)
+        return recorder.result(), recorder.summary(), False
+
+    @staticmethod
+    def _response(result, summary, cached, batched):
+        payload = {'summary': summary.as_row(), 'cached': cached, 'batched': batched}
+        if not isinstance(result, tuple):
+            trajectory = {name: result[name].tolist() for name in result.columns
+                          if name != 'Phase'}
+            trajectory['Phase'] = result['Phase'].astype(str).tolist()
+            payload['trajectory'] = trajectory
+        return payload
+
+    def sweep(self, body):
+        """POST /api/sweep: barrido cartesiano con el motor vectorizado."""
+        import pandas as pd
+        from analysis.sweep import parameter_grid
+        from utils.cache import physics_fingerprint
+        from utils.parameters import physical_mask
+
+        self._count('requests')
+        grid = body.get('grid')
+        if not isinstance(grid, dict) or not grid:
+            raise RequestError("'grid' debe ser un objeto {clave: [valores]}")
+        if not all(isinstance(values, list) and values for values in grid.values()):
+            raise RequestError("Cada clave de 'grid' necesita una lista de valores")
+        try:
+            grid = {key: [float(v) for v in values] for key, values in grid.items()}
+        except (TypeError, ValueError):
+            raise RequestError("Los valores de 'grid' deben ser números") from None
+        n_runs = 1
+        for values in grid.values():
+            n_runs *= len(values)
+        if n_runs > MAX_SWEEP_RUNS:
+            raise RequestError(f"Barrido demasiado grande: {n_runs} vuelos "
+                               f"(máximo {MAX_SWEEP_RUNS})")
+
+        canonical = json.dumps({'grid': grid, 'base': body.get('base', {})}, sort_keys=True)
+        key = hashlib.sha256((physics_fingerprint() + canonical).encode()).hexdigest()
+        with self._lock:
+            if key in self._sweeps:
+                self._sweeps.move_to_end(key)
+                return {**self._sweeps[key], 'cached': True}
+
+        base = build_params(body.get('base', {}))
+        try:
+            rows, configs = parameter_grid(grid, base)
+        except KeyError as e:
+            raise RequestError(str(e.args[0])) from None
+        invalid = int((~physical_mask(pd.DataFrame(configs))).sum())
+        if invalid:
+            raise RequestError(f"{invalid} combinaciones fuera de los límites físicos")
+
+        deadline = time.monotonic() + self.timeout
+        jobs = [self.executor.submit(_sweep_job, configs[i:i + SWEEP_CHUNK])
+                for i in range(0, len(configs), SWEEP_CHUNK)]
+        metrics = []
+        try:
+            for job in jobs:
+                metrics.extend(self._wait(job, deadline))
+        except TimeoutError:
+            for job in jobs:
+                job.cancel()
+            raise
+        results = [{**row, **metric} for row, metric in zip(rows, metrics)]
+
+        payload = {'runs': len(results), 'results': results}
+        with self._lock:
+            self._sweeps[key] = payload
+            while len(self._sweeps) > SWEEP_CACHE_SIZE:
+                self._sweeps.popitem(last=False)
+        return {**payload, 'cached': False}
+
+    def stream(self, query):
+        """
+        GET /api/stream: prepara la transmisión de un vuelo. Los espectadores
+        del mismo lanzamiento comparten una sola simulación (caché y
+        peticiones en curso). Retorna (evento inicial, generador de cuadros).
+        """
+        self._count('requests')
+        options = {'every': STREAM_EVERY, 'speed': 1.0, 'fps': STREAM_FPS,
+                   'backend': DEFAULT_BACKEND}
+        overrides = {}
+        for key, values in query.items():
+            if key in options:
+                options[key] = values[-1]
+            else:
+                overrides[key] = values[-1]
+        try:
+            every = int(options['every'])
+            speed = float(options['speed'])
+            fps = float(options['fps'])
+        except ValueError:
+            raise RequestError("every, speed y fps deben ser números") from None
+        if every < 1 or speed < 0 or fps <= 0:
+            raise RequestError("Se requiere every >= 1, speed >= 0 y fps > 0")
+
+        params = build_params(overrides)
+        result, summary, cached = self.flight(params, ('every', every),
+                                              parse_backend(options['backend']))
+        start = {'summary': summary.as_row(), 'cached': cached, 'samples': len(result),
+                 'speed': speed}
+        return start, trajectory_frames(result, speed, fps)
+
+    def stats(self):
+        """GET /api/stats: contadores del servicio."""
+        return {'requests': self.requests, 'coalesced': self.coalesced,
+                'batches': self.batcher.batches, 'cache_hits': self.cache.hits,
+                'cache_misses': self.cache.misses, 'cached_flights': len(self.cache),
+                'cached_sweeps': len(self._sweeps), 'active_streams': self.active_streams}
+
+class SimulationHandler(http.server.SimpleHTTPRequestHandler):
+    """Archivos estáticos de web_app/ más las rutas /api/ del servicio."""
+
+    service = None
+    quiet = False
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        if url.path == '/api/stats':
+            self._send_json(200, self.service.stats())
+        elif url.path == '/api/stream':
+            self._stream(parse_qs(url.query))
+        else:
+            super().do_GET()
+
+    def _stream(self, query):
+        """
+        Server-sent events: 'start' (resumen), un 'frame' por cuadro y 'end'.
+        Las escrituras bloquean este hilo (no hay cola por cliente); si el
+        cliente no acepta datos en STREAM_WRITE_TIMEOUT se cierra la conexión.
+        """
+        try:
+            start, frames = self.service.stream(query)
+        except RequestError as e:
+            self._send_json(400, {'error': str(e)})
+            return
+        except TimeoutError as e:
+            self._send_json(504, {'error': str(e)})
+            return
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-cache')
+        self.end_headers()
+        self.connection.settimeout(STREAM_WRITE_TIMEOUT)
+        self.service._count('active_streams')
+        try:
+            self._send_event('start', start)
+            for frame in frames:
+                self._send_event('frame', frame)
+            self._send_event('end', {})
+        except (BrokenPipeError, ConnectionResetError, TimeoutError):
+            # Cliente desconectado o demasiado lento
+            self.close_connection = True
+        finally:
+            frames.close()
+            self.service._count('active_streams', -1)
+
+    def _send_event(self, event, payload):
+        self.wfile.write(f"event: {event}\ndata: {json.dumps(payload)}\n\n".encode())
+
+    def do_POST(self):
+        routes = {'/api/simulate': self.service.simulate, '/api/sweep': self.service.sweep}
+        route = routes.get(urlsplit(self.path).path)
+        if route is None:
+            self._send_json(404, {'error': f"Ruta desconocida: {self.path}"})
+            return
+        try:
+            body = self._read_json()
+            payload = route(body)
+        except RequestError as e:
+            self._send_json(400, {'error': str(e)})
+        except TimeoutError as e:
+            self._send_json(504, {'error': str(e)})
+        except Exception as e:
+            self._send_json(500, {'error': f"Error inesperado: {e}"})
+        else:
+            self._send_json(200, payload)
+
+    def _read_json(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        if length > MAX_BODY:
+            raise RequestError(f"Cuerpo demasiado grande (máximo {MAX_BODY} bytes)")
+        try:
+            body = json.loads(self.rfile.read(length) or b'{}')
+        except json.JSONDecodeError as e:
+            raise RequestError(f"JSON inválido: {e}") from None
+        if not isinstance(body, dict):
+            raise RequestError("El cuerpo debe ser un objeto JSON")
+        return body
+
+    def _send_json(self, status, payload):
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        if not self.quiet:
+            super().log_message(format, *args)
+
+def make_server(port=PORT, workers=None, timeout=REQUEST_TIMEOUT, directory=WEB_APP_DIR,
+                quiet=False):
+    """
+    Crea el servidor (sin iniciarlo): un hilo por petición y el servicio de
+    simulación en server.service. Al terminar: server.server_close() y
+    server.service.close().
+    """
+    service = SimulationService(workers=workers, timeout=timeout)
+    handler = type('Handler', (SimulationHandler,), {'service': service, 'quiet': quiet})
+    server = http.server.ThreadingHTTPServer(
+        ("", port), functools.partial(handler, directory=str(directory)))
+    server.daemon_threads = True
+    server.service = service
+    return server
+
+def start_server(port=PORT, workers=None, timeout=REQUEST_TIMEOUT, open_browser=True):
     """Inicia el servidor web y abre el navegador."""
-    
-    # Cambiar al directorio web_app
+
     if not WEB_APP_DIR.exists():
         print(f"❌ Error: No se encontró el directorio {WEB_APP_DIR}")
         sys.exit(1)
-    
-    os.chdir(WEB_APP_DIR)
-    
+
     print("=" * 70)
     print(" " * 15 + "🌐 SERVIDOR WEB - COHETE DE AGUA")
     print("=" * 70)
     print(f"\n📂 Sirviendo archivos desde: {WEB_APP_DIR}")
-    print(f"🌍 Puerto: {PORT}")
-    print(f"🔗 URL: http://localhost:{PORT}")
+    print(f"🌍 Puerto: {port}")
+    print(f"🔗 URL: http://localhost:{port}")
+    print(f"🧮 API: POST /api/simulate, POST /api/sweep (tiempo máximo {timeout:g} s)")
     print("\n" + "-" * 70)
     print("💡 INSTRUCCIONES:")
     print("-" * 70)
     print("1. El navegador se abrirá automáticamente")
-    print("2. Si no se abre, ve manualmente a: http://localhost:{PORT}")
+    print(f"2. Si no se abre, ve manualmente a: http://localhost:{port}")
     print("3. Para DETENER el servidor: Presiona Ctrl+C")
     print("-" * 70)
-    
-    # Configurar el servidor
-    Handler = http.server.SimpleHTTPRequestHandler
-    
+
+    try:
+        httpd = make_server(port, workers, timeout)
+    except OSError as e:
+        if "Address already in use" in str(e):
+            print(f"\n❌ Error: El puerto {port} ya está en uso.")
+            print(f"💡 Soluciones:")
+            print(f"   1. Cierra cualquier otro servidor en el puerto {port}")
+            print(f"   2. Usa otro puerto: python start_web_server.py --port 8080")
+            print(f"   3. Usa: netstat -ano | findstr :{port}  para ver qué lo usa")
+        else:
+            print(f"\n❌ Error al iniciar el servidor: {e}")
+        sys.exit(1)
+
     try:
-        with socketserver.TCPServer(("", PORT), Handler) as httpd:
-            print(f"\n✅ Servidor iniciado exitosamente en el puerto {PORT}")
-            print(f"🚀 Abriendo navegador...")
-            
+        with httpd:
+            print(f"\n✅ Servidor iniciado exitosamente en el puerto {port}")
+
             # Abrir navegador automáticamente
-            webbrowser.open(f"http://localhost:{PORT}")
-            
+            if open_browser:
+                print(f"🚀 Abriendo navegador...")
+                webbrowser.open(f"http://localhost:{port}")
+
             print(f"\n⏳ Servidor en ejecución... (Presiona Ctrl+C para detener)\n")
             print("=" * 70)
-            
+
             # Mantener el servidor corriendo
             httpd.serve_forever()
-            
+
     except KeyboardInterrupt:
         print("\n\n" + "=" * 70)
         print("🛑 Servidor detenido por el usuario")
         print("=" * 70)
         print("👋 ¡Gracias por usar el simulador!")
-        
-    except OSError as e:
-        if "Address already in use" in str(e):
-            print(f"\n❌ Error: El puerto {PORT} ya está en uso.")
-            print(f"💡 Soluciones:")
-            print(f"   1. Cierra cualquier otro servidor en el puerto {PORT}")
-            print(f"   2. Cambia el puerto en este script (variable PORT)")
-            print(f"   3. Usa: netstat -ano | findstr :{PORT}  para ver qué lo usa")
-        else:
-            print(f"\n❌ Error al iniciar el servidor: {e}")
-        sys.exit(1)
-        
+
     except Exception as e:
         print(f"\n❌ Error inesperado: {e}")
         sys.exit(1)
 
+    finally:
+        httpd.service.close()
+
 if __name__ == "__main__":
-    start_server()
+    parser = argparse.ArgumentParser(description="Servidor web y API del simulador")
+    parser.add_argument('--port', type=int, default=PORT)
+    parser.add_argument('--workers', type=int, default=None,
+                        help="Procesos de simulación (por defecto, todos los núcleos)")
+    parser.add_argument('--timeout', type=float, default=REQUEST_TIMEOUT,
+                        help="Tiempo máximo por petición [s]")
+    parser.add_argument('--no-browser', action='store_true', help="No abrir el navegador")
+    args = parser.parse_args()
+    start_server(args.port, args.workers, args.timeout, open_browser=not args.no_browser)
 # -----------------------------------------------------------------------------
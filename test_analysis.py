@@ -0,0 +1,273 @@
+# test_analysis.py - Pruebas de los Módulos de Análisis (Barridos, etc.)
+# -----------------------------------------------------------------------------
+import numpy as np
+from utils.parameters import PARAMS
+from analysis.sweep import parameter_grid, run_sweep
+from analysis.montecarlo import run_montecarlo, landing_ellipse
+from analysis.optimize import optimize, max_pressure, max_fill_ratio
+from analysis.surrogate import Surrogate
+from utils.results_store import ResultsStore
+
+def test_parameter_grid():
+    """Verifica la expansión cartesiana de la rejilla de parámetros."""
+    print("="*70)
+    print("PRUEBA A1: Rejilla de Parámetros")
+    print("="*70)
+
+    rows, configs = parameter_grid({'launch_angle_deg': [30, 60], 'V_0w_L': [0.4, 0.6, 0.8]})
+    assert len(rows) == len(configs) == 6
+    assert rows[0] == {'launch_angle_deg': 30, 'V_0w_L': 0.4}
+    assert rows[-1] == {'launch_angle_deg': 60, 'V_0w_L': 0.8}
+    assert np.isclose(configs[-1]['launch_angle_rad'], np.radians(60))
+    assert np.isclose(configs[-1]['V_0w'], 0.8 / 1000.0)
+    assert PARAMS['V_0w_L'] == 0.5, "PARAMS no debe modificarse"
+    print("✓ Producto cartesiano convertido a SI")
+
+    print("\n✓ Prueba A1 PASADA\n")
+
+def test_sweep_order_and_throughput():
+    """Verifica que el barrido en paralelo conserva el orden de entrada."""
+    print("="*70)
+    print("PRUEBA A2: Barrido en Paralelo")
+    print("="*70)
+
+    grid = {'launch_angle_deg': [80, 30, 55, 45]}
+    serial = run_sweep(grid, workers=1)
+    parallel = run_sweep(grid, workers=2, chunksize=1)
+
+    assert list(parallel['launch_angle_deg']) == grid['launch_angle_deg']
+    assert np.allclose(serial['Max_Range'], parallel['Max_Range'])
+    assert parallel.attrs['runs'] == 4
+    assert parallel.attrs['runs_per_s'] > 0
+    print(f"✓ {parallel.attrs['runs_per_s']:.1f} vuelos/s con {parallel.attrs['workers']} procesos")
+
+    print("\n✓ Prueba A2 PASADA\n")
+
+def test_montecarlo():
+    """Verifica reproducibilidad, percentiles, elipse y sensibilidades."""
+    print("="*70)
+    print("PRUEBA A3: Dispersión Monte Carlo")
+    print("="*70)
+
+    distributions = {
+        'p_manometric_psi': ('normal', 70, 2),
+        'C_D': ('uniform', 0.6, 0.9),
+        'launch_angle_deg': ('normal', 45, 2),
+        'azimuth_deg': ('normal', 0, 3),
+    }
+    serial = run_montecarlo(distributions, 400, seed=7, workers=1, chunk_size=100)
+    parallel = run_montecarlo(distributions, 400, seed=7, workers=2, chunk_size=100,
+                              verbose=False)
+    assert serial.samples.equals(parallel.samples), "La semilla debe fijar el resultado"
+    assert len(serial.samples) == 400
+    print("✓ Reproducible con 1 y 2 procesos")
+
+    p = serial.percentiles
+    assert p.loc['P5', 'Max_Height'] < p.loc['P50', 'Max_Height'] < p.loc['P95', 'Max_Height']
+    assert serial.sensitivity.index[0] == 'C_D', "C_D domina el apogeo"
+    assert serial.ellipse['semi_major'] >= serial.ellipse['semi_minor'] > 0
+    print("✓ Percentiles, elipse y sensibilidades coherentes")
+
+    # Elipse de una nube alineada con X: eje mayor en la dirección X
+    rng = np.random.default_rng(0)
+    ellipse = landing_ellipse(rng.normal(0, 3, 5000), rng.normal(0, 1, 5000))
+    assert abs(abs(ellipse['angle_deg']) % 180 - 0) < 3 or abs(abs(ellipse['angle_deg']) - 180) < 3
+    assert np.isclose(ellipse['semi_major'] / ellipse['semi_minor'], 3, rtol=0.1)
+    print("✓ Orientación y semiejes de la elipse")
+
+    # Distribuciones que salen de los límites físicos: se truncan
+    wide = run_montecarlo({'V_0w_L': ('normal', 0.1, 0.2)}, 200, seed=3, workers=1,
+                          verbose=False)
+    assert (wide.samples['V_0w_L'] >= 0).all()
+    assert (wide.samples['V_0w_L'] < PARAMS['V_r_L']).all()
+    assert wide.samples['Landed'].all() and wide.excluded == 0
+    print("✓ Muestras truncadas a los límites físicos")
+
+    # Sin azimut no hay elipse 2D: se informa la dispersión a lo largo del rumbo
+    assert wide.ellipse is None
+    low, high = wide.downrange['interval']
+    assert low < wide.downrange['mean'] < high
+    print("✓ Dispersión 1D sin azimut")
+
+    print("\n✓ Prueba A3 PASADA\n")
+
+def test_optimizer():
+    """Verifica que el optimizador supera a la rejilla con menos vuelos."""
+    print("="*70)
+    print("PRUEBA A4: Optimización de Parámetros")
+    print("="*70)
+
+    grid = run_sweep({'V_0w_L': np.linspace(0.2, 1.9, 15)}, workers=1, verbose=False)
+    best = optimize({'V_0w_L': (0.2, 1.9)}, metric='Max_Height', xtol=0.01)
+    assert best.value >= grid['Max_Height'].max()
+    assert best.evaluations < 15
+    assert best.calls >= best.evaluations == len(best.history)
+    print(f"✓ Brent: {best.value:.2f} m en {best.evaluations} vuelos "
+          f"(rejilla: {grid['Max_Height'].max():.2f} m en 15)")
+
+    target = optimize({'launch_angle_deg': (45, 85)}, target=20.0)
+    assert abs(target.value - 20.0) < 0.05
+    print(f"✓ Alcance objetivo 20 m con {target.params['launch_angle_deg']:.2f}°")
+
+    constrained = optimize({'V_0w_L': (0.2, 1.9), 'p_manometric_psi': (40, 120)},
+                           metric='Max_Height', max_evals=120,
+                           constraints=[max_pressure(90), max_fill_ratio(0.3)])
+    assert constrained.params['p_manometric_psi'] <= 90
+    assert constrained.params['V_0w_L'] / PARAMS['V_r_L'] <= 0.3
+    assert constrained.value > best.value, "Más presión debe superar al óptimo a 70 psi"
+    print("✓ Nelder–Mead respeta las restricciones")
+
+    print("\n✓ Prueba A4 PASADA\n")
+
+def test_surrogate():
+    """Verifica el modelo sustituto: error reservado, guardado y respaldo."""
+    import os
+    import tempfile
+    from main_simulation import run_simulation
+    from utils.parameters import convert_to_si
+
+    print("="*70)
+    print("PRUEBA A5: Modelo Sustituto")
+    print("="*70)
+
+    model = Surrogate.fit(n_samples=300, seed=1)
+    for name in ('Max_Height', 'Max_Range'):
+        assert model.errors[name]['n_holdout'] > 0
+        assert np.isfinite(model.errors[name]['rmse'])
+    print(f"✓ RMSE reservado: apogeo {model.errors['Max_Height']['rmse']:.2f} m, "
+          f"alcance {model.errors['Max_Range']['rmse']:.2f} m")
+
+    query = {'p_manometric_psi': 70.0, 'V_0w_L': 0.6, 'launch_angle_deg': 60.0}
+    predicted = model.predict(query)
+    assert not predicted['Simulated'].iloc[0]
+    params = convert_to_si({**PARAMS, **query})
+    exact = run_simulation(params, record='summary', verbose=False).as_row()
+    assert abs(predicted['Max_Height'].iloc[0] - exact['Max_Height']) < 3.0
+    print(f"✓ Predicción {predicted['Max_Height'].iloc[0]:.2f} m "
+          f"(simulado {exact['Max_Height']:.2f} m)")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'surrogate.npz')
+        model.save(path)
+        loaded = Surrogate.load(path)
+    assert np.allclose(loaded.predict(query)[['Max_Height', 'Max_Range']],
+                       predicted[['Max_Height', 'Max_Range']])
+    print("✓ Guardado y carga reproducen las predicciones")
+
+    outside = model.predict([query, {**query, 'launch_angle_deg': 89.0}])
+    assert list(outside['Simulated']) == [False, True]
+    assert outside['Max_Height_RMSE'].iloc[1] == 0.0
+    print("✓ Consultas fuera de los límites se simulan")
+
+    invalid = model.predict([{**query, 'V_r_L': 0.5},
+                             {**query, 'V_r_L': 0.5, 'launch_angle_deg': 89.0}])
+    assert not invalid['Simulated'].any()
+    assert invalid[['Max_Height', 'Max_Height_RMSE']].isna().all().all()
+    print("✓ Configuraciones imposibles quedan como NaN")
+
+    print("\n✓ Prueba A5 PASADA\n")
+
+def test_results_store():
+    """Verifica el almacén de resultados: particiones, poda y trayectorias."""
+    import tempfile
+    from main_simulation import run_simulation
+    from utils.parameters import convert_to_si
+
+    print("="*70)
+    print("PRUEBA A6: Almacén de Resultados")
+    print("="*70)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = ResultsStore(tmp, partition_by=('V_0w_L',), batch_rows=10)
+        grid = {'V_0w_L': [0.4, 0.7], 'launch_angle_deg': np.linspace(30, 80, 6)}
+        df = run_sweep(grid, workers=1, verbose=False, backend='kernel', store=store)
+        sweep_id = df.attrs['sweep_id']
+        assert [info['sweep_id'] for info in store.sweeps()] == [sweep_id]
+
+        mc = run_montecarlo({'C_D': ('uniform', 0.6, 0.9)}, 30, seed=3, workers=1,
+                            chunk_size=10, verbose=False, store=store)
+        assert len(store.query([('sweep_id', '==', mc.samples.attrs['sweep_id'])])) == 30
+        print(f"✓ Barrido y Monte Carlo guardados: {len(store._parts())} partes")
+
+        # Llenado 30-40 % y apogeo > 10 m: solo se lee la partición de 0.7 L
+        filters = [('Fill_Fraction', 'between', (0.3, 0.4)), ('Max_Height', '>', 10.0)]
+        hits = store.query(filters, columns=['launch_angle_deg', 'Max_Height'])
+        expected = df[(df['V_0w_L'] == 0.7) & (df['Max_Height'] > 10.0)]
+        assert len(hits) == len(expected) > 0
+        assert set(hits.columns) == {'launch_angle_deg', 'Max_Height', 'sweep_id', 'V_0w_L'}
+        assert hits.attrs['scan']['parts_read'] < hits.attrs['scan']['parts_total']
+        assert np.allclose(np.sort(hits['Max_Height']), np.sort(expected['Max_Height']))
+        print(f"✓ Consulta: {len(hits)} vuelos leyendo {hits.attrs['scan']['parts_read']} "
+              f"de {hits.attrs['scan']['parts_total']} partes")
+
+        # Trayectorias completas junto a la fila de resumen
+        params = convert_to_si(PARAMS.copy())
+        flight = run_simulation(params, verbose=False, backend='kernel')
+        row = {**run_simulation(params, record='summary', verbose=False).as_row(),
+               'V_0w_L': PARAMS['V_0w_L']}
+        run_id, = store.append([row], sweep_id, trajectories=[flight])
+        store.flush()
+        assert run_id == len(df)
+        assert store.trajectory(sweep_id, run_id).equals(flight)
+        print("✓ Trayectoria recuperada por sweep_id y Run_Id")
+
+    print("\n✓ Prueba A6 PASADA\n")
+
+def test_comparison_plot():
+    """Verifica los barridos con trayectorias y la comparación superpuesta."""
+    import os
+    import tempfile
+    from rendering import plot_comparison
+
+    print("="*70)
+    print("PRUEBA A7: Comparación de Trayectorias")
+    print("="*70)
+
+    grid = {'launch_angle_deg': np.linspace(25, 80, 12)}
+    summary = run_sweep(grid, workers=1, verbose=False, backend='kernel')
+    sweep = run_sweep(grid, workers=2, chunksize=3, verbose=False, backend='kernel',
+                      record=('every', 5))
+    metrics = ['Max_Height', 'Max_Range', 'Flight_Time']
+    assert np.allclose(sweep[metrics], summary[metrics]), "El resumen usa todas las muestras"
+    assert all(df['Phase'].iloc[-1] == 'Landed' for df in sweep['Trajectory'])
+    print(f"✓ {len(sweep)} trayectorias conservadas en el barrido")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        best = int(sweep['Max_Range'].argmax())
+        outputs = plot_comparison(sweep, tmp, metrics=('Y_Position', 'Pressure'),
+                                  highlight=best, dpi=40)
+        assert set(outputs) == {'trajectory', 'Y_Position', 'Pressure'}
+        assert all(os.path.getsize(path) > 0 for path in outputs.values())
+        named = plot_comparison({'a': sweep['Trajectory'][0], 'b': sweep['Trajectory'][1]},
+                                tmp, prefix='pair', metrics=(), highlight='b', dpi=40)
+        assert os.path.exists(named['trajectory'])
+        colored = plot_comparison(list(sweep['Trajectory'][:3]), tmp, prefix='colored',
+                                  metrics=(), color_by=[30.0, 45.0, 60.0], dpi=40)
+        assert os.path.exists(colored['trajectory'])
+        try:
+            plot_comparison(list(sweep['Trajectory'][:3]), tmp, metrics=(),
+                            color_by='launch_angle_deg', dpi=40)
+            assert False, "Una columna que no está en la trayectoria debe fallar"
+        except KeyError as error:
+            assert 'launch_angle_deg' in str(error)
+    print("✓ Figuras superpuestas por métrica sin volver a simular")
+
+    print("\n✓ Prueba A7 PASADA\n")
+
+def run_all_tests():
+    """Ejecuta todas las pruebas de análisis."""
+    test_parameter_grid()
+    test_sweep_order_and_throughput()
+    test_montecarlo()
+    test_optimizer()
+    test_surrogate()
+    test_results_store()
+    test_comparison_plot()
+
+    print("="*70)
+    print(" "*15 + "¡TODAS LAS PRUEBAS DE ANÁLISIS PASARON!")
+    print("="*70)
+
+if __name__ == "__main__":
+    run_all_tests()
+# -----------------------------------------------------------------------------
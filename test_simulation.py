@@ -3,7 +3,12 @@
 import numpy as np
 import pandas as pd
 from utils.parameters import PARAMS, RHO_W, G, P_ATM, convert_to_si
-from main_simulation import run_simulation
+from main_simulation import run_simulation, run_simulation_batch
+from utils.recorder import TrajectoryRecorder, PHASES, PHASE_CODES, FlightSummary
+from utils.cache import ResultCache
+
+# Caché compartida: las pruebas 1 y 4 simulan los mismos parámetros
+CACHE = ResultCache()
 
 def test_default_parameters():
     """Prueba con los parámetros predeterminados."""
@@ -17,11 +22,11 @@ def test_default_parameters():
     print(f"Masa seca: {PARAMS['M_r_g']:.1f} g")
     print("-"*70)
     
-    df = run_simulation(PARAMS)
+    df = run_simulation(PARAMS, cache=CACHE)
     
     # Validaciones
-    assert df['Position'].max() > 0, "La altura máxima debe ser positiva"
-    assert df['Velocity'].max() > 0, "La velocidad máxima debe ser positiva"
+    assert df['Y_Position'].max() > 0, "La altura máxima debe ser positiva"
+    assert df['Total_Velocity'].max() > 0, "La velocidad máxima debe ser positiva"
     assert len(df) > 0, "Debe haber datos de simulación"
     
     print("\n✓ Prueba 1 PASADA\n")
@@ -44,8 +49,8 @@ def test_different_water_volumes():
         print(f"\n--- Volumen de agua: {V_0w_L:.1f} L ---")
         df = run_simulation(params)
         
-        max_height = df['Position'].max()
-        max_velocity = df['Velocity'].max()
+        max_height = df['Y_Position'].max()
+        max_velocity = df['Total_Velocity'].max()
         flight_time = df['Time'].iloc[-1]
         
         results.append({
@@ -81,8 +86,8 @@ def test_different_pressures():
         print(f"\n--- Presión inicial: {p_psi} psi ---")
         df = run_simulation(params)
         
-        max_height = df['Position'].max()
-        max_velocity = df['Velocity'].max()
+        max_height = df['Y_Position'].max()
+        max_velocity = df['Total_Velocity'].max()
         flight_time = df['Time'].iloc[-1]
         
         results.append({
@@ -107,7 +112,7 @@ def test_physics_consistency():
     print("PRUEBA 4: Consistencia Física")
     print("="*70)
     
-    df = run_simulation(PARAMS)
+    df = run_simulation(PARAMS, cache=CACHE)
     
     # Verificación 1: La masa de agua debe disminuir monótonamente
     water_mass = df['Water Mass'].values
@@ -123,21 +128,835 @@ def test_physics_consistency():
         print(f"✓ Presión durante fase de agua: {pressure[0]:.0f} Pa → {pressure[-1]:.0f} Pa")
     
     # Verificación 3: El cohete debe caer después de alcanzar altura máxima
-    max_height_idx = df['Position'].idxmax()
-    velocities_after_max = df.loc[max_height_idx:, 'Velocity']
+    max_height_idx = df['Y_Position'].idxmax()
+    # La última muestra ('Landed') tiene velocidad cero: se mira el vuelo
+    after_max = df.loc[max_height_idx:]
+    velocities_after_max = after_max.loc[after_max['Phase'] != 'Landed', 'Y_Velocity']
     assert velocities_after_max.iloc[-1] < 0, "El cohete debe estar cayendo al final"
     print("✓ El cohete cae después de alcanzar la altura máxima")
     
     # Verificación 4: Conservación de energía (aproximada)
     # La energía final debe ser menor que la inicial debido a pérdidas por arrastre
     initial_pressure_energy = (PARAMS['P_i_abs'] - P_ATM) * (PARAMS['V_r'] - PARAMS['V_0w'])
-    kinetic_energy_max = 0.5 * (PARAMS['M_r'] + PARAMS['V_0w'] * RHO_W) * (df['Velocity'].max())**2
+    kinetic_energy_max = 0.5 * (PARAMS['M_r'] + PARAMS['V_0w'] * RHO_W) * (df['Total_Velocity'].max())**2
     print(f"✓ Energía de presión inicial: {initial_pressure_energy:.1f} J")
     print(f"✓ Energía cinética máxima: {kinetic_energy_max:.1f} J")
     print(f"✓ Ratio: {kinetic_energy_max/initial_pressure_energy:.2%}")
     
     print("\n✓ Prueba 4 PASADA\n")
 
+def test_batch_matches_scalar():
+    """Verifica que el motor por lotes reproduce la simulación escalar."""
+    print("="*70)
+    print("PRUEBA 5: Simulación por Lotes vs. Escalar")
+    print("="*70)
+    
+    configs = []
+    for angle, V_0w_L in [(45.0, 0.5), (80.0, 1.0)]:
+        params = PARAMS.copy()
+        params['launch_angle_deg'] = angle
+        params['V_0w_L'] = V_0w_L
+        configs.append(convert_to_si(params))
+    
+    df_batch = run_simulation_batch(configs)
+    assert len(df_batch) == len(configs), "Debe haber una fila por configuración"
+    assert df_batch['Landed'].all(), "Todos los cohetes deben aterrizar"
+    
+    for params, (_, row) in zip(configs, df_batch.iterrows()):
+        df = run_simulation(params)
+        assert np.isclose(row['Max_Height'], df['Y_Position'].max(), rtol=1e-9)
+        assert np.isclose(row['Max_Range'], df['X_Position'].max(), rtol=1e-9)
+        assert np.isclose(row['Max_Velocity'], df['Total_Velocity'].max(), rtol=1e-9)
+        assert np.isclose(row['Flight_Time'], df['Time'].iloc[-1])
+    print("✓ Métricas por lotes idénticas a las escalares")
+    
+    print("\n✓ Prueba 5 PASADA\n")
+
+def test_adaptive_integrator():
+    """Verifica el integrador adaptativo Dormand-Prince y sus eventos."""
+    print("="*70)
+    print("PRUEBA 6: Integrador Adaptativo con Eventos")
+    print("="*70)
+    
+    events = []
+    df_dp = run_simulation(PARAMS, integrator='dopri5',
+                           integrator_options={'event_log': events})
+    df_euler = run_simulation(PARAMS)
+    df_ref = run_simulation(PARAMS, integrator='dopri5',
+                            integrator_options={'rtol': 1e-11, 'atol': 1e-13})
+    
+    # Eventos en orden físico: agotamiento del agua, apogeo, aterrizaje
+    names = [name for name, _ in events]
+    assert names == ['burnout', 'apogee', 'landing'], f"Eventos inesperados: {names}"
+    t_landing = events[-1][1]
+    assert np.isclose(df_dp['Time'].iloc[-1], t_landing), "El vuelo debe terminar en el impacto"
+    print(f"✓ Eventos: " + ", ".join(f"{name} t={t:.4f} s" for name, t in events))
+    
+    # Al menos 10 veces menos pasos con igual o mejor precisión que Euler
+    assert len(df_dp) * 10 < len(df_euler), "Dormand-Prince debe usar muchos menos pasos"
+    h_ref = df_ref['Y_Position'].max()
+    err_dp = abs(df_dp['Y_Position'].max() - h_ref)
+    err_euler = abs(df_euler['Y_Position'].max() - h_ref)
+    assert err_dp <= err_euler, "Dormand-Prince debe ser al menos tan preciso como Euler"
+    print(f"✓ Pasos: {len(df_dp)} (Dormand-Prince) vs {len(df_euler)} (Euler)")
+    print(f"✓ Error en apogeo: {err_dp:.4f} m vs {err_euler:.4f} m")
+    
+    print("\n✓ Prueba 6 PASADA\n")
+
+def test_trajectory_recorder():
+    """Verifica el registro columnar preasignado de la trayectoria."""
+    print("="*70)
+    print("PRUEBA 7: Registro Columnar de la Trayectoria")
+    print("="*70)
+    
+    recorder = TrajectoryRecorder(capacity=4)
+    for i in range(10):  # Obliga a crecer los buffers dos veces
+        recorder.append(i * 0.1, i, 2.0 * i, 1.0, -1.0, 1.5, 0.0, P_ATM,
+                        PHASE_CODES['Air'] if i < 9 else PHASE_CODES['Landed'])
+    assert len(recorder) == 10
+    
+    arrays = recorder.as_arrays()
+    assert arrays['Y_Position'][-1] == 18.0
+    assert arrays['Phase'].dtype == np.int8
+    
+    df = recorder.to_dataframe()
+    assert np.shares_memory(df['Time'].to_numpy(), arrays['Time']), \
+        "El DataFrame debe compartir memoria con los buffers"
+    assert list(df['Phase'].cat.categories) == list(PHASES)
+    assert (df['Phase'] == 'Landed').sum() == 1
+    print("✓ Buffers crecen y se exponen sin copia")
+    
+    print("\n✓ Prueba 7 PASADA\n")
+
+def test_recording_policies():
+    """Verifica las políticas de registro y el modo de solo resumen."""
+    print("="*70)
+    print("PRUEBA 8: Políticas de Registro")
+    print("="*70)
+    
+    df_full = run_simulation(PARAMS)
+    summary = run_simulation(PARAMS, record='summary')
+    assert isinstance(summary, FlightSummary)
+    assert summary.max_height == df_full['Y_Position'].max()
+    assert summary.max_range == df_full['X_Position'].max()
+    assert summary.flight_time == df_full['Time'].iloc[-1]
+    print(f"✓ Resumen en línea: {summary}")
+    
+    df_every = run_simulation(PARAMS, record=('every', 100))
+    assert len(df_every) < len(df_full) / 50
+    assert df_every['Phase'].iloc[-1] == 'Landed', "La fila 'Landed' se conserva siempre"
+    
+    df_transitions = run_simulation(PARAMS, record='transitions')
+    phases = list(df_transitions['Phase'].astype(str))
+    assert len(set(phases)) == len(phases), "Solo debe haber una muestra por fase"
+    print(f"✓ Decimación: {len(df_every)} y {len(df_transitions)} filas de {len(df_full)}")
+    
+    print("\n✓ Prueba 8 PASADA\n")
+
+def test_concurrent_simulations():
+    """Verifica que simulaciones simultáneas en hilos no comparten parámetros."""
+    from concurrent.futures import ThreadPoolExecutor
+    print("="*70)
+    print("PRUEBA 9: Simulaciones Concurrentes (Hilos)")
+    print("="*70)
+    
+    configs = []
+    for angle in (30.0, 60.0, 85.0):
+        params = PARAMS.copy()
+        params['launch_angle_deg'] = angle
+        configs.append(convert_to_si(params))
+    
+    run = lambda params: run_simulation(params, record='summary', verbose=False)
+    expected = [run(params) for params in configs]
+    with ThreadPoolExecutor(max_workers=len(configs)) as executor:
+        concurrent = list(executor.map(run, configs * 2))
+    
+    assert concurrent == expected * 2, "Los hilos no deben mezclar parámetros"
+    print("✓ Resultados idénticos en serie y en hilos")
+    
+    # params=None usa el contenido actual de PARAMS, no una copia de importación
+    from utils.parameters import as_sim_params
+    original = PARAMS['C_D']
+    try:
+        PARAMS['C_D'] = 0.3
+        assert as_sim_params(None).C_D == 0.3
+    finally:
+        PARAMS['C_D'] = original
+    assert as_sim_params(None).C_D == original
+    print("✓ params=None sigue los cambios de PARAMS")
+    
+    print("\n✓ Prueba 9 PASADA\n")
+
+def test_kernel_backend():
+    """Verifica que el núcleo escalar reproduce la ruta NumPy."""
+    print("="*70)
+    print("PRUEBA 10: Núcleo Escalar Precompilado")
+    print("="*70)
+    
+    df_numpy = run_simulation(PARAMS, verbose=False)
+    df_kernel = run_simulation(PARAMS, verbose=False, backend='kernel')
+    
+    assert len(df_kernel) == len(df_numpy), "Debe producir el mismo número de pasos"
+    assert (df_kernel['Phase'] == df_numpy['Phase']).all()
+    for column in ('X_Position', 'Y_Position', 'Total_Velocity', 'Water Mass'):
+        assert np.allclose(df_kernel[column], df_numpy[column], rtol=1e-9, atol=1e-9), column
+    print("✓ Trayectoria idéntica salvo redondeo")
+    
+    print("\n✓ Prueba 10 PASADA\n")
+
+def test_numba_backend():
+    """Verifica el backend Numba y su respaldo cuando Numba no está instalado."""
+    import warnings
+    import physics.numba_backend as numba_backend
+    print("="*70)
+    print("PRUEBA 11: Backend Numba")
+    print("="*70)
+    
+    expected = run_simulation(PARAMS, record='summary', verbose=False, backend='kernel')
+    
+    summary = run_simulation(PARAMS, record='summary', verbose=False, backend='numba')
+    assert np.allclose(summary, expected, rtol=1e-9), "Numba debe reproducir el núcleo escalar"
+    df = run_simulation(PARAMS, verbose=False, backend='numba')
+    assert df['Phase'].iloc[-1] == 'Landed'
+    assert np.isclose(df['Y_Position'].max(), expected.max_height, rtol=1e-9)
+    print(f"✓ Numba disponible: {numba_backend.HAVE_NUMBA}")
+    
+    # Buffers: estimación inicial, repetición si no cabe y recorte al vuelo
+    from main_simulation import _numba_samples
+    assert _numba_samples(summary) == len(df), "El resumen cuenta las mismas muestras"
+    initial = numba_backend.INITIAL_SAMPLES
+    try:
+        numba_backend.INITIAL_SAMPLES = 100
+        data, phase, _ = numba_backend.run_flight_numba(PARAMS)
+    finally:
+        numba_backend.INITIAL_SAMPLES = initial
+    assert data.shape == (8, len(df)) and len(phase) == len(df)
+    data, _, _ = numba_backend.run_flight_numba(PARAMS)
+    assert data.base is None and data.shape[1] == len(df), "Trayectoria recortada"
+    print(f"✓ Buffers de {len(df)} muestras (no t_max / dt)")
+    
+    # Sin Numba: advertencia y respaldo al backend 'kernel'
+    have_numba = numba_backend.HAVE_NUMBA
+    numba_backend.HAVE_NUMBA = False
+    try:
+        with warnings.catch_warnings(record=True) as caught:
+            warnings.simplefilter('always')
+            fallback = run_simulation(PARAMS, record='summary', verbose=False, backend='numba')
+    finally:
+        numba_backend.HAVE_NUMBA = have_numba
+    assert any(issubclass(w.category, RuntimeWarning) for w in caught)
+    assert fallback == expected
+    print("✓ Respaldo limpio al backend 'kernel'")
+    
+    print("\n✓ Prueba 11 PASADA\n")
+
+def test_result_cache():
+    """Verifica la caché de resultados: aciertos, LRU por bytes, disco e invalidación."""
+    import tempfile
+    import time
+    import utils.cache as cache_module
+    print("="*70)
+    print("PRUEBA 12: Caché de Resultados")
+    print("="*70)
+    
+    cache = ResultCache(cache_dir=tempfile.mkdtemp())
+    df = run_simulation(PARAMS, verbose=False, cache=cache)
+    start = time.perf_counter()
+    df_hit = run_simulation(PARAMS, verbose=False, cache=cache)
+    elapsed_us = (time.perf_counter() - start) * 1e6
+    assert cache.hits == 1 and cache.misses == 1
+    assert df_hit.equals(df)
+    df_hit['X_Position'] = 0.0
+    assert run_simulation(PARAMS, verbose=False, cache=cache).equals(df), \
+        "Modificar el resultado no debe alterar la caché"
+    print(f"✓ Acierto en memoria en {elapsed_us:.0f} µs")
+    
+    # Otro integrador o política de registro es otra entrada
+    summary = run_simulation(PARAMS, record='summary', verbose=False, cache=cache)
+    assert isinstance(summary, FlightSummary) and cache.misses == 2
+    
+    # Almacén en disco: una caché nueva lee los .npz
+    disk = ResultCache(cache_dir=cache.cache_dir)
+    assert run_simulation(PARAMS, verbose=False, cache=disk).equals(df)
+    assert disk.hits == 1 and disk.misses == 0
+    print("✓ Almacén .npz compartido entre instancias")
+    
+    # LRU por bytes: solo cabe una trayectoria
+    small = ResultCache(max_bytes=int(1.5 * cache.nbytes))
+    for angle in (40, 50):
+        params = convert_to_si({**PARAMS, 'launch_angle_deg': angle})
+        run_simulation(params, verbose=False, cache=small)
+    assert len(small) == 1 and small.nbytes <= small.max_bytes
+    print("✓ Expulsión LRU por tamaño en bytes")
+    
+    # event_log no forma parte de la clave: los eventos se reproducen
+    first, second = [], []
+    for log in (first, second):
+        run_simulation(PARAMS, integrator='dopri5', integrator_options={'event_log': log},
+                       verbose=False, cache=small)
+    assert [name for name, _ in first] == ['burnout', 'apogee', 'landing']
+    assert second == first
+    print("✓ Eventos del integrador reproducidos desde la caché")
+    
+    # Acceso concurrente: la contabilidad de bytes se mantiene coherente
+    from concurrent.futures import ThreadPoolExecutor
+    shared = ResultCache(max_bytes=int(2.5 * cache.nbytes))
+    angles = [30, 40, 50, 60] * 4
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        list(executor.map(lambda a: run_simulation(
+            convert_to_si({**PARAMS, 'launch_angle_deg': a}), verbose=False, cache=shared),
+            angles))
+    assert shared.hits + shared.misses == len(angles)
+    assert shared.nbytes == sum(shared._entry_bytes(e) for e in shared._entries.values())
+    assert shared.nbytes <= shared.max_bytes
+    print("✓ Caché compartida entre hilos")
+    
+    # Un cambio en la versión de la física invalida las entradas
+    version = cache_module.PHYSICS_VERSION
+    cache_module.PHYSICS_VERSION = version + 1
+    cache_module.physics_fingerprint.cache_clear()
+    try:
+        run_simulation(PARAMS, verbose=False, cache=disk)
+        assert disk.misses == 1
+    finally:
+        cache_module.PHYSICS_VERSION = version
+        cache_module.physics_fingerprint.cache_clear()
+    print("✓ Invalidación por versión del modelo físico")
+    
+    print("\n✓ Prueba 12 PASADA\n")
+
+def test_thrust_table():
+    """Verifica las tablas de empuje: error, monotonía, reutilización y modos de física."""
+    import warnings
+    from physics.thrust_table import ThrustTable, get_thrust_table
+    from analysis.sweep import parameter_grid
+    print("="*70)
+    print("PRUEBA 13: Tablas de Empuje")
+    print("="*70)
+    
+    table = ThrustTable(PARAMS)
+    assert table.max_error < 1e-5, f"Error de interpolación excesivo: {table.errors}"
+    print(f"✓ Error máximo de interpolación: {table.max_error:.2e}")
+    
+    # PCHIP conserva la monotonía de P y u_e en M_w (sin sobreoscilaciones)
+    M = np.linspace(0.0, table.M_max, 5001)
+    P, u_e, dMw_dt = table.evaluate_array(M)
+    assert np.all(np.diff(P) >= 0) and np.all(np.diff(u_e) >= 0)
+    assert np.allclose(table.evaluate(0.25), [q[0] for q in table.evaluate_array([0.25])])
+    print("✓ Interpolación monótona")
+    
+    # Sin agua (h = 0) la tabla es constante y no divide por cero
+    with warnings.catch_warnings():
+        warnings.simplefilter('error', RuntimeWarning)
+        dry = ThrustTable(convert_to_si({**PARAMS, 'V_0w_L': 0.0}))
+    assert dry.M_max == 0.0 and dry.max_error == 0.0
+    print("✓ Tabla sin agua sin advertencias")
+    
+    # Variaciones de ángulo, C_D y masa comparten la misma tabla
+    _, configs = parameter_grid({'launch_angle_deg': [30, 60], 'C_D': [0.5, 0.9],
+                                 'M_r_g': [50, 70]})
+    assert len({id(get_thrust_table(params)) for params in configs}) == 1
+    print("✓ Una tabla compartida por todo el barrido")
+    
+    exact = run_simulation(PARAMS, record='summary', verbose=False, backend='kernel')
+    tabulated = run_simulation(PARAMS, record='summary', verbose=False, backend='table')
+    assert np.allclose(tabulated, exact, rtol=1e-6)
+    
+    configs = convert_to_si(pd.DataFrame([PARAMS] * 3).assign(launch_angle_deg=[30, 45, 60]))
+    df_exact = run_simulation_batch(configs)
+    df_table = run_simulation_batch(configs, physics='table')
+    assert np.allclose(df_table['Max_Range'], df_exact['Max_Range'], rtol=1e-6)
+    assert df_table.attrs['thrust_table_max_error'] == table.max_error
+    print("✓ Modo 'table' en run_simulation y run_simulation_batch")
+    
+    print("\n✓ Prueba 13 PASADA\n")
+
+def test_benchmark_comparison():
+    """Verifica la medición y los veredictos de la suite de rendimiento."""
+    from benchmarks.suite import (measure, compare, measure_import, check_budgets,
+                                  backend_speedups)
+
+    print("="*70)
+    print("PRUEBA 14: Suite de Rendimiento")
+    print("="*70)
+
+    result = measure(lambda: np.ones(1000).sum(), number=10, repeat=3)
+    assert 0 < result['min_s'] <= result['median_s']
+    assert result['peak_bytes'] > 0
+    print(f"✓ Medición: {result['median_s'] * 1e6:.1f} µs, pico {result['peak_bytes']} B")
+
+    baseline = {'benchmarks': {
+        'rapido': {'median_s': 1.0, 'peak_bytes': 1000},
+        'lento': {'median_s': 1.0, 'peak_bytes': 1000},
+        'memoria': {'median_s': 1.0, 'peak_bytes': 1000},
+        'retirado': {'median_s': 1.0},
+    }}
+    current = {'benchmarks': {
+        'rapido': {'median_s': 0.5, 'peak_bytes': 1000},
+        'lento': {'median_s': 1.3, 'peak_bytes': 1000},
+        'memoria': {'median_s': 1.0, 'peak_bytes': 2000},
+        'nuevo': {'median_s': 1.0},
+    }}
+    status = {row['name']: row['status'] for row in compare(current, baseline)}
+    assert status == {'rapido': 'improvement', 'lento': 'regression', 'memoria': 'regression',
+                      'nuevo': 'new', 'retirado': 'missing'}
+    relaxed = {row['name']: row['status']
+               for row in compare(current, baseline, thresholds={'lento': 0.5})}
+    assert relaxed['lento'] == 'ok'
+    print("✓ Veredictos con umbrales por defecto y por medición")
+
+    speedups = backend_speedups({'benchmarks': {
+        'steps[numpy]': {'median_s': 3.0}, 'steps[kernel]': {'median_s': 0.5},
+        'run_simulation[numpy]': {'median_s': 1.0}}})
+    assert speedups == {'steps[kernel]': 6.0}, "Solo los pares medidos completos"
+    print("✓ Mejora del núcleo escalar por par NumPy/núcleo")
+
+    # Arranque: el núcleo de la física no carga pandas ni matplotlib
+    startup = measure_import('main_simulation', repeat=1)
+    assert startup['loaded'] == [] and startup['min_s'] > 0
+    results = {'benchmarks': {'import[main_simulation]': startup}}
+    assert check_budgets(results, {'main_simulation': 10.0}) == []
+    assert check_budgets(results, {'main_simulation': 1e-6})
+    try:
+        measure_import('sys', repeat=1)  # ya cargado al arrancar: sin línea de importtime
+    except ValueError as error:
+        assert "'sys'" in str(error)
+    else:
+        raise AssertionError("Un módulo sin tiempos debe dar un error claro")
+    print(f"✓ import main_simulation: {startup['min_s'] * 1e3:.0f} ms sin pandas ni matplotlib")
+
+    print("\n✓ Prueba 14 PASADA\n")
+
+def test_flight_stats():
+    """Verifica la instrumentación opcional del bucle de simulación."""
+    from utils.instrumentation import FlightStats
+
+    print("="*70)
+    print("PRUEBA 15: Instrumentación del Bucle")
+    print("="*70)
+
+    stats = FlightStats()
+    df = run_simulation(PARAMS, verbose=False, stats=stats)
+    assert stats.total_steps == len(df)
+    for phase, count in df['Phase'].value_counts().items():
+        assert stats.steps[phase] == count, phase
+    assert stats.derivative_evals == len(df) - 2, "Euler: una evaluación por paso avanzado"
+    assert 0 < stats.physics_time + stats.logging_time <= stats.total_time
+    assert not stats.capped
+    print(f"✓ {stats.total_steps} pasos, física {stats.physics_time * 1e3:.1f} ms, "
+          f"registro {stats.logging_time * 1e3:.1f} ms")
+
+    adaptive = FlightStats()
+    df = run_simulation(PARAMS, integrator='dopri5', verbose=False, stats=adaptive)
+    assert adaptive.derivative_evals >= 6 * (len(df) - 2)
+    print(f"✓ Dopri5: {adaptive.derivative_evals} evaluaciones en {len(df)} pasos")
+
+    # Presión casi nula en vertical: el vuelo no aterriza antes de 100 s
+    weak = convert_to_si({**PARAMS, 'p_manometric_psi': 0.5, 'launch_angle_deg': 90.0})
+    capped = FlightStats(profile='cprofile')
+    run_simulation(weak, record='summary', verbose=False, backend='kernel', stats=capped)
+    assert capped.capped and capped.t_end > 99.0
+    assert 'kernel_euler_steps' in capped.profile_output
+    print(f"✓ Límite de seguridad detectado en t = {capped.t_end:.2f} s, perfil generado")
+
+    cache = ResultCache()
+    run_simulation(PARAMS, verbose=False, cache=cache)
+    cached = FlightStats()
+    run_simulation(PARAMS, verbose=False, cache=cache, stats=cached)
+    assert cached.cache_hit and cached.total_steps == 0
+    print("✓ Aciertos de la caché marcados sin pasos")
+
+    print("\n✓ Prueba 15 PASADA\n")
+
+def test_iter_simulation():
+    """Verifica la API de generación por bloques y el corte anticipado."""
+    import time
+    from main_simulation import iter_simulation
+    from utils.recorder import COLUMNS
+
+    print("="*70)
+    print("PRUEBA 16: Simulación por Bloques")
+    print("="*70)
+
+    start = time.perf_counter()
+    chunks = iter_simulation(PARAMS, every=100)
+    data, phase = next(chunks)
+    latency = time.perf_counter() - start
+    assert data.shape == (len(COLUMNS), 1) and phase.shape == (1,)
+    print(f"✓ Primera muestra en {latency * 1e6:.0f} µs")
+
+    blocks = [(data, phase)] + list(chunks)
+    assert all(d.shape[1] == 100 for d, _ in blocks[1:-1])
+    df = run_simulation(PARAMS, verbose=False)
+    assert np.array_equal(np.hstack([d for d, _ in blocks]), df.drop(columns='Phase').to_numpy().T)
+    assert np.array_equal(np.concatenate([p for _, p in blocks]), df['Phase'].cat.codes.to_numpy())
+    assert PHASES[blocks[-1][1][-1]] == 'Landed'
+    print(f"✓ {len(blocks)} bloques idénticos al DataFrame de run_simulation")
+
+    # Corte en el apogeo: el consumidor deja de iterar y no se integra el resto
+    consumed = 0
+    for data, phase in iter_simulation(PARAMS, every=50):
+        consumed += data.shape[1]
+        if (data[COLUMNS.index('Y_Velocity')] < 0).any():
+            break
+    assert consumed < len(df) / 2
+    print(f"✓ Corte en el apogeo tras {consumed} de {len(df)} muestras")
+
+    numba_blocks = list(iter_simulation(PARAMS, every=500, backend='numba'))
+    assert numba_blocks[0][0].shape[1] == 1
+    assert all(d.base is None and p.base is None for d, p in numba_blocks), \
+        "Los bloques de Numba son arrays propios, no vistas del vuelo"
+    assert np.allclose(np.hstack([d for d, _ in numba_blocks]),
+                       df.drop(columns='Phase').to_numpy().T)
+    print("✓ Backend Numba entregado por bloques")
+
+    try:
+        next(iter_simulation(PARAMS, every=0))
+        assert False, "every=0 debe rechazarse"
+    except ValueError:
+        pass
+
+    print("\n✓ Prueba 16 PASADA\n")
+
+def test_web_api():
+    """Verifica la API JSON del servidor web (pool de procesos, lotes y caché)."""
+    import json
+    import threading
+    import urllib.error
+    import urllib.request
+    from concurrent.futures import ThreadPoolExecutor
+    from start_web_server import make_server
+
+    print("="*70)
+    print("PRUEBA 17: API de Simulación HTTP")
+    print("="*70)
+
+    server = make_server(port=0, workers=1, quiet=True)
+    url = f"http://localhost:{server.server_address[1]}"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    def post(path, body):
+        request = urllib.request.Request(url + path, json.dumps(body).encode(),
+                                         {'Content-Type': 'application/json'})
+        try:
+            with urllib.request.urlopen(request) as response:
+                return response.status, json.load(response)
+        except urllib.error.HTTPError as e:
+            return e.code, json.load(e)
+
+    try:
+        status, first = post('/api/simulate', {'params': {'launch_angle_deg': 60}})
+        params = convert_to_si({**PARAMS, 'launch_angle_deg': 60.0})
+        expected = run_simulation(params, record='summary', verbose=False).as_row()
+        assert status == 200 and not first['cached']
+        assert np.isclose(first['summary']['Max_Height'], expected['Max_Height'], rtol=1e-9)
+        assert post('/api/simulate', {'params': {'launch_angle_deg': 60}})[1]['cached']
+        print("✓ Resumen igual al de run_simulation; la repetición sale de la caché")
+
+        status, flight = post('/api/simulate', {'params': {'launch_angle_deg': 60},
+                                                'record': {'every': 50}})
+        df = run_simulation(params, record=('every', 50), verbose=False, backend='kernel')
+        assert status == 200 and flight['trajectory']['Phase'][-1] == 'Landed'
+        assert np.allclose(flight['trajectory']['Y_Position'], df['Y_Position'])
+        print(f"✓ Trayectoria decimada con {len(df)} muestras")
+
+        angles = list(range(20, 84, 4))
+        with ThreadPoolExecutor(len(angles)) as pool:
+            replies = list(pool.map(lambda a: post('/api/simulate',
+                                                   {'params': {'launch_angle_deg': a}}), angles))
+        assert all(status == 200 for status, _ in replies)
+        stats = server.service.stats()
+        assert stats['batches'] < len(angles) + 1, "Las peticiones simultáneas deben agruparse"
+        print(f"✓ {len(angles)} peticiones simultáneas en {stats['batches']} lotes")
+
+        status, sweep = post('/api/sweep', {'grid': {'launch_angle_deg': [30, 45, 60],
+                                                     'V_0w_L': [0.5, 0.8]}})
+        assert status == 200 and sweep['runs'] == 6
+        assert [row['launch_angle_deg'] for row in sweep['results'][:2]] == [30, 30]
+        print("✓ Barrido de 6 vuelos en orden de rejilla")
+
+        assert post('/api/simulate', {'params': {'desconocida': 1}})[0] == 400
+        assert post('/api/simulate', {'params': {'V_0w_L': 99}})[0] == 400
+        assert post('/api/desconocida', {})[0] == 404
+        server.service.timeout = 1e-6
+        assert post('/api/simulate', {'params': {'launch_angle_deg': 33},
+                                      'record': 'full'})[0] == 504
+        print("✓ Errores 400/404 y tiempo máximo (504)")
+    finally:
+        server.shutdown()
+        server.server_close()
+        server.service.close()
+
+    print("\n✓ Prueba 17 PASADA\n")
+
+def test_trajectory_stream():
+    """Verifica los cuadros en vivo: ritmo, decimación y espectadores compartidos."""
+    import json
+    import threading
+    import urllib.request
+    from concurrent.futures import ThreadPoolExecutor
+    from start_web_server import make_server, trajectory_frames
+
+    print("="*70)
+    print("PRUEBA 18: Transmisión de Trayectorias")
+    print("="*70)
+
+    df = run_simulation(PARAMS, record=('every', 10), verbose=False, backend='kernel')
+
+    # Reloj simulado: cada pausa avanza el tiempo exactamente lo pedido
+    now = [0.0]
+    frames = list(trajectory_frames(df, speed=2.0, fps=10.0, clock=lambda: now[0],
+                                    sleep=lambda dt: now.__setitem__(0, now[0] + dt)))
+    assert sum(len(f['Time']) for f in frames) == len(df)
+    assert np.isclose(now[0], df['Time'].iloc[-1] / 2.0, atol=0.1)
+    print(f"✓ {len(frames)} cuadros a velocidad x2 en {now[0]:.2f} s simulados")
+
+    # Cliente lento: cada cuadro tarda 1 s en escribirse (reloj adelantado)
+    now = [0.0]
+    slow = []
+    for frame in trajectory_frames(df, speed=1.0, max_samples=16, clock=lambda: now[0],
+                                   sleep=lambda dt: None):
+        slow.append(frame)
+        now[0] += 1.0
+    assert max(len(f['Time']) for f in slow) <= 16
+    assert slow[-1]['Phase'][-1] == 'Landed' and len(slow) < 10
+    print(f"✓ Cliente lento: {len(slow)} cuadros decimados (≤ 16 muestras)")
+
+    server = make_server(port=0, workers=1, quiet=True)
+    url = f"http://localhost:{server.server_address[1]}/api/stream?launch_angle_deg=50&speed=0"
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+
+    def watch(_):
+        events = []
+        with urllib.request.urlopen(url) as response:
+            assert response.headers['Content-Type'] == 'text/event-stream'
+            for line in response:
+                line = line.decode()
+                if line.startswith('event: '):
+                    events.append([line[7:].strip()])
+                elif line.startswith('data: '):
+                    events[-1].append(json.loads(line[6:]))
+        return events
+
+    try:
+        first = watch(0)
+        with ThreadPoolExecutor(6) as pool:
+            viewers = list(pool.map(watch, range(6)))
+        assert first[0][0] == 'start' and first[-1][0] == 'end'
+        assert sum(len(e[1]['Time']) for e in first if e[0] == 'frame') == first[0][1]['samples']
+        assert all(v[0][1]['cached'] for v in viewers), "Los espectadores comparten el vuelo"
+        assert server.service.stats()['active_streams'] == 0
+        print("✓ 6 espectadores del mismo lanzamiento sin volver a simular")
+    finally:
+        server.shutdown()
+        server.server_close()
+        server.service.close()
+
+    print("\n✓ Prueba 18 PASADA\n")
+
+def test_trajectory_file():
+    """Verifica el formato binario: ida y vuelta, memmap por columna y ventanas."""
+    import os
+    import tempfile
+    from utils.cache import physics_fingerprint
+    from utils.trajectory_file import TrajectoryFile, read_trajectory, write_trajectory
+
+    print("="*70)
+    print("PRUEBA 19: Archivo Binario de Trayectoria")
+    print("="*70)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, 'flight.rtraj')
+        df = run_simulation(PARAMS, verbose=False, backend='kernel', output=path)
+        assert os.listdir(tmp) == ['flight.rtraj'], "No quedan archivos temporales"
+        pd.testing.assert_frame_equal(read_trajectory(path), df)
+        print(f"✓ {len(df)} muestras escritas en streaming e idénticas al DataFrame")
+
+        flight = TrajectoryFile(path)
+        assert flight.model_version == physics_fingerprint()
+        assert flight.params['launch_angle_rad'] == PARAMS['launch_angle_rad']
+        height = flight.column('Y_Position')
+        assert isinstance(height, np.memmap)
+        assert np.array_equal(height, df['Y_Position'].to_numpy())
+
+        window = flight.to_dataframe(0.5, 1.0)
+        assert window['Time'].between(0.5, 1.0).all()
+        assert len(window) == df['Time'].between(0.5, 1.0).sum()
+        assert list(flight.to_dataframe(columns=['Time']).columns) == ['Time', 'Phase']
+        print(f"✓ Ventana [0.5, 1.0] s: {len(window)} muestras sin cargar el archivo")
+
+        # Solo resumen en memoria, trayectoria completa en disco
+        summary = run_simulation(PARAMS, record='summary', verbose=False, output=path)
+        assert np.isclose(read_trajectory(path)['Y_Position'].max(), summary.max_height)
+
+        small = write_trajectory(os.path.join(tmp, 'f32.rtraj'), df, dtype='float32')
+        assert os.path.getsize(small) < 0.6 * os.path.getsize(path)
+        assert np.allclose(read_trajectory(small)['X_Position'], df['X_Position'], rtol=1e-6)
+        print(f"✓ float32: {os.path.getsize(small)} frente a {os.path.getsize(path)} bytes")
+
+    print("\n✓ Prueba 19 PASADA\n")
+
+def test_batch_rendering():
+    """Verifica el renderizado por lotes: diezmado, plantilla y procesos."""
+    import os
+    import tempfile
+    import matplotlib.pyplot as plt
+    from rendering import FlightRenderer, decimate_indices, render_many
+    from utils.trajectory_file import write_trajectory
+
+    print("="*70)
+    print("PRUEBA 20: Renderizado por Lotes")
+    print("="*70)
+
+    df = run_simulation(PARAMS, verbose=False, backend='kernel')
+    speed = df['Total_Velocity'].to_numpy()
+    keep = decimate_indices(400, speed)
+    assert len(keep) <= 402 and keep[0] == 0 and keep[-1] == len(df) - 1
+    assert speed[keep].max() == speed.max() and speed[keep].min() == speed.min()
+    print(f"✓ Diezmado: {len(df)} → {len(keep)} muestras conservando extremos")
+
+    figures = len(plt.get_fignums())
+    with tempfile.TemporaryDirectory() as tmp:
+        renderer = FlightRenderer(dpi=40)
+        fig = renderer.draw_trajectory(df)
+        lines = list(fig.axes[0].lines)
+        renderer.render(df, os.path.join(tmp, 'a.png'), os.path.join(tmp, 'b.png'))
+        assert list(fig.axes[0].lines) == lines, "La plantilla se reutiliza"
+
+        flights = {'rtraj': write_trajectory(os.path.join(tmp, 'f.rtraj'), df)}
+        for angle in (30.0, 60.0, 80.0):
+            params = convert_to_si({**PARAMS, 'launch_angle_deg': angle})
+            flights[f'a{angle:.0f}'] = run_simulation(params, verbose=False, backend='kernel')
+        outputs = render_many(flights, os.path.join(tmp, 'out'), workers=2, dpi=40,
+                              chunksize=2)
+        assert all(os.path.getsize(path) > 0 for pair in outputs.values() for path in pair)
+        assert sorted(os.listdir(os.path.join(tmp, 'out')))[0] == 'a30_series.png'
+    assert len(plt.get_fignums()) == figures, "No quedan figuras de pyplot abiertas"
+    print(f"✓ {len(outputs)} vuelos renderizados en 2 procesos sin figuras abiertas")
+
+    print("\n✓ Prueba 20 PASADA\n")
+
+def test_command_line():
+    """Verifica la CLI rocket: subcomandos, archivo de trabajos y errores."""
+    import contextlib
+    import io
+    import json
+    import os
+    import tempfile
+    import rocket
+    from utils.trajectory_file import TrajectoryFile
+
+    print("="*70)
+    print("PRUEBA 21: Línea de Comandos")
+    print("="*70)
+
+    def cli(*argv):
+        out, err = io.StringIO(), io.StringIO()
+        with contextlib.redirect_stdout(out), contextlib.redirect_stderr(err):
+            status = rocket.main(list(argv))
+        return status, out.getvalue(), err.getvalue()
+
+    params = convert_to_si({**PARAMS, 'launch_angle_deg': 60.0})
+    expected = run_simulation(params, record='summary', verbose=False, backend='kernel')
+    status, out, _ = cli('simulate', '--set', 'launch_angle_deg=60')
+    assert status == 0
+    assert np.isclose(json.loads(out)['summary']['Max_Range'], expected.max_range)
+    print(f"✓ simulate → JSON por stdout (alcance {expected.max_range:.2f} m)")
+
+    assert rocket.parse_values('30:60:4') == [30.0, 40.0, 50.0, 60.0]
+    assert rocket.parse_distribution('normal:70:2') == ['normal', 70.0, 2.0]
+    status, _, err = cli('simulate', '--set', 'no_existe=1')
+    assert status == 2 and 'no_existe' in err
+    status, _, err = cli('sweep', '--grid', 'launch_angle_deg=30:60')
+    assert status == 2 and 'inicio:fin:n' in err
+
+    with tempfile.TemporaryDirectory() as tmp:
+        status, _, _ = cli('sweep', '--grid', 'launch_angle_deg=30,45,60', '--workers', '1',
+                           '--output', os.path.join(tmp, 'sweep.csv'))
+        sweep = pd.read_csv(os.path.join(tmp, 'sweep.csv'))
+        assert status == 0 and list(sweep['launch_angle_deg']) == [30.0, 45.0, 60.0]
+        assert np.isclose(sweep['Max_Range'].iloc[2], expected.max_range)
+
+        jobs = {'defaults': {'backend': 'kernel'},
+                'jobs': [{'command': 'simulate', 'name': 'a60',
+                          'params': {'launch_angle_deg': 60}, 'trajectory': True},
+                         {'command': 'simulate', 'params': {'launch_angle_deg': 45},
+                          'record': ['every', 100]},
+                         {'command': 'simulate', 'params': {'no_existe': 1}},
+                         {'command': 'optimize', 'bounds': {'launch_angle_deg': [20, 85]}},
+                         {'command': 'montecarlo', 'n_samples': 200, 'seed': 1,
+                          'distributions': {'C_D': ['normal', 0.75, 0.05]}}]}
+        path = os.path.join(tmp, 'jobs.json')
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(jobs, f)
+        out_dir = os.path.join(tmp, 'out')
+        status, out, _ = cli('run', path, '--workers', '2', '--output-dir', out_dir)
+        manifest = json.loads(out)
+        assert status == 1, "Un trabajo fallido da código 1 sin detener a los demás"
+        assert [entry['status'] for entry in manifest] == ['ok', 'ok', 'error', 'ok', 'ok']
+        with open(os.path.join(out_dir, 'manifest.json'), encoding='utf-8') as f:
+            assert json.load(f) == manifest
+        with open(os.path.join(out_dir, 'a60.json'), encoding='utf-8') as f:
+            assert json.load(f)['summary']['Max_Range'] == expected.max_range
+        flight = TrajectoryFile(os.path.join(out_dir, 'a60.rtraj'))
+        assert np.isclose(flight.params['launch_angle_rad'], np.radians(60.0))
+        trajectory = pd.read_csv(os.path.join(out_dir, '001-simulate.csv'))
+        assert set(trajectory['Phase']) <= set(PHASES)
+        assert len(pd.read_csv(os.path.join(out_dir, '004-montecarlo.csv'))) == 200
+        print(f"✓ Archivo de trabajos: {len(manifest)} trabajos en 2 procesos, "
+              f"{len(os.listdir(out_dir))} archivos")
+
+    print("\n✓ Prueba 21 PASADA\n")
+
+def test_rocket_params():
+    """Verifica RocketParams: validación, inmutabilidad, hash y serialización."""
+    import pickle
+    from utils.parameters import DEFAULT_SIM_PARAMS, ParameterError, RocketParams
+
+    print("="*70)
+    print("PRUEBA 22: Parámetros Validados")
+    print("="*70)
+
+    params = RocketParams(launch_angle_deg=60.0)
+    expected = convert_to_si({**PARAMS, 'launch_angle_deg': 60.0})
+    assert RocketParams() == RocketParams.from_dict(PARAMS)
+    assert RocketParams().sim == DEFAULT_SIM_PARAMS
+    assert params['launch_angle_rad'] == expected['launch_angle_rad']
+    assert params.to_dict().keys() == PARAMS.keys()
+    assert RocketParams.from_si(expected) == params
+    assert RocketParams.from_si(params.sim) == params
+    assert hash(RocketParams.from_si(RocketParams().sim)) == hash(RocketParams())
+    print("✓ Constructores en unidades de enseñanza, desde PARAMS y desde SI")
+
+    for bad, message in [({'V_0w_L': 2.5}, 'V_0w_L'), ({'A_e_cm2': 120.0}, 'A_e_cm2'),
+                         ({'A_ref_cm2': 0.0}, 'A_ref_cm2'), ({'C_D': float('nan')}, 'finitos')]:
+        try:
+            RocketParams(**bad)
+        except ParameterError as error:
+            assert message in str(error)
+        else:
+            raise AssertionError(f"{bad} debería ser inválido")
+    try:
+        params.C_D = 0.1
+    except AttributeError:
+        pass
+    else:
+        raise AssertionError("RocketParams debe ser inmutable")
+    assert params.replace(C_D=0.5).C_D == 0.5 and params.C_D == 0.75
+    print("✓ Límites físicos validados al construir; inmutable (replace)")
+
+    copy = pickle.loads(pickle.dumps(params))
+    assert copy == params and hash(copy) == hash(params) and copy.sim == params.sim
+    assert len({params, copy, RocketParams(launch_angle_deg=60.0)}) == 1
+    summary = run_simulation(params, record='summary', verbose=False, backend='kernel',
+                             cache=CACHE)
+    reference = run_simulation(expected, record='summary', verbose=False, backend='kernel')
+    assert summary == reference
+    print(f"✓ Hash y pickle por valores; run_simulation acepta RocketParams "
+          f"(alcance {summary.max_range:.2f} m)")
+
+    print("\n✓ Prueba 22 PASADA\n")
+
 def run_all_tests():
     """Ejecuta todas las pruebas."""
     print("\n" + "="*70)
@@ -157,6 +976,60 @@ def run_all_tests():
         # Prueba 4: Consistencia física
         test_physics_consistency()
         
+        # Prueba 5: Motor por lotes
+        test_batch_matches_scalar()
+        
+        # Prueba 6: Integrador adaptativo
+        test_adaptive_integrator()
+        
+        # Prueba 7: Registro columnar
+        test_trajectory_recorder()
+        
+        # Prueba 8: Políticas de registro
+        test_recording_policies()
+        
+        # Prueba 9: Concurrencia
+        test_concurrent_simulations()
+        
+        # Prueba 10: Núcleo escalar
+        test_kernel_backend()
+        
+        # Prueba 11: Backend Numba
+        test_numba_backend()
+        
+        # Prueba 12: Caché de resultados
+        test_result_cache()
+        
+        # Prueba 13: Tablas de empuje
+        test_thrust_table()
+        
+        # Prueba 14: Suite de rendimiento
+        test_benchmark_comparison()
+        
+        # Prueba 15: Instrumentación
+        test_flight_stats()
+        
+        # Prueba 16: Simulación por bloques
+        test_iter_simulation()
+        
+        # Prueba 17: API HTTP
+        test_web_api()
+        
+        # Prueba 18: Transmisión en vivo
+        test_trajectory_stream()
+        
+        # Prueba 19: Archivo binario
+        test_trajectory_file()
+        
+        # Prueba 20: Renderizado por lotes
+        test_batch_rendering()
+        
+        # Prueba 21: Línea de comandos
+        test_command_line()
+        
+        # Prueba 22: Parámetros validados
+        test_rocket_params()
+        
         print("="*70)
         print(" "*20 + "¡TODAS LAS PRUEBAS PASARON!")
         print("="*70)
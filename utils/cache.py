@@ -0,0 +1,199 @@
+# 15. utils/cache.py (Caché de Resultados Direccionada por Contenido)
+# -----------------------------------------------------------------------------
+"""
+Memoización de run_simulation. La clave es un hash SHA-256 de:
+- los parámetros SI normalizados (campos base de SimParams),
+- el integrador, sus opciones, la política de registro y el backend,
+- la versión del modelo físico: PHYSICS_VERSION más el código fuente de los
+  módulos de física, de modo que cualquier cambio en la física invalida las
+  entradas antiguas automáticamente.
+
+Los resultados se guardan en una LRU en memoria con límite de bytes y,
+opcionalmente, en archivos .npz dentro de un directorio de caché.
+"""
+from collections import OrderedDict
+from functools import lru_cache
+import hashlib
+import importlib.util
+import os
+import threading
+import numpy as np
+from utils.parameters import SIM_KEYS
+from utils.recorder import FlightSummary, trajectory_frame
+
+# Incrementar si cambia la interpretación de los resultados sin cambiar el código
+PHYSICS_VERSION = 1
+
+# Módulos cuyo código fuente define el resultado de una simulación
+PHYSICS_MODULES = ('utils.parameters', 'utils.euler', 'utils.integrators', 'utils.recorder',
+                   'physics.water_phase', 'physics.derivatives', 'physics.kernel',
+                   'physics.numba_backend', 'physics.thrust_table', 'main_simulation')
+
+# Opciones del integrador que solo reciben salida (no cambian el vuelo): no
+# forman parte de la clave; los eventos se guardan con la entrada
+OUTPUT_OPTIONS = ('event_log', 'stats')
+
+# Límite por defecto de la LRU en memoria
+DEFAULT_MAX_BYTES = 256 * 1024**2
+
+# Tamaño estimado de una entrada de solo resumen
+SUMMARY_BYTES = 256
+
+@lru_cache(maxsize=None)
+def physics_fingerprint():
+    """Hash de PHYSICS_VERSION y del código fuente de PHYSICS_MODULES."""
+    digest = hashlib.sha256(f"physics-v{PHYSICS_VERSION}".encode())
+    for name in PHYSICS_MODULES:
+        spec = importlib.util.find_spec(name)
+        with open(spec.origin, 'rb') as f:
+            digest.update(name.encode())
+            digest.update(f.read())
+    return digest.hexdigest()
+
+def cache_key(sim, integrator='euler', integrator_options=None, record='full', backend='numpy'):
+    """Clave de contenido de un vuelo (sim es un SimParams)."""
+    digest = hashlib.sha256(physics_fingerprint().encode())
+    for field in SIM_KEYS:
+        digest.update(float(getattr(sim, field)).hex().encode())
+    options = sorted((k, v) for k, v in (integrator_options or {}).items()
+                     if k not in OUTPUT_OPTIONS)
+    digest.update(repr((integrator, options, record, backend)).encode())
+    return digest.hexdigest()
+
+class ResultCache:
+    """
+    Caché de resultados de run_simulation: LRU en memoria limitada a
+    max_bytes y, si se indica cache_dir, un almacén en disco (un .npz por
+    clave) que sobrevive entre procesos.
+
+    Cada entrada es (data, phase, summary, events): la trayectoria (8, n) y
+    sus códigos de fase (None para los resultados de solo resumen), el
+    FlightSummary y los eventos del integrador [(nombre, t), ...].
+
+    Es segura entre hilos: la LRU y los contadores se protegen con un lock.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, cache_dir=None):
+        self.max_bytes = max_bytes
+        self.cache_dir = cache_dir
+        self.nbytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        if cache_dir is not None:
+            os.makedirs(cache_dir, exist_ok=True)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, key):
+        return key in self._entries or (self._path(key) is not None
+                                        and os.path.exists(self._path(key)))
+
+    def _path(self, key):
+        return None if self.cache_dir is None else os.path.join(self.cache_dir, key + '.npz')
+
+    @staticmethod
+    def _entry_bytes(entry):
+        data, phase, _, _ = entry
+        return SUMMARY_BYTES if data is None else data.nbytes + phase.nbytes + SUMMARY_BYTES
+
+    def _insert(self, key, entry):
+        """
+        Inserta en la LRU y expulsa las entradas más antiguas si hace falta
+        (se llama con el lock tomado).
+        """
+        if key in self._entries:
+            self.nbytes -= self._entry_bytes(self._entries.pop(key))
+        size = self._entry_bytes(entry)
+        if size > self.max_bytes:
+            return
+        self._entries[key] = entry
+        self.nbytes += size
+        while self.nbytes > self.max_bytes:
+            _, old = self._entries.popitem(last=False)
+            self.nbytes -= self._entry_bytes(old)
+
+    def _load(self, key):
+        """Lee una entrada del almacén en disco (None si no existe)."""
+        path = self._path(key)
+        if path is None or not os.path.exists(path):
+            return None
+        with np.load(path) as f:
+            summary = FlightSummary(*(float(v) for v in f['summary']))
+            events = [(str(name), float(t))
+                      for name, t in zip(f['event_names'], f['event_times'])]
+            if 'data' in f:
+                return f['data'], f['phase'], summary, events
+            return None, None, summary, events
+
+    def _save(self, key, entry):
+        """Escribe una entrada en disco de forma atómica (archivo temporal + rename)."""
+        data, phase, summary, events = entry
+        arrays = {
+            'summary': np.array(summary),
+            'event_names': np.array([name for name, _ in events], dtype=str),
+            'event_times': np.array([t for _, t in events], dtype=float),
+        }
+        if data is not None:
+            arrays.update(data=data, phase=phase)
+        path = self._path(key)
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp.npz"
+        np.savez(tmp, **arrays)
+        os.replace(tmp, path)
+
+    def lookup(self, key):
+        """
+        Retorna (resultado, resumen, eventos) o None si la clave no está en
+        memoria ni en disco. El resultado es un DataFrame nuevo o un
+        FlightSummary.
+        """
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+        if entry is None:
+            # La lectura del disco se hace fuera del lock
+            entry = self._load(key)
+            with self._lock:
+                if entry is None:
+                    self.misses += 1
+                    return None
+                self._insert(key, entry)
+                self.hits += 1
+        data, phase, summary, events = entry
+        if data is None:
+            return summary, summary, list(events)
+        # Copia: el DataFrame devuelto puede modificarse sin tocar la caché
+        return trajectory_frame(data.copy(), phase.copy()), summary, list(events)
+
+    def get(self, key):
+        """Resultado guardado para la clave, o None."""
+        found = self.lookup(key)
+        return None if found is None else found[0]
+
+    def put(self, key, recorder, events=()):
+        """
+        Guarda el resultado de un recorder de utils.recorder y los eventos
+        del integrador que lo acompañan.
+        """
+        summary = recorder.summary()
+        if hasattr(recorder, 'as_arrays'):
+            arrays = recorder.as_arrays()
+            data = np.array([arrays[name] for name in arrays if name != 'Phase'])
+            entry = (data, arrays['Phase'].copy(), summary, list(events))
+        else:
+            entry = (None, None, summary, list(events))
+        with self._lock:
+            self._insert(key, entry)
+        if self.cache_dir is not None:
+            self._save(key, entry)
+
+    def clear(self):
+        """Vacía la caché en memoria (el almacén en disco se conserva)."""
+        with self._lock:
+            self._entries.clear()
+            self.nbytes = 0
+# -----------------------------------------------------------------------------
@@ -0,0 +1,180 @@
+# 18. utils/instrumentation.py (Instrumentación Opcional del Bucle de Simulación)
+# -----------------------------------------------------------------------------
+"""
+Estadísticas de ejecución de run_simulation(..., stats=FlightStats()):
+
+- pasos y tiempo de reloj por fase del vuelo (Launch Tube, Water, Air...),
+- evaluaciones de las derivadas,
+- tiempo en la física (generador de pasos) frente al registro (fase + recorder),
+- si el vuelo alcanzó el límite de seguridad de t_max sin aterrizar,
+- opcionalmente, el perfil de cProfile o pyinstrument del vuelo.
+
+Sin stats, run_simulation ejecuta el bucle original sin ninguna medición:
+la instrumentación se aplica envolviendo el generador de pasos y el recorder.
+"""
+import contextlib
+import io
+import time
+import warnings
+from utils.recorder import PHASES
+
+# Funciones mostradas en el informe de cProfile
+PROFILE_LINES = 25
+
+class FlightStats:
+    """
+    Acumulador de estadísticas de un vuelo (se rellena en run_simulation).
+
+    profile es None, 'cprofile' o 'pyinstrument' (si no está instalado se
+    usa cProfile con una advertencia); el informe queda en profile_output.
+    """
+
+    def __init__(self, profile=None):
+        if profile not in (None, 'cprofile', 'pyinstrument'):
+            raise ValueError(f"Perfilador desconocido: {profile!r}. "
+                             "Opciones: 'cprofile', 'pyinstrument'")
+        self.profile = profile
+        self.profile_output = None
+        self.backend = None
+        self.integrator = None
+        self.cache_hit = False
+        self.steps = dict.fromkeys(PHASES, 0)
+        self.phase_time = dict.fromkeys(PHASES, 0.0)
+        self.derivative_evals = 0
+        self.physics_time = 0.0
+        self.logging_time = 0.0
+        self.total_time = 0.0
+        self.capped = False
+        self.t_end = 0.0
+
+    @property
+    def total_steps(self):
+        return sum(self.steps.values())
+
+    def as_dict(self):
+        """Estadísticas como dict serializable (JSON)."""
+        return {
+            'backend': self.backend,
+            'integrator': self.integrator,
+            'cache_hit': self.cache_hit,
+            'steps': dict(self.steps),
+            'phase_time_s': dict(self.phase_time),
+            'total_steps': self.total_steps,
+            'derivative_evals': self.derivative_evals,
+            'physics_time_s': self.physics_time,
+            'logging_time_s': self.logging_time,
+            'total_time_s': self.total_time,
+            'capped': self.capped,
+            't_end': self.t_end,
+        }
+
+    def report(self):
+        """Resumen legible de las estadísticas."""
+        lines = [f"Backend: {self.backend} / {self.integrator}"
+                 + (" (resultado de la caché)" if self.cache_hit else ""),
+                 f"{'Fase':<12} | {'Pasos':>7} | {'Tiempo (ms)':>11}"]
+        for phase in PHASES:
+            if self.steps[phase]:
+                lines.append(f"{phase:<12} | {self.steps[phase]:>7} | "
+                             f"{self.phase_time[phase] * 1e3:>11.2f}")
+        lines.append(f"Derivadas evaluadas: {self.derivative_evals}")
+        lines.append(f"Física: {self.physics_time * 1e3:.2f} ms, registro: "
+                     f"{self.logging_time * 1e3:.2f} ms, total: {self.total_time * 1e3:.2f} ms")
+        if self.capped:
+            lines.append(f"⚠ Límite de seguridad alcanzado en t = {self.t_end:.2f} s sin aterrizar")
+        return "\n".join(lines)
+
+    @contextlib.contextmanager
+    def profiling(self):
+        """Perfila el bloque con el perfilador elegido (nada si profile es None)."""
+        if self.profile is None:
+            yield
+            return
+        if self.profile == 'pyinstrument':
+            try:
+                from pyinstrument import Profiler
+            except ImportError:
+                warnings.warn("pyinstrument no está instalado; se usa cProfile",
+                              RuntimeWarning, stacklevel=4)
+            else:
+                profiler = Profiler()
+                profiler.start()
+                try:
+                    yield
+                finally:
+                    profiler.stop()
+                    self.profile_output = profiler.output_text()
+                return
+
+        import cProfile
+        import pstats
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            out = io.StringIO()
+            pstats.Stats(profiler, stream=out).sort_stats('cumulative').print_stats(PROFILE_LINES)
+            self.profile_output = out.getvalue()
+
+class StepProbe:
+    """
+    Envuelve el generador de pasos y el destino de las muestras de un vuelo
+    (utils.recorder.ChunkBuffer) para medir física y registro por separado.
+
+    El tiempo de cálculo de cada muestra y el de su registro se asignan a la
+    fase de esa muestra. Si el generador se agota (no hubo aterrizaje), el
+    vuelo alcanzó el límite de tiempo.
+    """
+
+    def __init__(self, steps, sink, stats, count_derivatives=True):
+        self._steps = steps
+        self._sink = sink
+        self._stats = stats
+        self._count_derivatives = count_derivatives
+        self._physics = 0.0
+        self._ready = 0.0
+
+    def __iter__(self):
+        clock = time.perf_counter
+        stats = self._stats
+        first = True
+        while True:
+            start = clock()
+            try:
+                item = next(self._steps)
+            except StopIteration:
+                stats.capped = True
+                return
+            self._ready = clock()
+            self._physics = self._ready - start
+            stats.physics_time += self._physics
+            # Integradores de paso fijo: una evaluación de derivadas por paso
+            if self._count_derivatives and not first:
+                stats.derivative_evals += 1
+            first = False
+            stats.t_end = item[0]
+            yield item
+
+    def __len__(self):
+        return len(self._sink)
+
+    def take(self):
+        return self._sink.take()
+
+    def append(self, *row):
+        """Registra la muestra en el destino real y la asigna a su fase."""
+        full = self._sink.append(*row)
+        now = time.perf_counter()
+        logging = now - self._ready
+        stats = self._stats
+        phase = PHASES[row[-1]]
+        stats.steps[phase] += 1
+        stats.phase_time[phase] += self._physics + logging
+        stats.logging_time += logging
+        # Una segunda muestra del mismo paso (fila 'Landed') no repite el cálculo
+        self._physics = 0.0
+        self._ready = now
+        return full
+# -----------------------------------------------------------------------------
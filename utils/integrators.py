@@ -0,0 +1,180 @@
+# 8. utils/integrators.py (Integradores Intercambiables: Euler y Dormand-Prince)
+# -----------------------------------------------------------------------------
+from collections import namedtuple
+import numpy as np
+from utils.parameters import DT
+from utils.euler import euler_step
+from physics.derivatives import derivatives
+from physics.kernel import kernel_euler_steps
+from physics.thrust_table import table_euler_steps
+
+# Evento: la componente Y[index] cruza cero en sentido descendente.
+# Si snap es True, la componente se fija exactamente a 0.0 en el evento.
+Event = namedtuple('Event', ['name', 'index', 'snap'])
+
+# Eventos del vuelo: agotamiento del agua, apogeo e impacto con el suelo
+FLIGHT_EVENTS = (
+    Event('burnout', 4, True),   # M_w -> 0
+    Event('apogee', 3, False),   # vy -> 0
+    Event('landing', 1, True),   # y -> 0
+)
+
+# --- Coeficientes de Dormand-Prince 5(4) ---
+C2, C3, C4, C5 = 1/5, 3/10, 4/5, 8/9
+A21 = 1/5
+A31, A32 = 3/40, 9/40
+A41, A42, A43 = 44/45, -56/15, 32/9
+A51, A52, A53, A54 = 19372/6561, -25360/2187, 64448/6561, -212/729
+A61, A62, A63, A64, A65 = 9017/3168, -355/33, 46732/5247, 49/176, -5103/18656
+B1, B3, B4, B5, B6 = 35/384, 500/1113, 125/192, -2187/6784, 11/84
+# Diferencia entre la solución de orden 5 y la de orden 4 (estimador de error)
+E1, E3, E4, E5, E6, E7 = 71/57600, -71/16695, 71/1920, -17253/339200, 22/525, -1/40
+
+def euler_steps(Y_0, params, dt=DT, t_max=100.0):
+    """
+    Generador de pasos de Euler con paso fijo DT.
+    Produce (t, Y) empezando por el estado inicial.
+    """
+    t = 0.0
+    Y_n = Y_0
+    while t < t_max:
+        yield t, Y_n
+        Y_n = euler_step(Y_n, params, dt)
+        # Ajuste de condiciones de frontera
+        if Y_n[4] < 0:  # M_w_n
+            Y_n[4] = 0.0
+        t += dt
+
+def dopri5_step(f, Y_n, h, k1):
+    """
+    Un paso de Dormand-Prince 5(4) para un sistema autónomo dY/dt = f(Y).
+    Retorna (Y_n1, k7, err): solución de orden 5, derivada en Y_n1 (FSAL)
+    y estimación del error local.
+    """
+    k2 = f(Y_n + h * (A21 * k1))
+    k3 = f(Y_n + h * (A31 * k1 + A32 * k2))
+    k4 = f(Y_n + h * (A41 * k1 + A42 * k2 + A43 * k3))
+    k5 = f(Y_n + h * (A51 * k1 + A52 * k2 + A53 * k3 + A54 * k4))
+    k6 = f(Y_n + h * (A61 * k1 + A62 * k2 + A63 * k3 + A64 * k4 + A65 * k5))
+    Y_n1 = Y_n + h * (B1 * k1 + B3 * k3 + B4 * k4 + B5 * k5 + B6 * k6)
+    k7 = f(Y_n1)
+    err = h * (E1 * k1 + E3 * k3 + E4 * k4 + E5 * k5 + E6 * k6 + E7 * k7)
+    return Y_n1, k7, err
+
+def _locate_event(f, Y_n, k1, h, index):
+    """
+    Busca el sub-paso s en (0, h] donde Y[index] cruza cero (Illinois sobre
+    el propio paso de Dormand-Prince). Retorna (s, Y_s) con Y_s[index] <= 0.
+    """
+    a, g_a = 0.0, Y_n[index]
+    b = h
+    Y_b = dopri5_step(f, Y_n, b, k1)[0]
+    g_b = Y_b[index]
+    side = 0
+    for _ in range(60):
+        s = (a * g_b - b * g_a) / (g_b - g_a)
+        Y_s = dopri5_step(f, Y_n, s, k1)[0]
+        g_s = Y_s[index]
+        if g_s <= 0:
+            b, g_b, Y_b = s, g_s, Y_s
+            if side == -1:
+                g_a *= 0.5
+            side = -1
+        else:
+            a, g_a = s, g_s
+            if side == 1:
+                g_b *= 0.5
+            side = 1
+        if g_b == 0 or b - a < 1e-12:
+            break
+    return b, Y_b
+
+def dopri5_steps(Y_0, params, rtol=1e-8, atol=1e-10, h0=1e-4, h_max=0.1,
+                 t_max=100.0, events=FLIGHT_EVENTS, event_log=None, stats=None):
+    """
+    Generador de pasos adaptativos de Dormand-Prince 5(4) con control de error.
+
+    Produce (t, Y) en cada paso aceptado, empezando por el estado inicial.
+    Los eventos (agotamiento del agua, apogeo, aterrizaje) se localizan con
+    precisión de raíz y se emite un punto exactamente en ellos; si event_log
+    es una lista, se le añaden tuplas (nombre, t). Si stats es un
+    utils.instrumentation.FlightStats, se cuentan las evaluaciones de las
+    derivadas (incluidas las de pasos rechazados y localización de eventos).
+    """
+    if stats is None:
+        f = lambda Y: derivatives(Y, params)
+    else:
+        def f(Y):
+            stats.derivative_evals += 1
+            return derivatives(Y, params)
+
+    t = 0.0
+    Y_n = np.array(Y_0, dtype=float)
+    k1 = f(Y_n)
+    h = h0
+    yield t, Y_n
+
+    while t < t_max:
+        h = min(h, h_max, t_max - t)
+        Y_n1, k7, err = dopri5_step(f, Y_n, h, k1)
+
+        # Norma RMS del error escalada por las tolerancias
+        scale = atol + rtol * np.maximum(np.abs(Y_n), np.abs(Y_n1))
+        err_norm = np.sqrt(np.mean((err / scale)**2))
+
+        if err_norm > 1.0:
+            h *= max(0.2, 0.9 * err_norm**-0.2)
+            continue
+
+        # Detección de eventos: primer cruce descendente de cero dentro del paso
+        fired = None
+        for event in events:
+            if Y_n[event.index] > 0 and Y_n1[event.index] <= 0:
+                s, Y_s = _locate_event(f, Y_n, k1, h, event.index)
+                if fired is None or s < fired[1]:
+                    fired = (event, s, Y_s)
+
+        if fired is not None:
+            event, s, Y_n1 = fired
+            if event.snap:
+                Y_n1[event.index] = 0.0
+            t += s
+            k7 = f(Y_n1)
+            if event_log is not None:
+                event_log.append((event.name, t))
+        else:
+            t += h
+
+        Y_n = Y_n1
+        k1 = k7
+        yield t, Y_n
+
+        factor = 5.0 if err_norm == 0 else min(5.0, max(0.2, 0.9 * err_norm**-0.2))
+        h *= factor
+
+# Registro de integradores disponibles para run_simulation
+INTEGRATORS = {
+    'euler': euler_steps,
+    'dopri5': dopri5_steps,
+}
+
+# Backends de cálculo: 'numpy' (derivatives.py), 'kernel' (núcleo escalar) y
+# 'table' (núcleo escalar con la fase de agua tabulada, physics/thrust_table.py)
+BACKENDS = {
+    'numpy': INTEGRATORS,
+    'kernel': {'euler': kernel_euler_steps},
+    'table': {'euler': table_euler_steps},
+}
+
+def get_integrator(name, backend='numpy'):
+    """Obtiene el generador de pasos registrado para el integrador y backend dados."""
+    if backend not in BACKENDS:
+        raise ValueError(f"Backend desconocido: '{backend}'. "
+                         f"Opciones: {', '.join(BACKENDS)}")
+    integrators = BACKENDS[backend]
+    try:
+        return integrators[name]
+    except KeyError:
+        raise ValueError(f"Integrador desconocido para el backend '{backend}': '{name}'. "
+                         f"Opciones: {', '.join(integrators)}") from None
+# -----------------------------------------------------------------------------
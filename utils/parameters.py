@@ -1,5 +1,7 @@
 # 1. utils/parameters.py (Constants and Unit Conversion)
 # -----------------------------------------------------------------------------
+from functools import lru_cache
+from typing import NamedTuple
 import numpy as np
 
 # --- CONSTANTES FISICAS (SI) ---
@@ -39,6 +41,13 @@ PARAMS = {
     'launch_angle_rad': 0.0 # Ángulo de lanzamiento [radianes]
 }
 
+# Claves de entrada en unidades de enseñanza (las que edita el usuario)
+INPUT_KEYS = ('p_manometric_psi', 'V_r_L', 'V_0w_L', 'A_e_cm2', 'A_r_cm2', 'M_r_g',
+              'H_tube_m', 'launch_angle_deg', 'C_D', 'A_ref_cm2')
+
+# Claves SI derivadas por convert_to_si (no se editan directamente)
+SI_KEYS = ('P_i_abs', 'V_r', 'V_0w', 'A_e', 'A_r', 'M_r', 'A_ref', 'launch_angle_rad')
+
 def convert_to_si(p):
     """Convierte los parámetros de entrada a unidades SI."""
     # Presión: psi manométricos a Pa absolutos
@@ -56,6 +65,247 @@ def convert_to_si(p):
     p['launch_angle_rad'] = np.radians(p['launch_angle_deg'])
     return p
 
+def physical_mask(p):
+    """
+    Comprueba los límites físicos de parámetros ya en SI: presión por encima
+    de la atmosférica, agua menor que la botella, boquilla menor que la
+    sección de la botella, áreas y masa positivas, C_D no negativo y ángulo
+    en (0, 90]. Acepta un dict (retorna bool) o un DataFrame (retorna una
+    máscara por fila).
+    """
+    mask = ((p['P_i_abs'] > P_ATM) & (p['V_r'] > 0) & (p['V_0w'] >= 0)
+            & (p['V_0w'] < p['V_r']) & (p['A_e'] > 0) & (p['A_e'] < p['A_r'])
+            & (p['A_ref'] > 0) & (p['M_r'] > 0) & (p['C_D'] >= 0)
+            & (p['launch_angle_rad'] > 0) & (p['launch_angle_rad'] <= np.pi / 2)
+            & (p['H_tube_m'] >= 0))
+    return bool(mask) if np.ndim(mask) == 0 else np.asarray(mask)
+
+# Campos base de SimParams: identifican un vuelo (el resto son derivados)
+SIM_KEYS = ('P_i_abs', 'V_r', 'V_0w', 'A_e', 'A_r', 'M_r', 'A_ref', 'C_D',
+            'launch_angle_rad', 'H_tube_m')
+
+class SimParams(NamedTuple):
+    """
+    Parámetros SI de una simulación, inmutables y precompilados una vez por
+    vuelo. Se pasan explícitamente a las funciones de física, de modo que
+    varias simulaciones pueden ejecutarse a la vez (hilos, asyncio) sin
+    compartir estado global.
+    """
+    P_i_abs: float          # Presión absoluta inicial [Pa]
+    V_r: float              # Volumen total de la botella [m^3]
+    V_0w: float             # Volumen inicial de agua [m^3]
+    A_e: float              # Área de la boquilla [m^2]
+    A_r: float              # Área interna botella [m^2]
+    M_r: float              # Masa seca del cohete [kg]
+    A_ref: float            # Área de referencia para arrastre [m^2]
+    C_D: float              # Coeficiente de arrastre
+    launch_angle_rad: float # Ángulo de lanzamiento [radianes]
+    H_tube_m: float         # Longitud del tubo de lanzamiento [m]
+    # Constantes derivadas por vuelo
+    V_air_0: float          # Volumen inicial de aire [m^3]
+    Area_Factor: float      # A_r^2 / (A_r^2 - A_e^2)
+    cos_angle: float        # cos(launch_angle_rad)
+    sin_angle: float        # sin(launch_angle_rad)
+    # Constantes del núcleo escalar (physics/kernel.py)
+    P_V_gamma: float        # P_i * V_air_0^GAMMA (invariante adiabático)
+    drag_k: float           # 0.5 * RHO_AIR * C_D * A_ref
+    rho_A_e: float          # RHO_W * A_e
+    K_pressure: float       # 2 * Area_Factor / RHO_W
+    K_gravity: float        # 2 * G * Area_Factor / (RHO_W * A_r)
+
+def compile_params(params):
+    """
+    Precompila un diccionario de parámetros (ya en SI) en un SimParams. Un
+    RocketParams ya trae el suyo compilado.
+    """
+    if isinstance(params, RocketParams):
+        return params.sim
+    A_r = float(params['A_r'])
+    A_e = float(params['A_e'])
+    angle = float(params['launch_angle_rad'])
+    V_air_0 = float(params['V_r']) - float(params['V_0w'])
+    Area_Factor = A_r**2 / (A_r**2 - A_e**2)
+    return SimParams(
+        P_i_abs=float(params['P_i_abs']),
+        V_r=float(params['V_r']),
+        V_0w=float(params['V_0w']),
+        A_e=A_e,
+        A_r=A_r,
+        M_r=float(params['M_r']),
+        A_ref=float(params['A_ref']),
+        C_D=float(params['C_D']),
+        launch_angle_rad=angle,
+        H_tube_m=float(params['H_tube_m']),
+        V_air_0=V_air_0,
+        Area_Factor=Area_Factor,
+        cos_angle=float(np.cos(angle)),
+        sin_angle=float(np.sin(angle)),
+        P_V_gamma=float(params['P_i_abs']) * V_air_0**GAMMA,
+        drag_k=0.5 * RHO_AIR * float(params['C_D']) * float(params['A_ref']),
+        rho_A_e=RHO_W * A_e,
+        K_pressure=2.0 * Area_Factor / RHO_W,
+        K_gravity=2.0 * G * Area_Factor / (RHO_W * A_r),
+    )
+
+@lru_cache(maxsize=256)
+def _compile_values(values):
+    """Precompila los valores de SIM_KEYS (memorizado por contenido)."""
+    return compile_params(dict(zip(SIM_KEYS, values)))
+
+def as_sim_params(params=None):
+    """
+    Normaliza los parámetros de las funciones de física: acepta un SimParams
+    (se usa tal cual), un diccionario SI o None (el contenido actual de
+    PARAMS, así que sus cambios posteriores se respetan).
+
+    Un diccionario se precompila una vez por contenido (memoria LRU), pero
+    aun así cada llamada recorre sus claves: los bucles críticos deben
+    compilar en la frontera de la API (compile_params) y pasar el SimParams.
+    """
+    if isinstance(params, SimParams):
+        return params
+    if isinstance(params, RocketParams):
+        return params.sim
+    if params is None:
+        params = PARAMS
+    values = tuple(params[key] for key in SIM_KEYS)
+    try:
+        return _compile_values(values)
+    except TypeError:
+        # Valores no hashables (p. ej. arrays): sin memoria
+        return compile_params(params)
+
+class ParameterError(ValueError):
+    """Parámetros de diseño fuera de los límites físicos."""
+
+# Límites de las entradas (en unidades de enseñanza), los de physical_mask
+_LIMITS = (
+    (lambda p: p['p_manometric_psi'] > 0, "p_manometric_psi debe ser positiva"),
+    (lambda p: p['V_r_L'] > 0, "V_r_L debe ser positivo"),
+    (lambda p: 0 <= p['V_0w_L'] < p['V_r_L'], "V_0w_L debe estar en [0, V_r_L)"),
+    (lambda p: 0 < p['A_e_cm2'] < p['A_r_cm2'], "A_e_cm2 debe estar en (0, A_r_cm2)"),
+    (lambda p: p['A_ref_cm2'] > 0, "A_ref_cm2 debe ser positiva"),
+    (lambda p: p['M_r_g'] > 0, "M_r_g debe ser positiva"),
+    (lambda p: p['C_D'] >= 0, "C_D no puede ser negativo"),
+    (lambda p: 0 < p['launch_angle_deg'] <= 90, "launch_angle_deg debe estar en (0, 90]"),
+    (lambda p: p['H_tube_m'] >= 0, "H_tube_m no puede ser negativa"),
+)
+
+# Cifras significativas de las entradas reconstruidas desde SI (from_si)
+SI_ROUND_DIGITS = 12
+
+def _restore_params(cls, values, sim):
+    """Reconstruye un RocketParams serializado sin volver a validarlo."""
+    self = object.__new__(cls)
+    for key, value in zip(INPUT_KEYS, values):
+        object.__setattr__(self, key, value)
+    object.__setattr__(self, 'sim', sim)
+    object.__setattr__(self, '_hash', hash(values))
+    return self
+
+class RocketParams:
+    """
+    Parámetros de diseño de un cohete, inmutables y validados una sola vez.
+
+    Se construye con las claves de INPUT_KEYS en unidades de enseñanza (las
+    que falten se toman de PARAMS), con from_dict desde un diccionario tipo
+    PARAMS o con from_si desde valores SI. Al construirlo se comprueban los
+    límites físicos (ParameterError) y se precompila su SimParams (sim), que
+    run_simulation y la física usan sin volver a convertir nada.
+
+    Se compara y se hashea por sus valores de entrada, y se serializa con
+    pickle sin repetir la validación: sirve como clave de caché y para
+    enviarse a los procesos trabajadores. params[clave] acepta también las
+    claves SI, así que puede pasarse donde antes se pasaba PARAMS.
+    """
+    __slots__ = INPUT_KEYS + ('sim', '_hash')
+
+    def __init__(self, **values):
+        unknown = [key for key in values if key not in INPUT_KEYS]
+        if unknown:
+            raise TypeError(f"Claves de entrada desconocidas: {', '.join(unknown)}")
+        inputs = {key: float(values.get(key, PARAMS[key])) for key in INPUT_KEYS}
+        if all(np.isfinite(value) for value in inputs.values()):
+            problems = [message for check, message in _LIMITS if not check(inputs)]
+        else:
+            problems = ["los valores deben ser finitos"]
+        if problems:
+            raise ParameterError("Parámetros inválidos: " + "; ".join(problems))
+        for key, value in inputs.items():
+            object.__setattr__(self, key, value)
+        object.__setattr__(self, 'sim', compile_params(convert_to_si(dict(inputs))))
+        object.__setattr__(self, '_hash', hash(self.values))
+
+    @classmethod
+    def from_dict(cls, params):
+        """Desde un diccionario tipo PARAMS (se leen solo las claves de entrada)."""
+        return cls(**{key: params[key] for key in INPUT_KEYS if key in params})
+
+    @classmethod
+    def from_si(cls, params):
+        """
+        Desde valores SI (diccionario con las claves de SIM_KEYS o un
+        SimParams); las claves derivadas se recalculan. Las entradas se
+        redondean a SI_ROUND_DIGITS cifras significativas para deshacer el
+        error de la conversión de ida y vuelta: from_si(p.sim) == p.
+        """
+        get = params.__getitem__ if isinstance(params, dict) else params.__getattribute__
+        values = {'p_manometric_psi': (get('P_i_abs') - P_ATM) / 6894.76,
+                  'V_r_L': get('V_r') * 1000.0,
+                  'V_0w_L': get('V_0w') * 1000.0,
+                  'A_e_cm2': get('A_e') * 10000.0,
+                  'A_r_cm2': get('A_r') * 10000.0,
+                  'M_r_g': get('M_r') * 1000.0,
+                  'H_tube_m': get('H_tube_m'),
+                  'launch_angle_deg': np.degrees(get('launch_angle_rad')),
+                  'C_D': get('C_D'),
+                  'A_ref_cm2': get('A_ref') * 10000.0}
+        return cls(**{key: float(f"{float(value):.{SI_ROUND_DIGITS}g}")
+                      for key, value in values.items()})
+
+    @property
+    def values(self):
+        """Valores de entrada en el orden de INPUT_KEYS."""
+        return tuple(getattr(self, key) for key in INPUT_KEYS)
+
+    def replace(self, **changes):
+        """Copia con algunas entradas cambiadas (validada de nuevo)."""
+        return type(self)(**{**dict(zip(INPUT_KEYS, self.values)), **changes})
+
+    def to_dict(self):
+        """Diccionario nuevo tipo PARAMS (entradas y claves SI), libre de modificar."""
+        return {key: self[key] for key in PARAMS}
+
+    def __getitem__(self, key):
+        if key in INPUT_KEYS:
+            return getattr(self, key)
+        if key in SimParams._fields:
+            return getattr(self.sim, key)
+        raise KeyError(key)
+
+    def __setattr__(self, key, value):
+        raise AttributeError(f"{type(self).__name__} es inmutable: use replace()")
+
+    def __delattr__(self, key):
+        raise AttributeError(f"{type(self).__name__} es inmutable")
+
+    def __eq__(self, other):
+        if not isinstance(other, RocketParams):
+            return NotImplemented
+        return self.values == other.values
+
+    def __hash__(self):
+        return self._hash
+
+    def __reduce__(self):
+        return _restore_params, (type(self), self.values, self.sim)
+
+    def __repr__(self):
+        values = ", ".join(f"{key}={value!r}" for key, value in zip(INPUT_KEYS, self.values))
+        return f"{type(self).__name__}({values})"
+
 # Inicializa los parámetros en SI para la primera ejecución
 PARAMS = convert_to_si(PARAMS)
+# SimParams de PARAMS tal como se define en este archivo (valores de importación)
+DEFAULT_SIM_PARAMS = compile_params(PARAMS)
 # -----------------------------------------------------------------------------
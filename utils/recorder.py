@@ -0,0 +1,326 @@
+# 9. utils/recorder.py (Registro Columnar Preasignado de la Trayectoria)
+# -----------------------------------------------------------------------------
+from functools import lru_cache
+from typing import NamedTuple
+import numpy as np
+
+# Columnas numéricas registradas en cada paso (mismo esquema que el DataFrame histórico)
+COLUMNS = ('Time', 'X_Position', 'Y_Position', 'X_Velocity', 'Y_Velocity',
+           'Total_Velocity', 'Water Mass', 'Pressure')
+
+# Tabla de categorías de fase: la columna 'Phase' se guarda como código int8
+PHASES = ('Launch Tube', 'Water', 'Air', 'Ballistic', 'Landed')
+PHASE_CODES = {name: code for code, name in enumerate(PHASES)}
+
+@lru_cache(maxsize=None)
+def phase_dtype():
+    """
+    Tipo categórico de la columna 'Phase'. Se crea al pedirlo: importar
+    pandas cuesta cientos de ms y las simulaciones de solo resumen no lo
+    necesitan.
+    """
+    import pandas as pd
+    return pd.CategoricalDtype(PHASES)
+
+def __getattr__(name):
+    # Compatibilidad: utils.recorder.PHASE_DTYPE sigue disponible (perezoso)
+    if name == 'PHASE_DTYPE':
+        return phase_dtype()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+# Umbral de masa de agua para considerar el agua agotada (igual que plot_results)
+EMPTY_WATER_MASS = 1e-4
+
+def trajectory_frame(data, phase):
+    """
+    DataFrame de trayectoria a partir de un bloque (8, n) en el orden de
+    COLUMNS y los códigos de fase, sin copiar las columnas numéricas.
+    """
+    import pandas as pd
+    arrays = {name: data[i] for i, name in enumerate(COLUMNS)}
+    # Los códigos provienen de PHASE_CODES: no hace falta validarlos
+    arrays['Phase'] = pd.Categorical.from_codes(phase, dtype=phase_dtype(), validate=False)
+    return pd.DataFrame(arrays, copy=False)
+
+class FlightSummary(NamedTuple):
+    """Métricas de resumen de un vuelo."""
+    max_height: float      # Apogeo [m]
+    max_range: float       # Alcance horizontal máximo [m]
+    max_velocity: float    # Velocidad total máxima [m/s]
+    burnout_time: float    # Tiempo de vaciado del agua [s]
+    flight_time: float     # Tiempo total de vuelo [s]
+
+    def as_row(self):
+        """Retorna las métricas con los nombres de columna de run_simulation_batch."""
+        return {
+            'Max_Height': self.max_height,
+            'Max_Range': self.max_range,
+            'Max_Velocity': self.max_velocity,
+            'Burnout_Time': self.burnout_time,
+            'Flight_Time': self.flight_time,
+        }
+
+class TrajectoryRecorder:
+    """
+    Registra la trayectoria en buffers NumPy preasignados que crecen por
+    duplicación, en lugar de una lista de dicts por paso.
+
+    Cada columna numérica es una fila contigua de un buffer (8, capacidad);
+    la fase se guarda como un código pequeño indexado en PHASES.
+    """
+
+    def __init__(self, capacity=4096):
+        self._data = np.empty((len(COLUMNS), capacity))
+        self._phase = np.empty(capacity, dtype=np.int8)
+        self._n = 0
+
+    def __len__(self):
+        return self._n
+
+    def _grow(self):
+        """Duplica la capacidad de los buffers conservando los datos."""
+        capacity = 2 * self._data.shape[1]
+        data = np.empty((len(COLUMNS), capacity))
+        data[:, :self._n] = self._data[:, :self._n]
+        phase = np.empty(capacity, dtype=np.int8)
+        phase[:self._n] = self._phase[:self._n]
+        self._data = data
+        self._phase = phase
+
+    def append(self, t, x, y, vx, vy, v_total, M_w, P, phase_code):
+        """Añade una muestra (valores en el orden de COLUMNS y el código de fase)."""
+        if self._n == self._data.shape[1]:
+            self._grow()
+        self._data[:, self._n] = (t, x, y, vx, vy, v_total, M_w, P)
+        self._phase[self._n] = phase_code
+        self._n += 1
+
+    def extend(self, data, phase):
+        """
+        Añade un bloque de muestras: data con forma (8, n) en el orden de
+        COLUMNS y phase con los n códigos de fase.
+        """
+        n = data.shape[1]
+        while self._n + n > self._data.shape[1]:
+            self._grow()
+        self._data[:, self._n:self._n + n] = data
+        self._phase[self._n:self._n + n] = phase
+        self._n += n
+
+    def as_arrays(self):
+        """
+        Retorna un dict {columna: array} con vistas (sin copia) de los datos
+        registrados. 'Phase' contiene los códigos int8 (ver PHASES).
+        """
+        arrays = {name: self._data[i, :self._n] for i, name in enumerate(COLUMNS)}
+        arrays['Phase'] = self._phase[:self._n]
+        return arrays
+
+    def to_dataframe(self):
+        """
+        Construye el DataFrame de resultados sin copiar las columnas numéricas.
+        'Phase' se expone como categórica con las etiquetas de PHASES.
+        """
+        return trajectory_frame(self._data[:, :self._n], self._phase[:self._n])
+
+    def result(self):
+        """Resultado de run_simulation para esta política: el DataFrame."""
+        return self.to_dataframe()
+
+    def summary(self):
+        """Calcula las métricas de resumen a partir de las muestras registradas."""
+        arrays = self.as_arrays()
+        empty = np.flatnonzero(arrays['Water Mass'] <= EMPTY_WATER_MASS)
+        return FlightSummary(
+            max_height=float(arrays['Y_Position'].max()),
+            max_range=float(arrays['X_Position'].max()),
+            max_velocity=float(arrays['Total_Velocity'].max()),
+            burnout_time=float(arrays['Time'][empty[0]]) if empty.size else 0.0,
+            flight_time=float(arrays['Time'][-1]),
+        )
+
+class DecimatedRecorder(TrajectoryRecorder):
+    """
+    Registro columnar que solo guarda un subconjunto de las muestras:
+    cada N-ésima (every), una cada 'interval' segundos, o solo los cambios
+    de fase (transitions_only). La primera muestra y la fila 'Landed' se
+    guardan siempre.
+    """
+
+    def __init__(self, every=None, interval=None, transitions_only=False, capacity=1024):
+        super().__init__(capacity)
+        self.every = every
+        self.interval = interval
+        self.transitions_only = transitions_only
+        self._seen = 0
+        self._last_t = -np.inf
+        self._last_phase = -1
+
+    def append(self, t, x, y, vx, vy, v_total, M_w, P, phase_code):
+        seen = self._seen
+        self._seen += 1
+        changed = phase_code != self._last_phase
+        self._last_phase = phase_code
+
+        if seen > 0 and phase_code != PHASE_CODES['Landed']:
+            if self.transitions_only and not changed:
+                return
+            if self.every is not None and seen % self.every != 0:
+                return
+            if self.interval is not None and t - self._last_t < self.interval:
+                return
+
+        self._last_t = t
+        super().append(t, x, y, vx, vy, v_total, M_w, P, phase_code)
+
+    def extend(self, data, phase):
+        """Añade un bloque de muestras aplicando la misma política que append."""
+        n = data.shape[1]
+        if n == 0:
+            return
+        if self.interval is not None:
+            # Cada muestra depende de la última guardada: recorrido secuencial
+            for i in range(n):
+                self.append(*data[:, i].tolist(), int(phase[i]))
+            return
+        seen = self._seen + np.arange(n)
+        keep = np.ones(n, dtype=bool)
+        if self.transitions_only:
+            keep &= phase != np.concatenate(([self._last_phase], phase[:-1]))
+        if self.every is not None:
+            keep &= seen % self.every == 0
+        keep |= (seen == 0) | (phase == PHASE_CODES['Landed'])
+        self._seen += n
+        self._last_phase = int(phase[-1])
+        if keep.any():
+            self._last_t = float(data[0, np.flatnonzero(keep)[-1]])
+            super().extend(data[:, keep], phase[keep])
+
+class ChunkBuffer:
+    """
+    Bloques de muestras para iter_simulation: append retorna True cuando el
+    bloque está lleno y take lo entrega como (data (8, n), códigos de fase)
+    en arrays nuevos. El primer bloque tiene first muestras, para entregar
+    el estado inicial enseguida.
+
+    Las muestras se acumulan como tuplas en una lista (mucho más barato por
+    paso que escribir columnas NumPy) y se convierten una vez por bloque.
+    """
+
+    def __init__(self, size, first=1):
+        self.size = size
+        self._capacity = first
+        self._rows = []
+        self._phase = []
+
+    def __len__(self):
+        return len(self._rows)
+
+    def append(self, t, x, y, vx, vy, v_total, M_w, P, phase_code):
+        """Añade una muestra; retorna True si el bloque quedó lleno."""
+        self._rows.append((t, x, y, vx, vy, v_total, M_w, P))
+        self._phase.append(phase_code)
+        return len(self._rows) == self._capacity
+
+    def take(self):
+        """Entrega el bloque actual y empieza uno nuevo de tamaño size."""
+        data = np.array(self._rows, dtype=float).reshape(-1, len(COLUMNS)).T.copy()
+        phase = np.array(self._phase, dtype=np.int8)
+        self._rows = []
+        self._phase = []
+        self._capacity = self.size
+        return data, phase
+
+class SummaryRecorder:
+    """
+    Acumula en línea las métricas de resumen sin guardar la trayectoria
+    (memoria O(1) por vuelo). Tiene la misma interfaz append que
+    TrajectoryRecorder.
+    """
+
+    def __init__(self):
+        self.max_height = -np.inf
+        self.max_range = -np.inf
+        self.max_velocity = -np.inf
+        self.burnout_time = None
+        self.flight_time = 0.0
+        self._n = 0
+
+    def __len__(self):
+        return self._n
+
+    def append(self, t, x, y, vx, vy, v_total, M_w, P, phase_code):
+        if y > self.max_height:
+            self.max_height = y
+        if x > self.max_range:
+            self.max_range = x
+        if v_total > self.max_velocity:
+            self.max_velocity = v_total
+        if self.burnout_time is None and M_w <= EMPTY_WATER_MASS:
+            self.burnout_time = t
+        self.flight_time = t
+        self._n += 1
+
+    def extend(self, data, phase):
+        """Acumula un bloque de muestras (forma (8, n)) de forma vectorizada."""
+        if data.shape[1] == 0:
+            return
+        t, x, y, _, _, v_total, M_w, _ = data
+        self.max_height = max(self.max_height, float(y.max()))
+        self.max_range = max(self.max_range, float(x.max()))
+        self.max_velocity = max(self.max_velocity, float(v_total.max()))
+        if self.burnout_time is None:
+            empty = np.flatnonzero(M_w <= EMPTY_WATER_MASS)
+            if empty.size:
+                self.burnout_time = float(t[empty[0]])
+        self.flight_time = float(t[-1])
+        self._n += data.shape[1]
+
+    def absorb(self, summary, n_samples=0):
+        """Incorpora un FlightSummary ya calculado (p. ej. por el backend Numba)."""
+        self.max_height = max(self.max_height, summary.max_height)
+        self.max_range = max(self.max_range, summary.max_range)
+        self.max_velocity = max(self.max_velocity, summary.max_velocity)
+        if self.burnout_time is None:
+            self.burnout_time = summary.burnout_time
+        self.flight_time = summary.flight_time
+        self._n += n_samples
+
+    def summary(self):
+        """Retorna las métricas acumuladas como FlightSummary."""
+        return FlightSummary(
+            max_height=float(self.max_height),
+            max_range=float(self.max_range),
+            max_velocity=float(self.max_velocity),
+            burnout_time=float(self.burnout_time) if self.burnout_time is not None else 0.0,
+            flight_time=float(self.flight_time),
+        )
+
+    def result(self):
+        """Resultado de run_simulation para esta política: el FlightSummary."""
+        return self.summary()
+
+def make_recorder(record='full'):
+    """
+    Crea el registrador correspondiente a una política de registro:
+
+    - 'full':            todas las muestras (DataFrame completo)
+    - ('every', N):      una de cada N muestras
+    - ('interval', dt):  como máximo una muestra cada dt segundos
+    - 'transitions':     solo las muestras donde cambia la fase
+    - 'summary':         sin trayectoria; retorna un FlightSummary
+    """
+    if record == 'full':
+        return TrajectoryRecorder()
+    if record == 'summary':
+        return SummaryRecorder()
+    if record == 'transitions':
+        return DecimatedRecorder(transitions_only=True)
+    if isinstance(record, tuple) and len(record) == 2:
+        mode, value = record
+        if mode == 'every' and int(value) >= 1:
+            return DecimatedRecorder(every=int(value))
+        if mode == 'interval' and value > 0:
+            return DecimatedRecorder(interval=float(value))
+    raise ValueError(f"Política de registro desconocida: {record!r}")
+# -----------------------------------------------------------------------------
@@ -0,0 +1,340 @@
+# 20. utils/results_store.py (Almacén Columnar de Resultados)
+# -----------------------------------------------------------------------------
+"""
+Almacén persistente de resultados de barridos y Monte Carlo: una fila de
+resumen por vuelo y, opcionalmente, su trayectoria completa (.rtraj).
+
+Las filas se guardan en un dataset columnar particionado al estilo Hive:
+
+    root/sweep_id=<id>/[clave=valor/...]part-<ns>-<hex>.<parquet|npz>
+
+Cada parte va acompañada de un .json con su número de filas y el mínimo y
+máximo de cada columna numérica. Las consultas aplican los filtros en tres
+niveles antes de leer datos: valores de partición, estadísticas de cada
+parte y, por último, filas (solo de las columnas necesarias). Así puede
+consultarse un historial de millones de vuelos parte a parte (iter_query)
+sin cargarlo entero en memoria.
+
+Con pyarrow instalado las partes son Parquet; sin él, .npz de NumPy (mismo
+diseño, mismas consultas). Las escrituras se agrupan en memoria hasta
+reunir batch_rows filas pendientes y cada parte se vuelca de forma atómica.
+"""
+import glob
+import json
+import operator
+import os
+import threading
+import time
+import uuid
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    HAVE_PYARROW = True
+except ImportError:
+    HAVE_PYARROW = False
+
+# Filas acumuladas por partición antes de escribir una parte
+DEFAULT_BATCH_ROWS = 50000
+
+# Operadores de los filtros (columna, operador, valor)
+OPERATORS = {'==': operator.eq, '!=': operator.ne, '<': operator.lt,
+             '<=': operator.le, '>': operator.gt, '>=': operator.ge}
+
+def _partition_value(text):
+    """Valor de un directorio clave=valor (número si se puede convertir)."""
+    try:
+        return float(text)
+    except ValueError:
+        return text
+
+def _matches(value, op, target):
+    """Evalúa un filtro sobre un valor escalar o un array (máscara)."""
+    if op == 'in':
+        return np.isin(value, list(target))
+    if op == 'between':
+        return (value >= target[0]) & (value <= target[1])
+    return OPERATORS[op](value, target)
+
+def _may_match(low, high, op, target):
+    """Si alguna fila con valores en [low, high] puede cumplir el filtro."""
+    if op == '==':
+        return low <= target <= high
+    if op == '!=':
+        return not low == high == target
+    if op in ('<', '<='):
+        return OPERATORS[op](low, target)
+    if op in ('>', '>='):
+        return OPERATORS[op](high, target)
+    if op == 'between':
+        return high >= target[0] and low <= target[1]
+    return any(low <= value <= high for value in target)
+
+def _check_filters(filters):
+    filters = [tuple(f) for f in filters or ()]
+    for column, op, _ in filters:
+        if op not in OPERATORS and op not in ('in', 'between'):
+            raise ValueError(f"Operador desconocido en el filtro de {column!r}: {op!r}")
+    return filters
+
+class ResultsStore:
+    """
+    Dataset particionado de resultados en el directorio root.
+
+    partition_by son columnas (además de sweep_id) cuyos valores forman
+    directorios; conviene usarlo solo para columnas con pocos valores
+    distintos. engine es 'parquet' o 'npz' (por defecto 'parquet' si
+    pyarrow está instalado).
+
+    Un mismo sweep_id no debe recibir filas de dos almacenes a la vez (los
+    Run_Id se numeran por proceso); distintos barridos sí pueden escribirse
+    en paralelo.
+    """
+
+    def __init__(self, root, partition_by=(), batch_rows=DEFAULT_BATCH_ROWS, engine=None):
+        if engine is None:
+            engine = 'parquet' if HAVE_PYARROW else 'npz'
+        if engine not in ('parquet', 'npz'):
+            raise ValueError(f"Formato desconocido: {engine!r}. Opciones: parquet, npz")
+        if engine == 'parquet' and not HAVE_PYARROW:
+            raise ImportError("El formato 'parquet' necesita pyarrow")
+        self.root = os.fspath(root)
+        self.partition_by = tuple(partition_by)
+        self.batch_rows = batch_rows
+        self.engine = engine
+        self._pending = {}
+        self._pending_rows = 0
+        self._next_run = {}
+        self._lock = threading.Lock()
+        os.makedirs(self.root, exist_ok=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.flush()
+
+    # --- Escritura ---
+
+    def new_sweep(self, kind='sweep', sweep_id=None, **metadata):
+        """
+        Registra un barrido (tipo, fecha, versión de la física y metadata
+        serializable en JSON) y retorna su sweep_id.
+        """
+        from utils.cache import physics_fingerprint
+
+        if sweep_id is None:
+            sweep_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}"
+        directory = self._sweep_dir(sweep_id)
+        os.makedirs(directory, exist_ok=True)
+        info = {'sweep_id': sweep_id, 'kind': kind,
+                'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                'physics_fingerprint': physics_fingerprint(), **metadata}
+        tmp = os.path.join(directory, f"_sweep.{uuid.uuid4().hex}.tmp")
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(info, f, indent=2, default=str)
+        os.replace(tmp, os.path.join(directory, '_sweep.json'))
+        return sweep_id
+
+    def append(self, rows, sweep_id, trajectories=None):
+        """
+        Añade filas de resumen (DataFrame o lista de dicts) al barrido y
+        retorna sus Run_Id. trajectories es una lista opcional, alineada con
+        las filas, de DataFrames de run_simulation (o None) que se guardan
+        como .rtraj. Si V_0w y V_r están presentes se añade Fill_Fraction.
+
+        Las filas quedan en memoria hasta reunir batch_rows pendientes (o
+        hasta flush/close).
+        """
+        frame = pd.DataFrame(rows).reset_index(drop=True)
+        for key in self.partition_by:
+            if key not in frame:
+                # Filas sin la columna de partición: directorio clave=nan
+                frame[key] = np.nan
+        if 'V_0w' in frame and 'V_r' in frame and 'Fill_Fraction' not in frame:
+            frame['Fill_Fraction'] = frame['V_0w'] / frame['V_r']
+
+        with self._lock:
+            if sweep_id not in self._next_run:
+                self._next_run[sweep_id] = self._count_rows(sweep_id)
+            first = self._next_run[sweep_id]
+            self._next_run[sweep_id] = first + len(frame)
+        run_ids = np.arange(first, first + len(frame), dtype=np.int64)
+        frame.insert(0, 'Run_Id', run_ids)
+
+        if trajectories is not None:
+            from utils.trajectory_file import write_trajectory
+            directory = os.path.join(self._sweep_dir(sweep_id), 'trajectories')
+            os.makedirs(directory, exist_ok=True)
+            for run_id, df in zip(run_ids, trajectories):
+                if df is not None:
+                    write_trajectory(os.path.join(directory, f"run-{run_id}.rtraj"), df)
+
+        groups = (frame.groupby(list(self.partition_by), sort=False, dropna=False)
+                  if self.partition_by else [((), frame)])
+        with self._lock:
+            for values, group in groups:
+                values = values if isinstance(values, tuple) else (values,)
+                self._pending.setdefault((sweep_id, values), []).append(group)
+                self._pending_rows += len(group)
+            full = self._pending_rows >= self.batch_rows
+        if full:
+            self.flush()
+        return run_ids
+
+    def flush(self):
+        """Escribe todas las filas pendientes (una parte por partición)."""
+        with self._lock:
+            pending, self._pending, self._pending_rows = self._pending, {}, 0
+        for (sweep_id, values), groups in pending.items():
+            frame = pd.concat(groups, ignore_index=True).drop(columns=list(self.partition_by))
+            directory = self._sweep_dir(sweep_id)
+            for key, value in zip(self.partition_by, values):
+                if isinstance(value, float):
+                    value = repr(float(value))
+                directory = os.path.join(directory, f"{key}={value}")
+            self._write_part(directory, frame)
+
+    close = flush
+
+    def _write_part(self, directory, frame):
+        """Escribe una parte y su .json de estadísticas (este último al final)."""
+        os.makedirs(directory, exist_ok=True)
+        stem = f"part-{time.time_ns()}-{uuid.uuid4().hex[:8]}"
+        columns = {name: frame[name].to_numpy() for name in frame}
+        for name, values in columns.items():
+            if values.dtype == object:
+                columns[name] = values.astype(str)
+        path = os.path.join(directory, f"{stem}.{self.engine}")
+        tmp = os.path.join(directory, f".{stem}.tmp.{self.engine}")
+        if self.engine == 'parquet':
+            pq.write_table(pa.table(columns), tmp)
+        else:
+            np.savez(tmp, **columns)
+        os.replace(tmp, path)
+
+        stats = {'rows': len(frame), 'file': os.path.basename(path),
+                 'columns': list(columns), 'min': {}, 'max': {}}
+        for name, values in columns.items():
+            if values.dtype.kind in 'biuf' and len(values):
+                finite = values[~np.isnan(values)] if values.dtype.kind == 'f' else values
+                if len(finite):
+                    stats['min'][name] = finite.min().item()
+                    stats['max'][name] = finite.max().item()
+        with open(os.path.join(directory, f".{stem}.tmp.json"), 'w', encoding='utf-8') as f:
+            json.dump(stats, f)
+        os.replace(os.path.join(directory, f".{stem}.tmp.json"),
+                   os.path.join(directory, f"{stem}.json"))
+
+    # --- Lectura ---
+
+    def _sweep_dir(self, sweep_id):
+        return os.path.join(self.root, f"sweep_id={sweep_id}")
+
+    def _parts(self, sweep_id='*'):
+        """[(ruta del .json, {columna de partición: valor})] de las partes escritas."""
+        parts = []
+        pattern = os.path.join(self._sweep_dir(sweep_id), '**', 'part-*.json')
+        for path in sorted(glob.glob(pattern, recursive=True)):
+            relative = os.path.relpath(os.path.dirname(path), self.root)
+            values = {}
+            for piece in relative.split(os.sep):
+                key, _, text = piece.partition('=')
+                values[key] = text if key == 'sweep_id' else _partition_value(text)
+            parts.append((path, values))
+        return parts
+
+    def _count_rows(self, sweep_id):
+        total = 0
+        for path, _ in self._parts(sweep_id):
+            with open(path, encoding='utf-8') as f:
+                total += json.load(f)['rows']
+        return total
+
+    def sweeps(self):
+        """Metadatos de los barridos registrados (new_sweep), por fecha."""
+        infos = []
+        for path in glob.glob(os.path.join(self.root, 'sweep_id=*', '_sweep.json')):
+            with open(path, encoding='utf-8') as f:
+                infos.append(json.load(f))
+        return sorted(infos, key=lambda info: info['created'])
+
+    def iter_query(self, filters=None, columns=None, stats=None):
+        """
+        Genera DataFrames (uno por parte) con las filas que cumplen todos los
+        filtros. filters es una lista de (columna, operador, valor) con
+        operadores ==, !=, <, <=, >, >=, 'in' (valor iterable) y 'between'
+        (valor (mín, máx), inclusivo). columns limita las columnas leídas
+        (las de partición siempre se incluyen). stats, si es un dict, cuenta
+        'parts_total', 'parts_read' y 'rows_read'.
+        """
+        filters = _check_filters(filters)
+        counters = stats if stats is not None else {}
+        for key in ('parts_total', 'parts_read', 'rows_read'):
+            counters.setdefault(key, 0)
+
+        for stats_path, values in self._parts():
+            counters['parts_total'] += 1
+            # 1. Poda por valores de partición
+            if not all(_matches(values[c], op, v) for c, op, v in filters if c in values):
+                continue
+            with open(stats_path, encoding='utf-8') as f:
+                part = json.load(f)
+            # 2. Poda por estadísticas de la parte: columnas ausentes o cuyo
+            #    rango no puede cumplir el filtro
+            row_filters = [(c, op, v) for c, op, v in filters if c not in values]
+            if not all(c in part['columns'] and (
+                    c not in part['min']
+                    or _may_match(part['min'][c], part['max'][c], op, v))
+                       for c, op, v in row_filters):
+                continue
+
+            # 3. Lectura de las columnas necesarias y filtrado por filas
+            needed = None
+            if columns is not None:
+                needed = list(dict.fromkeys([c for c in columns if c not in values]
+                                            + [c for c, _, _ in row_filters]))
+            frame = self._read_part(os.path.join(os.path.dirname(stats_path), part['file']),
+                                    needed)
+            counters['parts_read'] += 1
+            counters['rows_read'] += len(frame)
+            mask = np.ones(len(frame), dtype=bool)
+            for column, op, value in row_filters:
+                mask &= np.asarray(_matches(frame[column].to_numpy(), op, value))
+            frame = frame[mask]
+            if columns is not None:
+                frame = frame.reindex(columns=[c for c in columns if c not in values])
+            if frame.empty:
+                continue
+            yield frame.assign(**values)
+
+    def query(self, filters=None, columns=None):
+        """
+        DataFrame con las filas que cumplen los filtros (ver iter_query). Las
+        partes leídas se guardan en df.attrs['scan'].
+        """
+        scan = {}
+        frames = list(self.iter_query(filters, columns, scan))
+        df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=columns)
+        df.attrs['scan'] = scan
+        return df
+
+    def _read_part(self, path, columns=None):
+        if path.endswith('.parquet'):
+            if columns is not None:
+                columns = [c for c in columns if c in pq.read_schema(path).names]
+            return pq.read_table(path, columns=columns).to_pandas()
+        with np.load(path) as f:
+            names = f.files if columns is None else [c for c in columns if c in f.files]
+            return pd.DataFrame({name: f[name] for name in names})
+
+    def trajectory(self, sweep_id, run_id):
+        """Trayectoria guardada de un vuelo (DataFrame de run_simulation)."""
+        from utils.trajectory_file import read_trajectory
+        path = os.path.join(self._sweep_dir(sweep_id), 'trajectories', f"run-{int(run_id)}.rtraj")
+        if not os.path.exists(path):
+            raise KeyError(f"No hay trayectoria guardada para {sweep_id}/{run_id}")
+        return read_trajectory(path)
+# -----------------------------------------------------------------------------
@@ -0,0 +1,213 @@
+# 19. utils/trajectory_file.py (Formato Binario de Trayectorias)
+# -----------------------------------------------------------------------------
+"""
+Archivo binario de una trayectoria (.rtraj), columnar y legible por partes:
+
+    prefijo fijo   '<8sIIQ': MAGIC, versión del formato, bytes de metadatos,
+                   número de muestras
+    metadatos      JSON UTF-8: columnas, dtype, desplazamientos de cada
+                   columna, parámetros SI, versión del modelo físico, resumen
+    columnas       una por columna de COLUMNS (float64 o float32) y los
+                   códigos de fase (int8), contiguas y alineadas a ALIGN bytes
+
+Cada columna puede abrirse con np.memmap sin leer el resto del archivo, y
+una ventana de tiempo se localiza por búsqueda binaria en la columna 'Time'.
+TrajectoryWriter recibe el vuelo por bloques (iter_simulation o
+run_simulation(..., output=ruta)) con memoria acotada: cada columna se vuelca
+a un archivo temporal y al cerrar se ensamblan en el archivo final.
+"""
+import json
+import os
+import shutil
+import struct
+import tempfile
+import numpy as np
+from utils.parameters import SIM_KEYS
+from utils.recorder import COLUMNS, PHASES, SummaryRecorder, trajectory_frame
+
+MAGIC = b'RTRAJ\x00\x00\x00'
+FORMAT_VERSION = 1
+PREFIX = struct.Struct('<8sIIQ')
+
+# Alineación de cada columna dentro del archivo [bytes]
+ALIGN = 64
+
+# Tipos admitidos para las columnas numéricas
+DTYPES = ('float64', 'float32')
+
+def _aligned(offset):
+    return -(-offset // ALIGN) * ALIGN
+
+class TrajectoryWriter:
+    """
+    Escritor de un archivo .rtraj por bloques (data (8, n), phase) en el
+    orden de COLUMNS, como los que genera iter_simulation.
+
+    metadata se guarda en la cabecera; run_simulation añade los parámetros
+    SI ('params'), el integrador y el backend. El archivo final aparece al
+    cerrar (close o bloque with); hasta entonces solo existen los archivos
+    temporales de cada columna.
+    """
+
+    def __init__(self, path, dtype='float64', metadata=None):
+        from utils.cache import PHYSICS_VERSION, physics_fingerprint
+
+        if dtype not in DTYPES:
+            raise ValueError(f"dtype no admitido: {dtype!r}. Opciones: {', '.join(DTYPES)}")
+        self.path = os.fspath(path)
+        self.dtype = np.dtype(dtype)
+        self.metadata = {'model_version': physics_fingerprint(),
+                         'physics_version': PHYSICS_VERSION, **(metadata or {})}
+        self.n_samples = 0
+        self._summary = SummaryRecorder()
+        self._tmpdir = tempfile.mkdtemp(prefix='.rtraj-',
+                                        dir=os.path.dirname(os.path.abspath(self.path)))
+        self._files = [open(os.path.join(self._tmpdir, str(i)), 'wb')
+                       for i in range(len(COLUMNS) + 1)]
+        self.closed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.discard()
+
+    def set_params(self, sim):
+        """Guarda los parámetros SI del vuelo (un SimParams) en la cabecera."""
+        self.metadata['params'] = {key: float(getattr(sim, key)) for key in SIM_KEYS}
+
+    def extend(self, data, phase):
+        """Añade un bloque de muestras al final de cada columna."""
+        for f, column in zip(self._files, data):
+            f.write(np.ascontiguousarray(column, dtype=self.dtype).tobytes())
+        self._files[-1].write(np.asarray(phase, dtype=np.int8).tobytes())
+        self._summary.extend(data, phase)
+        self.n_samples += data.shape[1]
+
+    def summary(self):
+        """Resumen del vuelo escrito hasta ahora (FlightSummary)."""
+        return self._summary.summary()
+
+    def close(self):
+        """Ensambla el archivo final (escritura atómica) y borra los temporales."""
+        if self.closed:
+            return
+        for f in self._files:
+            f.close()
+        n = self.n_samples
+        itemsizes = [self.dtype.itemsize] * len(COLUMNS) + [1]
+        names = list(COLUMNS) + ['Phase']
+
+        # Los desplazamientos dependen del tamaño de la cabecera y viceversa:
+        # se itera hasta que la cabecera codificada deja de cambiar
+        metadata = {**self.metadata, 'columns': list(COLUMNS), 'dtype': self.dtype.name,
+                    'phases': list(PHASES), 'summary': self._summary.summary().as_row(),
+                    'offsets': {}}
+        header = b''
+        while True:
+            offset = _aligned(PREFIX.size + len(header))
+            offsets = {}
+            for name, size in zip(names, itemsizes):
+                offsets[name] = offset
+                offset = _aligned(offset + n * size)
+            metadata['offsets'] = offsets
+            encoded = json.dumps(metadata).encode()
+            if encoded == header:
+                break
+            header = encoded
+
+        tmp = os.path.join(self._tmpdir, 'out')
+        with open(tmp, 'wb') as out:
+            out.write(PREFIX.pack(MAGIC, FORMAT_VERSION, len(header), n))
+            out.write(header)
+            for i, name in enumerate(names):
+                out.seek(offsets[name])
+                with open(os.path.join(self._tmpdir, str(i)), 'rb') as f:
+                    shutil.copyfileobj(f, out)
+            out.truncate(offset)
+        os.replace(tmp, self.path)
+        shutil.rmtree(self._tmpdir, ignore_errors=True)
+        self.closed = True
+
+    def discard(self):
+        """Abandona la escritura sin crear el archivo final."""
+        for f in self._files:
+            f.close()
+        shutil.rmtree(self._tmpdir, ignore_errors=True)
+        self.closed = True
+
+class TrajectoryFile:
+    """
+    Lector de un archivo .rtraj: la cabecera se lee al abrir y las columnas
+    se mapean en memoria bajo demanda.
+    """
+
+    def __init__(self, path):
+        self.path = os.fspath(path)
+        with open(self.path, 'rb') as f:
+            magic, version, header_bytes, self.n_samples = PREFIX.unpack(f.read(PREFIX.size))
+            if magic != MAGIC:
+                raise ValueError(f"{self.path} no es un archivo de trayectoria .rtraj")
+            if version > FORMAT_VERSION:
+                raise ValueError(f"Versión de formato no soportada: {version}")
+            self.metadata = json.loads(f.read(header_bytes))
+        self.dtype = np.dtype(self.metadata['dtype'])
+        self.offsets = self.metadata['offsets']
+
+    @property
+    def params(self):
+        return self.metadata.get('params')
+
+    @property
+    def model_version(self):
+        return self.metadata['model_version']
+
+    def column(self, name):
+        """Columna completa como np.memmap de solo lectura ('Phase': códigos int8)."""
+        if name not in self.offsets:
+            raise KeyError(f"Columna desconocida: {name!r}")
+        dtype = np.int8 if name == 'Phase' else self.dtype
+        if self.n_samples == 0:
+            return np.empty(0, dtype=dtype)
+        return np.memmap(self.path, dtype=dtype, mode='r', offset=self.offsets[name],
+                         shape=(self.n_samples,))
+
+    def window(self, t_start=None, t_end=None):
+        """Índices [i, j) de las muestras con t_start <= Time <= t_end."""
+        time = self.column('Time')
+        i = 0 if t_start is None else int(np.searchsorted(time, t_start, side='left'))
+        j = self.n_samples if t_end is None else int(np.searchsorted(time, t_end, side='right'))
+        return i, max(i, j)
+
+    def to_dataframe(self, t_start=None, t_end=None, columns=None):
+        """
+        DataFrame con el esquema de run_simulation (float64 y 'Phase'
+        categórica), completo o restringido a una ventana de tiempo. columns
+        limita las columnas numéricas leídas.
+        """
+        i, j = self.window(t_start, t_end)
+        names = COLUMNS if columns is None else [name for name in COLUMNS if name in columns]
+        data = np.array([self.column(name)[i:j] for name in names], dtype=float)
+        phase = np.array(self.column('Phase')[i:j])
+        if columns is None:
+            return trajectory_frame(data, phase)
+        frame = trajectory_frame(np.zeros((len(COLUMNS), j - i)), phase)
+        return frame[list(names) + ['Phase']].assign(
+            **{name: data[k] for k, name in enumerate(names)})
+
+def write_trajectory(path, df, params=None, dtype='float64', metadata=None):
+    """Guarda un DataFrame de run_simulation como .rtraj (params: SimParams opcional)."""
+    with TrajectoryWriter(path, dtype, metadata) as writer:
+        if params is not None:
+            writer.set_params(params)
+        writer.extend(np.array([df[name].to_numpy() for name in COLUMNS]),
+                      df['Phase'].cat.codes.to_numpy())
+    return path
+
+def read_trajectory(path, t_start=None, t_end=None, columns=None):
+    """Lee un .rtraj como DataFrame (ver TrajectoryFile.to_dataframe)."""
+    return TrajectoryFile(path).to_dataframe(t_start, t_end, columns)
+# -----------------------------------------------------------------------------
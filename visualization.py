@@ -1,7 +1,6 @@
 # 5. visualization.py (Plotting and Analysis)
 # -----------------------------------------------------------------------------
-import pandas as pd
-import matplotlib.pyplot as plt
+import threading
 import numpy as np
 from utils.parameters import PARAMS, RHO_W, G, P_ATM, GAMMA
 
@@ -46,72 +45,26 @@ def calculate_approx_tsiolkovsky(df, u_e_avg):
     
     return t_water, v_approx
 
-def plot_results(df_results):
-    """Genera las gráficas para trayectoria 2D del cohete."""
-    
-    # --- 1. Trayectoria 2D (X vs Y) ---
-    plt.figure(figsize=(12, 8))
-    
-    colors = {'Launch Tube': 'purple', 'Water': 'blue', 'Air': 'red', 'Ballistic': 'gray', 'Landed': 'green'}
-    for phase, group in df_results.groupby('Phase'):
-        plt.plot(group['X_Position'], group['Y_Position'], 
-                label=phase, color=colors.get(phase, 'black'), linewidth=2)
+# Plantilla de renderizado de cada hilo (rendering.FlightRenderer)
+_renderers = threading.local()
 
-    plt.axhline(y=0, color='green', linestyle='-', linewidth=3, alpha=0.5, label='Suelo')
-    plt.xlabel('Alcance Horizontal (m)', fontsize=12)
-    plt.ylabel('Altura (m)', fontsize=12)
-    plt.title('Trayectoria 2D del Cohete de Agua', fontsize=14, fontweight='bold')
-    plt.legend()
-    plt.grid(True, alpha=0.3)
-    plt.axis('equal')
-    plt.tight_layout()
-    plt.savefig('trajectory_2d.png', dpi=150)
-    
-    # --- 2. Gráficas de Serie de Tiempo ---
-    fig, axes = plt.subplots(3, 2, figsize=(14, 12))
-    
-    # Gráfico 1: Posición X vs Tiempo
-    axes[0, 0].plot(df_results['Time'], df_results['X_Position'], color='blue', linewidth=2)
-    axes[0, 0].set_ylabel('Posición X (m)')
-    axes[0, 0].set_title('Alcance Horizontal vs. Tiempo')
-    axes[0, 0].grid(True)
-    
-    # Gráfico 2: Posición Y vs Tiempo
-    axes[0, 1].plot(df_results['Time'], df_results['Y_Position'], color='red', linewidth=2)
-    axes[0, 1].set_ylabel('Posición Y (m)')
-    axes[0, 1].set_title('Altura vs. Tiempo')
-    axes[0, 1].grid(True)
-    
-    # Gráfico 3: Velocidad Total vs Tiempo
-    axes[1, 0].plot(df_results['Time'], df_results['Total_Velocity'], color='purple', linewidth=2)
-    axes[1, 0].set_ylabel('Velocidad Total (m/s)')
-    axes[1, 0].set_title('Velocidad vs. Tiempo')
-    axes[1, 0].grid(True)
-    
-    # Gráfico 4: Componentes de Velocidad
-    axes[1, 1].plot(df_results['Time'], df_results['X_Velocity'], label='Vx', color='blue', linewidth=2)
-    axes[1, 1].plot(df_results['Time'], df_results['Y_Velocity'], label='Vy', color='red', linewidth=2)
-    axes[1, 1].set_ylabel('Velocidad (m/s)')
-    axes[1, 1].set_title('Componentes de Velocidad')
-    axes[1, 1].legend()
-    axes[1, 1].grid(True)
-    
-    # Gráfico 5: Presión vs Tiempo
-    axes[2, 0].plot(df_results['Time'], df_results['Pressure'] / 1000.0, color='green', linewidth=2)
-    axes[2, 0].set_ylabel('Presión (kPa Abs)')
-    axes[2, 0].set_xlabel('Tiempo (s)')
-    axes[2, 0].set_title('Presión Interna vs. Tiempo')
-    axes[2, 0].grid(True)
-    
-    # Gráfico 6: Masa de Agua vs Tiempo
-    axes[2, 1].plot(df_results['Time'], df_results['Water Mass'] * 1000.0, color='orange', linewidth=2)
-    axes[2, 1].set_ylabel('Masa de Agua (g)')
-    axes[2, 1].set_xlabel('Tiempo (s)')
-    axes[2, 1].set_title('Masa de Agua vs. Tiempo')
-    axes[2, 1].grid(True)
+def plot_results(df_results, trajectory_path='trajectory_2d.png',
+                 series_path='results_series_2d.png'):
+    """
+    Genera las gráficas para trayectoria 2D del cohete.
+
+    Las imágenes se escriben en trajectory_path y series_path (None omite
+    una de ellas) con una plantilla Agg reutilizada entre llamadas, sin
+    dejar figuras abiertas.
+    """
+    from rendering import FlightRenderer
+
+    renderer = getattr(_renderers, 'renderer', None)
+    if renderer is None:
+        renderer = _renderers.renderer = FlightRenderer()
     
-    plt.tight_layout()
-    plt.savefig('results_series_2d.png', dpi=150)
+    # --- 1. Trayectoria 2D (X vs Y) y 2. Gráficas de Serie de Tiempo ---
+    renderer.render(df_results, trajectory_path, series_path)
 
     # --- 3. Resultados Numéricos Clave ---
     max_height = df_results['Y_Position'].max()